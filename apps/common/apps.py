@@ -4,3 +4,22 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.common'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete, pre_save
+        from django_cleanup.signals import cleanup_post_delete, cleanup_pre_delete
+        from apps.common.cache import bump_on_save, bump_on_delete
+        from apps.common.files import keep_shared_files
+        from apps.common.images import delete_siblings, mark_new_images, queue_new_images
+        from apps.common.media_gc import drop_references, index_references
+        from apps.common.richtext import render_on_save
+
+        post_save.connect(bump_on_save, dispatch_uid='common.bump_on_save')
+        post_delete.connect(bump_on_delete, dispatch_uid='common.bump_on_delete')
+        cleanup_pre_delete.connect(keep_shared_files, dispatch_uid='common.keep_shared_files')
+        pre_save.connect(mark_new_images, dispatch_uid='common.mark_new_images')
+        post_save.connect(queue_new_images, dispatch_uid='common.queue_new_images')
+        cleanup_post_delete.connect(delete_siblings, dispatch_uid='common.delete_siblings')
+        post_save.connect(index_references, dispatch_uid='common.index_references')
+        post_delete.connect(drop_references, dispatch_uid='common.drop_references')
+        pre_save.connect(render_on_save, dispatch_uid='common.render_on_save')
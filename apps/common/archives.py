@@ -0,0 +1,277 @@
+"""
+ZIP archives of a whole media collection or document category.
+
+The archive is produced as a generator while it is sent: each file is
+read in ARCHIVE_CHUNK_SIZE pieces and the ZIP bytes are yielded as soon
+as they are written, so memory stays constant whatever the archive size.
+Already compressed files (JPEG, PNG, PDF, ...) are stored as they are;
+deflating them would cost CPU for nothing.
+
+While streaming, the archive is also written to
+`archives/<model>/<pk>-<generation>.zip`, where the generation is a digest
+of the rows and files it contains. The next download of unchanged content
+is then sent as a plain file (by nginx with DOWNLOAD_ACCEL_PREFIX), and any
+change to the collection makes a new archive. Archives nothing references
+are removed by the media GC after MEDIA_GC_GRACE_DAYS, like other orphans.
+
+Only archives up to ARCHIVE_STREAM_MAX_SIZE are streamed by the request: a
+larger one would outlive the worker timeout and never be kept. It is built
+by the `build_archive` Celery task instead, and the request is answered
+with 202 and Retry-After until the archive is ready.
+"""
+import hashlib
+import os
+import tempfile
+import time
+import zipfile
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import content_disposition_header
+
+
+ARCHIVES_DIR = 'archives'
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+
+# URL kind -> (container model, related name of its files, file field).
+ARCHIVES = {
+    'media-collections': ('media.MediaCollection', 'media_images', 'image'),
+    'document-categories': ('main.DocumentCategory', 'documents', 'file'),
+}
+
+# Formats that are compressed already.
+STORED_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.pdf',
+    '.zip', '.rar', '.7z', '.gz', '.docx', '.xlsx', '.pptx', '.mp3', '.mp4',
+})
+
+
+def archive_container(kind):
+    try:
+        label, related_name, file_field = ARCHIVES[kind]
+    except KeyError:
+        raise Http404
+    return apps.get_model(label), related_name, file_field
+
+
+def archive_items(container, related_name):
+    """Active files of `container`, in the order they are archived."""
+    return list(getattr(container, related_name).filter(is_active=True).order_by('created_at', 'pk'))
+
+
+def archive_url(container, request=None):
+    from apps.common.downloads import school_link
+
+    label = container._meta.label
+    kind = next(kind for kind, (name, *rest) in ARCHIVES.items() if name == label)
+    return school_link(reverse('archive_download', args=[kind, container.pk]), request)
+
+
+def archive_entries(items, file_field):
+    """[(name in the archive, stored name)] with unique archive names."""
+    from apps.common.downloads import download_filename
+
+    entries, seen = [], set()
+    for item in items:
+        name = getattr(item, file_field).name
+        if not name:
+            continue
+        title = getattr(item, 'title', '') or ''
+        arcname = download_filename(item) if title else os.path.basename(name)
+        base, ext = os.path.splitext(arcname)
+        counter = 1
+        while arcname.lower() in seen:
+            counter += 1
+            arcname = f'{base} ({counter}){ext}'
+        seen.add(arcname.lower())
+        entries.append((arcname, name))
+    return entries
+
+
+def content_generation(items, file_field):
+    """Digest of what an archive of `items` contains; changes with any row or file."""
+    digest = hashlib.sha256()
+    for item in items:
+        digest.update(f'{item.pk}:{getattr(item, file_field).name}:{item.updated_at.isoformat()}\n'.encode())
+    return digest.hexdigest()[:16]
+
+
+def archive_name(container, generation):
+    return f'{ARCHIVES_DIR}/{container._meta.label_lower}/{container.pk}-{generation}.zip'
+
+
+class _Sink:
+    """Unseekable output of a ZipFile: keeps what was written until `take()`."""
+
+    def __init__(self, tee=None):
+        self.chunks = []
+        self.tee = tee
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        if self.tee is not None:
+            self.tee.write(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_archive(entries, tee=None):
+    """Yield the bytes of a ZIP of `entries` (see `archive_entries`); missing files are left out."""
+    sink = _Sink(tee)
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as archive:
+        for arcname, name in entries:
+            try:
+                source = default_storage.open(name, 'rb')
+                size = default_storage.size(name)
+                modified = default_storage.get_modified_time(name)
+            except OSError:
+                continue
+            info = zipfile.ZipInfo(arcname, date_time=max(modified.timetuple()[:6], (1980, 1, 1, 0, 0, 0)))
+            info.external_attr = 0o644 << 16
+            info.file_size = size
+            stored = os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+            info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            with source, archive.open(info, 'w') as target:
+                for chunk in iter(lambda: source.read(ARCHIVE_CHUNK_SIZE), b''):
+                    target.write(chunk)
+                    data = sink.take()
+                    if data:
+                        yield data
+            yield sink.take()
+    yield sink.take()
+
+
+def stream_and_keep(entries, name):
+    """`stream_archive()`, also writing the archive as `name` once it is complete."""
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        yield from stream_archive(entries)
+        return
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    complete = False
+    try:
+        with os.fdopen(fd, 'wb') as tee:
+            yield from stream_archive(entries, tee)
+        os.chmod(tmp, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+        os.replace(tmp, path)
+        complete = True
+    finally:
+        # A client that went away leaves a partial archive behind.
+        if not complete and os.path.exists(tmp):
+            os.unlink(tmp)
+
+    # Older generations of the same container are of no use any more.
+    prefix = os.path.basename(name).rsplit('-', 1)[0] + '-'
+    for other in os.listdir(directory):
+        if other.startswith(prefix) and other != os.path.basename(name):
+            try:
+                os.unlink(os.path.join(directory, other))
+            except OSError:
+                pass
+
+
+def remove_partial_archives(directory, max_age):
+    """Delete `.tmp-*` files older than `max_age` seconds left by killed workers."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    cutoff = time.time() - max_age
+    for other in names:
+        path = os.path.join(directory, other)
+        try:
+            if other.startswith('.tmp-') and os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+        except OSError:
+            pass
+
+
+def entries_size(entries):
+    size = 0
+    for arcname, name in entries:
+        try:
+            size += default_storage.size(name)
+        except OSError:
+            continue
+    return size
+
+
+def build_key(name):
+    return f'archive-build:{name}'
+
+
+def build_archive(kind, pk):
+    """Write the current archive of the `kind` container `pk` (see the `build_archive` task)."""
+    model, related_name, file_field = archive_container(kind)
+    container = model._base_manager.filter(pk=pk).first()
+    if container is None:
+        return None
+    items = archive_items(container, related_name)
+    name = archive_name(container, content_generation(items, file_field))
+    try:
+        if items and not default_storage.exists(name):
+            try:
+                remove_partial_archives(os.path.dirname(default_storage.path(name)), settings.ARCHIVE_BUILD_TIMEOUT)
+            except NotImplementedError:
+                pass
+            for _ in stream_and_keep(archive_entries(items, file_field), name):
+                pass
+    finally:
+        cache.delete(build_key(name))
+    return name
+
+
+def pending_response(status=202):
+    response = JsonResponse(
+        {'detail': "Arxiv tayyorlanmoqda. Birozdan so'ng qayta urinib ko'ring."},
+        status=status,
+    )
+    response['Retry-After'] = settings.ARCHIVE_RETRY_AFTER
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def archive_response(request, kind, container, items, file_field):
+    """
+    The ZIP of `items` (files of the `kind` container): cached if unchanged,
+    streamed if small, otherwise queued for `build_archive`.
+    """
+    from apps.common.downloads import accel_response, ranged_file_response
+    from apps.common.tasks import build_archive as build_task, enqueue
+
+    title = getattr(container, 'title', None) or getattr(container, 'name', '') or str(container.pk)
+    filename = f"{title.replace('/', ' ').strip()}.zip"
+    name = archive_name(container, content_generation(items, file_field))
+    if default_storage.exists(name):
+        if settings.DOWNLOAD_ACCEL_PREFIX:
+            return accel_response(name, filename)
+        return ranged_file_response(request, name, filename)
+
+    entries = archive_entries(items, file_field)
+    if entries_size(entries) > settings.ARCHIVE_STREAM_MAX_SIZE:
+        # One build per archive, however many clients ask meanwhile.
+        if cache.add(build_key(name), True, settings.ARCHIVE_BUILD_TIMEOUT):
+            school_id = getattr(container, 'school_id', None)
+            if enqueue(build_task, kind, container.pk, school_id) is None:
+                cache.delete(build_key(name))
+                return pending_response(status=503)
+        return pending_response()
+
+    response = StreamingHttpResponse(stream_and_keep(entries, name), content_type='application/zip')
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+
+
+# Saves that only touch these fields never change a list's row count.
+COUNT_NEUTRAL_FIELDS = frozenset({'view_count', 'updated_at'})
+
+
+def generation_key(model):
+    return f'gen:{model._meta.label_lower}'
+
+
+def get_generation(model):
+    """
+    Current data generation of `model`. Cache keys that embed it are
+    invalidated all at once by `bump_generation()`.
+    """
+    return cache.get_or_set(generation_key(model), 1, timeout=None)
+
+
+def bump_generation(model):
+    key = generation_key(model)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key was evicted (or never set): any new value starts a fresh generation.
+        cache.set(key, 2, timeout=None)
+        return 2
+
+
+def update_rows(queryset, **values):
+    """
+    `queryset.update(**values)`, which sends no post_save: bumps the
+    model's generation itself unless only COUNT_NEUTRAL_FIELDS change.
+    """
+    rows = queryset.update(**values)
+    if rows and not COUNT_NEUTRAL_FIELDS.issuperset(values):
+        bump_generation(queryset.model)
+    return rows
+
+
+def bump_on_save(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if not created and update_fields and COUNT_NEUTRAL_FIELDS.issuperset(update_fields):
+        return
+    bump_generation(sender)
+
+
+def bump_on_delete(sender, instance, **kwargs):
+    bump_generation(sender)
@@ -0,0 +1,64 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from apps.common.cache import get_generation
+
+
+def planner_estimate(queryset):
+    """
+    Row count the PostgreSQL planner expects for `queryset`, taken from
+    table statistics via EXPLAIN (no rows are read). None on other backends.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_cache_key(queryset, tenant=None):
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+    model = queryset.model
+    return f'count:{model._meta.label_lower}:{tenant or "all"}:{get_generation(model)}:{digest}'
+
+
+def cached_count(queryset, tenant=None):
+    """
+    Number of rows in `queryset`.
+
+    Exact counts are cached per tenant and query until a row of the model is
+    saved or deleted (see apps.common.cache). When the planner expects more
+    than COUNT_ESTIMATE_THRESHOLD rows its estimate is used instead of an
+    exact COUNT(*).
+    """
+    key = count_cache_key(queryset, tenant)
+    count = cache.get(key)
+    if count is not None:
+        return count
+
+    count = planner_estimate(queryset)
+    if count is None or count < settings.COUNT_ESTIMATE_THRESHOLD:
+        count = queryset.count()
+    cache.set(key, count, settings.COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin changelist paginator backed by `cached_count()`."""
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        return cached_count(self.object_list, tenant='admin')
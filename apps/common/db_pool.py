@@ -0,0 +1,36 @@
+import os
+from django.db import connections
+
+
+def get_pool_stats():
+    """
+    Connection statistics of every configured database alias for the
+    current (gunicorn worker) process.
+
+    For pooled aliases the psycopg_pool counters are returned together with
+    the derived `saturation` (share of `max_size` currently checked out)
+    and `avg_wait_ms` (average time a request waited for a connection).
+    """
+    stats = {'pid': os.getpid(), 'databases': {}}
+
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        if not settings_dict.get('OPTIONS', {}).get('pool'):
+            stats['databases'][alias] = {
+                'mode': 'persistent' if settings_dict.get('CONN_MAX_AGE') else 'per_request',
+                'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+                'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+            }
+            continue
+
+        pool = connections[alias].pool
+        pool_stats = pool.get_stats()
+        in_use = pool_stats.get('pool_size', 0) - pool_stats.get('pool_available', 0)
+        queued = pool_stats.get('requests_queued', 0)
+        stats['databases'][alias] = {
+            'mode': 'pool',
+            **pool_stats,
+            'saturation': round(in_use / pool.max_size, 3) if pool.max_size else 0,
+            'avg_wait_ms': round(pool_stats.get('requests_wait_ms', 0) / queued, 2) if queued else 0,
+        }
+    return stats
@@ -0,0 +1,149 @@
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+
+REPLICA_DB_ALIAS = 'replica'
+
+# True while the current request may read from the replica.
+_use_replica = ContextVar('use_replica', default=False)
+
+# School of the current request (set by SchoolShardMiddleware).
+_current_school = ContextVar('current_school', default=None)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def use_replica(enabled=True):
+    """
+    Allow (or forbid) replica reads for the current context.
+    Returns a token for `reset_replica()`.
+    """
+    return _use_replica.set(enabled)
+
+
+def reset_replica(token):
+    _use_replica.reset(token)
+
+
+def database_aliases():
+    """Every database holding rows (the default one and the school shards)."""
+    return [alias for alias in settings.DATABASES if alias != REPLICA_DB_ALIAS]
+
+
+def pin_primary():
+    """Send every following read of the current context to the primary."""
+    if _use_replica.get():
+        _use_replica.set(False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads go to the `replica` alias only when `ReplicaRoutingMiddleware`
+    marked the request as read-only; everything else (writes, admin,
+    Celery tasks, management commands) stays on the primary.
+
+    The first write of a request pins the rest of that request to the
+    primary, so a view never reads back stale data it just wrote.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_configured():
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        db_set = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in db_set and obj2._state.db in db_set:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_DB_ALIAS:
+            return False
+        return None
+
+
+def set_current_school(school_id):
+    """Route tenant queries of the current context to `school_id`'s shard."""
+    return _current_school.set(school_id)
+
+
+def reset_current_school(token):
+    _current_school.reset(token)
+
+
+def shard_cache_key(school_id):
+    return f'school-shard:{school_id}'
+
+
+def shard_for_school(school_id):
+    """Database alias holding the school's data (cached, `default` if unmapped)."""
+    if school_id is None:
+        return DEFAULT_DB_ALIAS
+    alias = cache.get(shard_cache_key(school_id))
+    if alias is None:
+        from apps.main.models import SchoolShard
+
+        alias = (
+            SchoolShard.objects.using(DEFAULT_DB_ALIAS)
+            .filter(school_id=school_id)
+            .values_list('alias', flat=True)
+            .first()
+        ) or DEFAULT_DB_ALIAS
+        cache.set(shard_cache_key(school_id), alias, settings.SHARD_CACHE_TIMEOUT)
+    return alias
+
+
+def forget_school_shard(school_id):
+    cache.delete(shard_cache_key(school_id))
+
+
+class TenantShardRouter:
+    """
+    Sends tenant-scoped models (see apps.main.services.tenancy) to the
+    database their school is mapped to in `SchoolShard`.
+
+    The school is taken from the `instance` hint (its database if it was
+    loaded from a shard, otherwise its school id) and falls back to the
+    school of the current request. Global models, and tenants living in
+    `default`, are left to the next router.
+    """
+
+    def _shard(self, model, hints):
+        from apps.main.services.tenancy import is_tenant_model, school_id_of
+
+        if not is_tenant_model(model):
+            return None
+
+        school_id = None
+        instance = hints.get('instance')
+        if instance is not None:
+            db = instance._state.db
+            if db and db not in (DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS) and is_tenant_model(instance.__class__):
+                return db
+            school_id = school_id_of(instance)
+        if school_id is None:
+            school_id = _current_school.get()
+
+        alias = shard_for_school(school_id)
+        return None if alias == DEFAULT_DB_ALIAS else alias
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Tenant rows point to global rows (School, Direction...) kept in default.
+        if obj1._state.db in settings.DATABASES and obj2._state.db in settings.DATABASES:
+            return True
+        return None
@@ -0,0 +1,138 @@
+"""
+Resized image variants made in-process with Pillow.
+
+A fallback for environments without the imgproxy service (and for the
+admin): `get_local_preset_url()` takes the same arguments as
+`apps.common.imgproxy.get_preset_url()` and returns the URL of a
+`PRESET_SIZES` variant stored under MEDIA_ROOT/derivatives. Variant names
+are derived from the source file's content hash, so they never go stale
+and can be cached forever by the CDN. A variant is rendered on first use.
+"""
+import os
+from io import BytesIO
+from urllib.parse import unquote, urlsplit
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from PIL import Image
+from apps.common.images import file_hash, open_image, replace_file, resize_image, to_rgb
+from apps.common.imgproxy import PRESET_SIZES
+
+
+DERIVATIVES_DIR = 'derivatives'
+# Output format per source format; anything else becomes JPEG.
+OUTPUT_FORMATS = {'JPEG': 'JPEG', 'PNG': 'PNG', 'WEBP': 'WEBP'}
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+# source name -> {preset-quality: variant name}; variants themselves never change.
+MEMO_TIMEOUT = 24 * 60 * 60
+
+
+def storage_name(source_url):
+    """Storage name of a file URL under MEDIA_URL (absolute or not), None for other URLs."""
+    base_url = getattr(default_storage, 'base_url', None) or settings.MEDIA_URL
+    for url in (source_url, urlsplit(source_url).path):
+        if url.startswith(base_url):
+            return unquote(url[len(base_url):])
+    return None
+
+
+def content_hash(name):
+    """sha256 of the stored file, recorded in ImageMetadata so it is computed once."""
+    from apps.common.models import ImageMetadata
+
+    known = ImageMetadata.objects.filter(name=name).values_list('content_hash', flat=True).first()
+    if known:
+        return known
+    digest = file_hash(name)
+    ImageMetadata.objects.update_or_create(name=name, defaults={'content_hash': digest})
+    return digest
+
+
+def render(fp, width, height, resize_type='fit', quality=85):
+    """(bytes, format) of the image in `fp` resized like imgproxy's `rs:<resize_type>:<width>:<height>`."""
+    cover = bool(resize_type == 'fill' and width and height)
+    img = open_image(fp, (width or 0, height or 0), cover=cover)
+    format = OUTPUT_FORMATS.get(img.format, 'JPEG')
+    img = resize_image(img, (width or 0, height or 0), cover=cover)
+
+    if img.mode == 'CMYK' or (format == 'JPEG' and img.mode not in ('RGB', 'L')):
+        img = to_rgb(img)
+    buffer = BytesIO()
+    options = {'optimize': True} if format == 'PNG' else {'quality': quality}
+    if img.info.get('icc_profile'):
+        # Wide-gamut photos (Display P3, Adobe RGB) keep their colors.
+        options['icc_profile'] = img.info['icc_profile']
+    img.save(buffer, format, **options)
+    return buffer.getvalue(), format
+
+
+def memo_key(name):
+    return f'derivatives:{name}'
+
+
+def forget_derivatives(name):
+    """Drop the memoized variant names of `name` (its content changed)."""
+    cache.delete(memo_key(name))
+
+
+def delete_derivatives(name, deleted=()):
+    """
+    Remove the stored variants of `name` (being deleted), unless another
+    file with the same content, not among `deleted`, still uses them.
+    """
+    from apps.common.files import discard
+    from apps.common.models import ImageMetadata
+
+    forget_derivatives(name)
+    digest = ImageMetadata.objects.filter(name=name).values_list('content_hash', flat=True).first()
+    if not digest or ImageMetadata.objects.filter(content_hash=digest).exclude(name__in=[name, *deleted]).exists():
+        return
+    for preset in PRESET_SIZES:
+        directory = f'{DERIVATIVES_DIR}/{preset}/{digest[:2]}'
+        try:
+            files = default_storage.listdir(directory)[1]
+        except FileNotFoundError:
+            continue
+        for file in files:
+            if file.startswith(f'{digest[:32]}-q'):
+                discard(f'{directory}/{file}')
+
+
+def get_derivative(name, preset, quality=85):
+    """Storage name of the `preset` variant of `name`, rendered if missing."""
+    memo = cache.get(memo_key(name)) or {}
+    variant = f'{preset}-{quality}'
+    if variant in memo:
+        return memo[variant]
+
+    digest = content_hash(name)
+    prefix = f'{DERIVATIVES_DIR}/{preset}/{digest[:2]}/{digest[:32]}-q{quality}'
+    existing = [f'{prefix}{ext}' for ext in EXTENSIONS.values() if default_storage.exists(f'{prefix}{ext}')]
+    if existing:
+        derivative = existing[0]
+    else:
+        with default_storage.open(name, 'rb') as f:
+            output, format = render(f, quality=quality, **PRESET_SIZES[preset])
+        derivative = f'{prefix}{EXTENSIONS[format]}'
+        if not default_storage.exists(derivative):
+            # Written as named: the name already is a content hash.
+            replace_file(derivative, output)
+
+    memo[variant] = derivative
+    cache.set(memo_key(name), memo, MEMO_TIMEOUT)
+    return derivative
+
+
+def get_local_preset_url(source_url: str, preset: str, quality: int = 85) -> str:
+    """Same as `get_preset_url`, but the variant is made and served locally."""
+    if preset not in PRESET_SIZES:
+        raise ValueError(f"Unknown preset: {preset}")
+
+    name = storage_name(source_url)
+    if not name or os.path.splitext(name)[1].lower() == '.svg':
+        return source_url
+    try:
+        return default_storage.url(get_derivative(name, preset, quality))
+    except (OSError, Image.DecompressionBombError):
+        # Missing, or not an image Pillow can read: serve it as it is.
+        return source_url
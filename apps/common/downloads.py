@@ -0,0 +1,286 @@
+"""
+Handing out uploaded documents through the application.
+
+`FileDownloadView` checks that the file belongs to the request's school
+and is active, counts the download, and leaves the transfer to nginx with
+`X-Accel-Redirect` (DOWNLOAD_ACCEL_PREFIX), so the gunicorn worker is
+free as soon as the headers are sent. Without nginx in front (development)
+the file is streamed by `ranged_file_response()`, which answers HTTP Range
+requests, so large downloads can be resumed and PDFs are read page by page.
+
+Counts are kept in the shared cache (`dl:<model>:<school>:<pk>`, one
+atomic increment per download) and written by `flush_downloads()`, which
+the `flush_download_counts` beat task runs every
+DOWNLOAD_COUNT_FLUSH_INTERVAL seconds, with one UPDATE per model and shard
+instead of one per request. A worker that dies loses nothing.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote, urlencode
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Case, F, IntegerField, Value, When
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+
+# URL kind -> model; every one has a `file` and a `download_count` field.
+DOWNLOADS = {
+    'resources': 'resource.ResourceFile',
+    'documents': 'main.Document',
+    'timetables': 'main.TimeTable',
+    'service-files': 'service.CultureServiceFile',
+}
+
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def download_model(kind):
+    try:
+        return apps.get_model(DOWNLOADS[kind])
+    except KeyError:
+        raise Http404
+
+
+def download_kind(model):
+    label = model._meta.label
+    return next(kind for kind, name in DOWNLOADS.items() if name == label)
+
+
+def school_link(url, request=None):
+    """Absolute `url` for a plain link, which can't send the `School` header: the school goes in the URL."""
+    if request is None:
+        return url
+    if getattr(request, 'subdomain', None) and getattr(request, 'school', None):
+        url = f'{url}?{urlencode({"school": request.subdomain})}'
+    return request.build_absolute_uri(url)
+
+
+def download_url(instance, request=None):
+    return school_link(reverse('file_download', args=[download_kind(instance.__class__), instance.pk]), request)
+
+
+def download_school(request):
+    """School of the request: from the `School` header, or the `school` query parameter of a link."""
+    from apps.main.services.sections import school_for_domain
+
+    school = getattr(request, 'school', None)
+    domain = request.GET.get('school', '').lower().strip()
+    if school is None and domain:
+        school = school_for_domain(domain)
+        if school is None or not school.is_active:
+            raise Http404
+    return school
+
+
+def download_queryset(model, school):
+    """Rows of `model` that belong to `school` (None: the main site), on the school's shard."""
+    from apps.common.db_routers import shard_for_school
+    from apps.main.services.tenancy import school_lookup
+
+    queryset = model._base_manager.filter(**{school_lookup(model): school})
+    alias = shard_for_school(getattr(school, 'id', None))
+    return queryset if alias == DEFAULT_DB_ALIAS else queryset.using(alias)
+
+
+def download_filename(instance):
+    """The file's title (when it has one) with the stored extension."""
+    extension = os.path.splitext(instance.file.name)[1]
+    title = getattr(instance, 'title', '') or ''
+    title = title.replace('/', ' ').replace('\\', ' ').strip()
+    return f'{title}{extension}' if title else os.path.basename(instance.file.name)
+
+
+############################################
+# Counting
+############################################
+
+# Counters that were created since the last flush are announced as
+# `dl:new:<n>`, numbered by DOWNLOAD_SEQ_KEY, so the flush can find them
+# without scanning the cache. Known counters are kept in DOWNLOAD_ITEMS_KEY,
+# which only the flush writes.
+DOWNLOAD_SEQ_KEY = 'dl:seq'
+DOWNLOAD_FLUSHED_KEY = 'dl:flushed'
+DOWNLOAD_ITEMS_KEY = 'dl:items'
+DOWNLOAD_LOCK_KEY = 'dl:flush-lock'
+
+
+def counter_key(label, school_id, pk):
+    return f'dl:{label}:{school_id or 0}:{pk}'
+
+
+def counts_as_download(request):
+    """Follow-up Range requests (a resumed download, PDF pages) are not new downloads."""
+    header = request.headers.get('Range', '').replace(' ', '')
+    return not header or header.startswith('bytes=0-')
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return None
+        return cache.incr(key)
+
+
+def record_download(instance, school_id):
+    """Count one download of `instance` (written later, see `flush_downloads`)."""
+    item = (instance._meta.label, school_id, instance.pk)
+    if _incr(counter_key(*item)) is None:
+        # A new counter: announce it to the flush.
+        cache.add(DOWNLOAD_SEQ_KEY, 0, timeout=None)
+        cache.set(f'dl:new:{cache.incr(DOWNLOAD_SEQ_KEY)}', item, timeout=None)
+
+
+def _collect_new_items(items):
+    """Add the announced counters to `items`; returns the last announcement read."""
+    start = cache.get(DOWNLOAD_FLUSHED_KEY, 0)
+    keys = [f'dl:new:{n}' for n in range(start + 1, cache.get(DOWNLOAD_SEQ_KEY, 0) + 1)]
+    announced = cache.get_many(keys)
+    read = 0
+    for key in keys:
+        if key not in announced:
+            # Numbered but not written yet: read from here next time.
+            break
+        items.add(tuple(announced[key]))
+        read += 1
+    cache.delete_many(keys[:read])
+    return start + read
+
+
+def flush_downloads():
+    """Write the counted downloads, one UPDATE per model and shard."""
+    from apps.common.db_routers import shard_for_school
+
+    # One flush at a time: the item list is read and written back.
+    if not cache.add(DOWNLOAD_LOCK_KEY, True, settings.DOWNLOAD_COUNT_FLUSH_INTERVAL):
+        return 0
+    try:
+        items = set(cache.get(DOWNLOAD_ITEMS_KEY) or ())
+        flushed = _collect_new_items(items)
+        cache.set(DOWNLOAD_ITEMS_KEY, items, timeout=None)
+        cache.set(DOWNLOAD_FLUSHED_KEY, flushed, timeout=None)
+    finally:
+        cache.delete(DOWNLOAD_LOCK_KEY)
+
+    counts = {}
+    for item in items:
+        key = counter_key(*item)
+        count = cache.get(key) or 0
+        if count:
+            # Only what was read is taken: downloads meanwhile stay for next time.
+            cache.decr(key, count)
+            counts[item] = count
+
+    batches = {}
+    for (label, school_id, pk), count in counts.items():
+        batches.setdefault((label, shard_for_school(school_id)), {})[pk] = count
+    for (label, alias), by_pk in batches.items():
+        model = apps.get_model(label)
+        model._base_manager.using(alias).filter(pk__in=by_pk).update(
+            download_count=F('download_count') + Case(
+                *(When(pk=pk, then=Value(count)) for pk, count in by_pk.items()),
+                output_field=IntegerField(),
+            )
+        )
+    return sum(counts.values())
+
+
+############################################
+# Responses
+############################################
+
+class FileRange:
+    """Bytes `start`..`end` (inclusive) of `file`, read the way FileResponse reads."""
+
+    def __init__(self, file, start, end):
+        file.seek(start)
+        self.file = file
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def requested_range(request, size, modified):
+    """
+    (start, end) of a single-range `Range` header, None when the whole file
+    is to be sent. Raises ValueError when the range can't be satisfied.
+    """
+    header = request.headers.get('Range', '')
+    match = RANGE_HEADER.match(header.strip())
+    if not match or not size:
+        return None
+    # A stale If-Range (the file changed since the first part) gets the whole file.
+    if_range = request.headers.get('If-Range')
+    if if_range and parse_http_date_safe(if_range) != int(modified):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        if not last or not int(last):
+            raise ValueError(header)
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def content_type_of(name):
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def accel_response(name, filename):
+    """Empty response telling nginx to send MEDIA_ROOT/`name` itself."""
+    response = HttpResponse(content_type=content_type_of(name))
+    response['X-Accel-Redirect'] = f"{settings.DOWNLOAD_ACCEL_PREFIX.rstrip('/')}/{quote(name)}"
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def ranged_file_response(request, name, filename):
+    """Stream the stored file `name`, or the byte range the client asked for."""
+    try:
+        path = default_storage.path(name)
+        stat = os.stat(path)
+        file = open(path, 'rb')
+    except OSError:
+        raise Http404
+
+    try:
+        byte_range = requested_range(request, stat.st_size, stat.st_mtime)
+    except ValueError:
+        file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    content_type = content_type_of(name)
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(file, start, end), status=206,
+            as_attachment=True, filename=filename, content_type=content_type,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
@@ -0,0 +1,102 @@
+"""
+Quality-targeted encoding of lossy formats (JPEG, WebP, AVIF).
+
+Instead of one fixed quality, an image is encoded at the lowest quality
+whose result still looks like the source: the SSIM of a downscaled
+grayscale copy (and of the alpha channel, for images with transparency)
+must reach IMAGE_SSIM_TARGET. The quality is found with a binary search between IMAGE_QUALITY_MIN and IMAGE_QUALITY_MAX (5-6 trial
+encodes). NumPy is optional; without it IMAGE_JPEG_QUALITY is used.
+"""
+from io import BytesIO
+from django.conf import settings
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# SSIM is computed on copies no larger than this, in 7x7 windows.
+SSIM_SIZE = 512
+SSIM_WINDOW = 7
+C1 = (0.01 * 255) ** 2
+C2 = (0.03 * 255) ** 2
+
+
+def has_alpha(img):
+    """True when some pixel of `img` is not fully opaque."""
+    if img.mode in ('RGBA', 'LA', 'PA'):
+        return img.getchannel('A').getextrema()[0] < 255
+    return 'transparency' in img.info
+
+
+def _planes(img, alpha=False):
+    """Downscaled grayscale copy of `img`, and of its alpha channel with `alpha`."""
+    planes = [img.convert('L')]
+    if alpha:
+        planes.append(img.convert('RGBA').getchannel('A'))
+    for plane in planes:
+        plane.thumbnail((SSIM_SIZE, SSIM_SIZE), Image.BILINEAR)
+    return [np.asarray(plane, dtype=np.float64) for plane in planes]
+
+
+def _window_mean(a, size):
+    """Mean of every `size`x`size` window, from an integral image."""
+    total = np.pad(a, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    windows = total[size:, size:] - total[:-size, size:] - total[size:, :-size] + total[:-size, :-size]
+    return windows / (size * size)
+
+
+def ssim(x, y):
+    """Mean structural similarity of two equally sized single-channel arrays (1.0: identical)."""
+    size = min(SSIM_WINDOW, *x.shape)
+    mu_x, mu_y = _window_mean(x, size), _window_mean(y, size)
+    var_x = _window_mean(x * x, size) - mu_x ** 2
+    var_y = _window_mean(y * y, size) - mu_y ** 2
+    cov = _window_mean(x * y, size) - mu_x * mu_y
+    similarity = ((2 * mu_x * mu_y + C1) * (2 * cov + C2)) / ((mu_x ** 2 + mu_y ** 2 + C1) * (var_x + var_y + C2))
+    return float(similarity.mean())
+
+
+def _score(reference, data, alpha):
+    """SSIM of the encoded `data` against the planes of the source: the worst plane counts."""
+    return min(ssim(x, y) for x, y in zip(reference, _planes(Image.open(BytesIO(data)), alpha)))
+
+
+def save(img, format, **options):
+    buffer = BytesIO()
+    img.save(buffer, format, **options)
+    return buffer.getvalue()
+
+
+def encode_to_target(img, format, options, target=None):
+    """
+    Encode `img` at the lowest quality reaching SSIM `target`
+    (default IMAGE_SSIM_TARGET). Returns (bytes, quality, ssim or None).
+    """
+    target = settings.IMAGE_SSIM_TARGET if target is None else target
+    if np is None or not target:
+        quality = settings.IMAGE_JPEG_QUALITY
+        return save(img, format, quality=quality, **options), quality, None
+
+    alpha = has_alpha(img)
+    reference = _planes(img, alpha)
+    low, high = settings.IMAGE_QUALITY_MIN, settings.IMAGE_QUALITY_MAX
+    best = None
+    while low <= high:
+        quality = (low + high) // 2
+        data = save(img, format, quality=quality, **options)
+        score = _score(reference, data, alpha)
+        if score >= target:
+            best = (data, quality, score)
+            high = quality - 1
+        else:
+            low = quality + 1
+
+    if best is None:
+        # Even the highest allowed quality misses the target: use it anyway.
+        quality = settings.IMAGE_QUALITY_MAX
+        data = save(img, format, quality=quality, **options)
+        best = (data, quality, _score(reference, data, alpha))
+    return best
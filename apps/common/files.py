@@ -0,0 +1,72 @@
+from functools import lru_cache
+from django.apps import apps
+from django.db import models
+from apps.common.db_routers import database_aliases
+
+
+@lru_cache(maxsize=None)
+def file_fields():
+    """(model, field) for every FileField/ImageField of the project."""
+    return tuple(
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.local_concrete_fields
+        if isinstance(field, models.FileField)
+    )
+
+
+def referenced_files(names, using=None, exclude=()):
+    """
+    The subset of stored file `names` that some row still points to, in
+    the `using` database or, by default, in any of them: schools on
+    different shards share files (fields in `exclude` don't count).
+    """
+    names, found = set(names), set()
+    for alias in [using] if using else database_aliases():
+        for model, field in file_fields():
+            remaining = names - found
+            if not remaining:
+                return found
+            if field in exclude:
+                continue
+            found.update(
+                model._base_manager.using(alias).filter(**{f'{field.name}__in': remaining})
+                .values_list(field.name, flat=True)
+            )
+    return found
+
+
+def rename_references(old, new):
+    """Point every file field holding `old` to `new`, in every database (no signals, no save())."""
+    for alias in database_aliases():
+        for model, field in file_fields():
+            model._base_manager.using(alias).filter(**{field.name: old}).update(**{field.name: new})
+
+
+def discard(name):
+    """
+    Delete the stored file `name` that the caller knows nothing uses; a
+    content-addressed storage skips its own reference checks.
+    """
+    from django.core.files.storage import default_storage
+
+    getattr(default_storage, 'delete_unreferenced', default_storage.delete)(name)
+
+
+def is_file_referenced(name):
+    """True when any row still points to the stored file `name`, or HTML content links it."""
+    from apps.common.models import MediaReference
+
+    return bool(referenced_files([name])) or MediaReference.objects.filter(name=name).exists()
+
+
+def keep_shared_files(sender, file, **kwargs):
+    """
+    django_cleanup `cleanup_pre_delete` receiver.
+
+    Cloned schools reuse the template's media files by reference, so a
+    file is only removed once no row uses it anymore. Emptying the name
+    turns django_cleanup's `file.delete()` into a no-op.
+    """
+    if file.name and is_file_referenced(file.name):
+        file.name = None
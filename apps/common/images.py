@@ -0,0 +1,396 @@
+"""
+Background processing of uploaded images.
+
+Every model with an ImageField takes part: a pre_save receiver notes the
+image fields that got a new upload, and once the transaction commits the
+stored files are handed to the `process_image` Celery task. The task
+normalizes the orientation, strips EXIF, caps the dimensions, re-encodes
+in the original format and swaps the stored file under the same name, so
+no row has to change (with content-addressed storage the result gets a new
+name and the rows are repointed, see swap_file). The result is recorded in
+ImageMetadata.
+"""
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+from PIL import Image
+from apps.common.encoding import encode_to_target, has_alpha, save
+from apps.common.files import rename_references
+from apps.common.placeholders import SAMPLE_SIZE, describe
+
+try:
+    from PIL import ImageCms
+except ImportError:
+    # Pillow built without LittleCMS: CMYK is converted without its profile.
+    ImageCms = None
+
+try:
+    # Registers an AVIF encoder with Pillow versions that have none built in.
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+
+# Formats that are re-encoded; others (GIF, SVG, ICO...) are only measured.
+# Lossy ones get the lowest quality that meets the SSIM target (apps.common.encoding).
+ENCODE_OPTIONS = {
+    'JPEG': {'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'method': 6},
+}
+LOSSY_FORMATS = {'JPEG', 'WEBP', 'AVIF'}
+# Smaller copies stored next to the image as <name>.webp / <name>.avif and
+# picked by nginx from the Accept header (nginx/conf.d).
+SIBLING_FORMATS = {'webp': ('WEBP', {'method': 6}), 'avif': ('AVIF', {'speed': 6})}
+
+EXIF_ORIENTATION = 0x0112
+# EXIF orientation -> transpose that makes the image upright (as ImageOps.exif_transpose)
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+# Shrink by whole factors (JPEG DCT scaling, reduce()) down to this many
+# times the target size, then resample. 3.0 looks the same as a full resample.
+REDUCING_GAP = 3.0
+
+
+@lru_cache(maxsize=None)
+def image_fields(model):
+    """attnames of the model's ImageFields."""
+    return tuple(
+        field.attname for field in model._meta.local_concrete_fields if isinstance(field, models.ImageField)
+    )
+
+
+def mark_new_images(sender, instance, raw=False, **kwargs):
+    """pre_save receiver: remember the image fields holding a not yet stored upload."""
+    if raw or not (settings.IMAGE_PIPELINE_ENABLED or settings.IMGPROXY_WARM_ENABLED):
+        return
+    fields = image_fields(sender)
+    if fields:
+        instance._new_images = [
+            attname for attname in fields
+            if getattr(instance, attname) and not getattr(instance, attname)._committed
+        ]
+
+
+def queue_new_images(sender, instance, raw=False, **kwargs):
+    """post_save receiver: process (and pre-warm) the freshly stored uploads after commit."""
+    attnames = instance.__dict__.pop('_new_images', None)
+    if not attnames:
+        return
+    from apps.common.tasks import enqueue_on_commit, process_image, warm_image
+    from apps.common.warming import presets_for
+
+    presets = list(presets_for(sender)) if settings.IMGPROXY_WARM_ENABLED else []
+    for attname in attnames:
+        name = getattr(instance, attname).name
+        if not name:
+            continue
+        if settings.IMAGE_PIPELINE_ENABLED:
+            enqueue_on_commit(process_image, name, presets)
+        elif presets:
+            enqueue_on_commit(warm_image, name, presets)
+
+
+def replace_file(name, content):
+    """
+    Store `content` as `name`. On the local filesystem the new file is
+    written next to the old one and renamed over it, so readers see either
+    the old or the new file, never a partial one.
+    """
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        default_storage.delete(name)
+        default_storage.save(name, ContentFile(content))
+        return
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(tmp, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def orientation(img):
+    return img.getexif().get(EXIF_ORIENTATION, 1)
+
+
+def fit_size(size, box):
+    """`size` scaled down (never up) to fit in `box`; 0 in `box` means no limit."""
+    width, height = size
+    scale = min(box[0] / width if box[0] else 1, box[1] / height if box[1] else 1, 1)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def cover_size(size, box):
+    """`size` scaled down to the smallest size that still covers `box`."""
+    width, height = size
+    scale = min(max(box[0] / width, box[1] / height), 1)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def open_image(fp, box=None, cover=False):
+    """
+    Open an image without decoding more pixels than a resize to `box` needs.
+
+    JPEGs are decoded in draft mode, scaled by 1/2, 1/4 or 1/8 in the DCT,
+    so a 6000x4000 photo made into a thumbnail never exists in memory at
+    full size. `box` is in upright (EXIF-rotated) coordinates.
+    """
+    img = Image.open(fp)
+    if box and img.format == 'JPEG':
+        if orientation(img) in (5, 6, 7, 8):
+            box = box[::-1]
+        target = cover_size(img.size, box) if cover else fit_size(img.size, box)
+        img.draft(None, (int(target[0] * REDUCING_GAP), int(target[1] * REDUCING_GAP)))
+    return img
+
+
+def resize_image(img, box, cover=False):
+    """
+    Upright copy of `img` resized to fit `box` (or to fill it, cropping the
+    overflow, with `cover`). Whole-factor reduction comes first, see
+    REDUCING_GAP; the EXIF orientation is applied last, on the small image.
+    """
+    turn = ORIENTATION_TRANSPOSE.get(orientation(img))
+    if turn in (Image.Transpose.TRANSPOSE, Image.Transpose.ROTATE_270,
+                Image.Transpose.TRANSVERSE, Image.Transpose.ROTATE_90):
+        box = box[::-1]
+
+    if cover and box[0] and box[1]:
+        width, height = img.size
+        scale = max(box[0] / width, box[1] / height)
+        crop_w, crop_h = box[0] / scale, box[1] / scale
+        left, top = (width - crop_w) / 2, (height - crop_h) / 2
+        img = img.resize(box, Image.LANCZOS, box=(left, top, left + crop_w, top + crop_h), reducing_gap=REDUCING_GAP)
+    elif fit_size(img.size, box) != img.size:
+        img = img.resize(fit_size(img.size, box), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+
+    return img.transpose(turn) if turn is not None else img
+
+
+def swap_file(name, content):
+    """
+    Store the processed `content` in place of `name`; returns the name it
+    ends up under. A content-addressed storage gives new content a new
+    name, so the rows pointing to the old one are updated. The old file
+    stays: its URL may already be in HTML content (a TinyMCE upload returns
+    it before processing), and the media GC removes it once nothing links it.
+    """
+    if getattr(default_storage, 'content_addressed', False):
+        new_name = default_storage.save(name, ContentFile(content))
+        if new_name != name:
+            rename_references(name, new_name)
+        return new_name
+    replace_file(name, content)
+    return name
+
+
+def normalize(img, max_dimension):
+    """Upright image no larger than `max_dimension`; returns (image, changed)."""
+    box = (max_dimension, max_dimension)
+    changed = orientation(img) != 1 or fit_size(img.size, box) != img.size
+    if changed:
+        img = resize_image(img, box)
+    return img, changed
+
+
+def to_rgb(img):
+    """
+    RGB copy of `img`. CMYK goes through its embedded color profile to
+    sRGB; the CMYK profile itself is dropped, it does not describe RGB
+    pixels (untagged images are shown as sRGB).
+    """
+    info = dict(img.info)
+    if img.mode != 'CMYK':
+        rgb = img.convert('RGB')
+    else:
+        profile = info.pop('icc_profile', None)
+        rgb = None
+        if profile and ImageCms is not None:
+            try:
+                rgb = ImageCms.profileToProfile(
+                    img, ImageCms.ImageCmsProfile(BytesIO(profile)), ImageCms.createProfile('sRGB'), outputMode='RGB',
+                )
+            except (ImageCms.PyCMSError, OSError):
+                pass
+        if rgb is None:
+            rgb = img.convert('RGB')
+    rgb.info = info
+    return rgb
+
+
+def encode(img, format, options=None):
+    """(bytes, quality, ssim) of `img` in `format`; quality and ssim are None for lossless formats."""
+    # JPEG has no alpha; WebP and AVIF keep it. No encoder takes CMYK with its profile.
+    if img.mode == 'CMYK' or (format == 'JPEG' and img.mode not in ('RGB', 'L')):
+        img = to_rgb(img)
+    options = dict(ENCODE_OPTIONS.get(format, {}) if options is None else options)
+    if img.info.get('icc_profile'):
+        options['icc_profile'] = img.info['icc_profile']
+    # No `exif=`: the metadata (camera, GPS...) is not written back.
+    if format == 'WEBP' and has_alpha(img):
+        # Lossy WebP smears the edges of transparent areas (logos, icons).
+        return save(img, format, lossless=True, **options), None, None
+    if format in LOSSY_FORMATS:
+        return encode_to_target(img, format, options)
+    return save(img, format, **options), None, None
+
+
+def can_encode(format):
+    """True when this Pillow can write `format` (AVIF needs Pillow >= 11.3 or pillow-avif-plugin)."""
+    Image.init()
+    return format in Image.SAVE
+
+
+def sibling_names(name):
+    return {ext: f'{name}.{ext}' for ext in SIBLING_FORMATS}
+
+
+def encode_siblings(img, size):
+    """
+    {ext: (bytes, details)} of the WebP/AVIF versions of `img`; None for
+    the ones that do not come out smaller than `size`.
+    """
+    siblings = {}
+    for ext, (format, options) in SIBLING_FORMATS.items():
+        if ext not in settings.IMAGE_SIBLING_FORMATS or img.format == format or not can_encode(format):
+            continue
+        data, quality, score = encode(img, format, options)
+        siblings[ext] = (data, {'size': len(data), 'quality': quality, 'ssim': score}) if len(data) < size else None
+    return siblings
+
+
+def write_siblings(name, img, size):
+    """Store the WebP/AVIF siblings that come out smaller than `size`; returns their details."""
+    variants = {}
+    for ext, sibling in encode_siblings(img, size).items():
+        if sibling is not None:
+            replace_file(f'{name}.{ext}', sibling[0])
+            variants[ext] = sibling[1]
+        elif default_storage.exists(f'{name}.{ext}'):
+            default_storage.delete(f'{name}.{ext}')
+    return variants
+
+
+def delete_siblings(sender, file_name, success=True, **kwargs):
+    """django_cleanup `cleanup_post_delete` receiver: remove the siblings with the image."""
+    if not success or not file_name or default_storage.exists(file_name):
+        # Not deleted (or kept because another row still uses it).
+        return
+    for sibling in sibling_names(file_name).values():
+        if default_storage.exists(sibling):
+            default_storage.delete(sibling)
+
+
+def file_hash(name):
+    """sha256 of a stored file, read in chunks."""
+    digest = hashlib.sha256()
+    with default_storage.open(name, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def process_stored_image(name):
+    """Run the pipeline on the stored image `name`; returns its ImageMetadata (None if unreadable)."""
+    from apps.common.derivatives import forget_derivatives
+    from apps.common.models import ImageMetadata
+
+    if not name or not default_storage.exists(name):
+        return None
+    if getattr(default_storage, 'content_addressed', False):
+        # A deduplicated upload may point to a blob that was processed already.
+        done = ImageMetadata.objects.filter(name=name).exclude(format='').first()
+        if done:
+            return done
+    original_size = default_storage.size(name)
+    limit = settings.IMAGE_MAX_DIMENSION
+
+    output = quality = score = None
+    variants = {}
+    with default_storage.open(name, 'rb') as f:
+        try:
+            img = open_image(f, (limit, limit))
+            format, has_exif = img.format, bool(img.info.get('exif'))
+            if format in ENCODE_OPTIONS and getattr(img, 'n_frames', 1) == 1:
+                img, changed = normalize(img, limit)
+                img.format = format
+                output, quality, score = encode(img, format)
+                if len(output) >= original_size and not (changed or has_exif):
+                    output = quality = score = None
+            placeholders = describe(img)
+        except (OSError, Image.DecompressionBombError):
+            return None
+
+    if output is not None:
+        forget_derivatives(name)
+        name = swap_file(name, output)
+        digest = hashlib.sha256(output).hexdigest()
+    else:
+        digest = file_hash(name)
+    if format in ENCODE_OPTIONS and getattr(img, 'n_frames', 1) == 1:
+        variants = write_siblings(name, img, len(output) if output is not None else original_size)
+
+    metadata, created = ImageMetadata.objects.update_or_create(
+        name=name,
+        defaults={
+            'width': img.width,
+            'height': img.height,
+            'format': format or '',
+            'original_size': original_size,
+            'size': len(output) if output is not None else original_size,
+            'content_hash': digest,
+            'quality': quality,
+            'ssim': score,
+            'variants': variants,
+            'warm_variants': {},
+            **placeholders,
+        },
+    )
+    return metadata
+
+
+def describe_stored_image(name):
+    """
+    Fill in the size and placeholders of an image the pipeline skipped
+    (stored before it existed, or with IMAGE_PIPELINE_ENABLED off) without
+    re-encoding it. Returns its ImageMetadata (None if unreadable).
+    """
+    from apps.common.models import ImageMetadata
+
+    try:
+        with default_storage.open(name, 'rb') as f:
+            img = Image.open(f)
+            width, height = img.size
+            if orientation(img) in (5, 6, 7, 8):
+                width, height = height, width
+            if img.format == 'JPEG':
+                img.draft(None, (SAMPLE_SIZE * 4, SAMPLE_SIZE * 4))
+            placeholders = describe(resize_image(img, (SAMPLE_SIZE * 2, SAMPLE_SIZE * 2)))
+    except (OSError, Image.DecompressionBombError):
+        return None
+
+    metadata, created = ImageMetadata.objects.update_or_create(
+        name=name, defaults={'width': width, 'height': height, **placeholders},
+    )
+    return metadata
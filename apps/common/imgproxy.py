@@ -1,6 +1,7 @@
 import base64
 import hashlib
 import hmac
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from urllib.parse import quote
 from django.conf import settings
@@ -13,10 +14,22 @@ class SimpleImgproxyUrlBuilder:
     
     This is for frontend-direct usage where the frontend constructs URLs.
     Example: https://ipx.lamenu.uz/insecure/rs:fit:128:128:0/q:100/plain/https://cdn.lamenu.uz/image.jpg
+
+    When IMGPROXY_KEY and IMGPROXY_SALT (hex) are set, URLs are signed
+    instead: /<signature>/processing_options/plain/source_url
     """
     
-    def __init__(self, base_url: str = None):
+    def __init__(self, base_url: str = None, key: str = None, salt: str = None):
         self.base_url = (base_url or getattr(settings, 'IMGPROXY_BASE_URL', 'http://localhost:8080')).rstrip('/')
+        key = key if key is not None else getattr(settings, 'IMGPROXY_KEY', '')
+        salt = salt if salt is not None else getattr(settings, 'IMGPROXY_SALT', '')
+        self.key = bytes.fromhex(key) if key else None
+        self.salt = bytes.fromhex(salt) if salt else None
+
+    def sign(self, path: str) -> str:
+        """imgproxy signature of `path` (URL-safe base64 of HMAC-SHA256 over salt + path)."""
+        digest = hmac.new(self.key, self.salt + path.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
         
     def build_url(
         self,
@@ -73,14 +86,16 @@ class SimpleImgproxyUrlBuilder:
         
         # Build URL
         processing_options = "/".join(options) if options else ""
-        url_parts = [self.base_url, "insecure"]
+        url_parts = []
         
         if processing_options:
             url_parts.append(processing_options)
             
         url_parts.extend(["plain", source_url])
-        
-        return "/".join(url_parts)
+        path = "/" + "/".join(url_parts)
+
+        signature = self.sign(path) if self.key and self.salt else "insecure"
+        return f"{self.base_url}/{signature}{path}"
 
 
 # Global instance
@@ -128,12 +143,33 @@ PRESET_SIZES = {
 }
 
 
+# Presets the API serves per model (ImgproxyImageField) and that are
+# requested from imgproxy right after an upload (apps.common.warming).
+IMAGE_PRESETS = {
+    'main.banner': ('banner_mobile', 'banner_desktop'),
+    'main.schoollife': ('list_small', 'list_medium', 'banner_mobile'),
+    'main.teacher': ('avatar_small', 'avatar_medium', 'thumb_large'),
+    'news.news': ('list_small', 'list_medium', 'banner_mobile'),
+    'media.mediaimage': ('thumb_small', 'thumb_medium', 'thumb_large'),
+    'service.serviceimage': ('thumb_medium', 'list_medium', 'thumb_large'),
+}
+
+
+@lru_cache(maxsize=4096)
+def _imgproxy_preset_url(source_url: str, preset: str, quality: int) -> str:
+    # Memoized: serializers ask for the same (image, preset) on every request.
+    options = PRESET_SIZES[preset].copy()
+    options['quality'] = quality
+    return imgproxy.build_url(source_url, **options)
+
+
 def get_preset_url(source_url: str, preset: str, quality: int = 85) -> str:
     """Get URL using predefined preset."""
     if preset not in PRESET_SIZES:
         raise ValueError(f"Unknown preset: {preset}")
     
-    options = PRESET_SIZES[preset].copy()
-    options['quality'] = quality
-    
-    return imgproxy.build_url(source_url, **options) 
\ No newline at end of file
+    if not getattr(settings, 'IMGPROXY_ENABLED', True):
+        from apps.common.derivatives import get_local_preset_url
+        return get_local_preset_url(source_url, preset, quality)
+
+    return _imgproxy_preset_url(source_url, preset, quality) 
\ No newline at end of file
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import resource
+import statistics
+import tempfile
+import time
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageOps
+from apps.common.images import open_image, resize_image
+from apps.common.imgproxy import PRESET_SIZES
+
+
+def full_decode(path, box, cover):
+    """How images were resized before: decode everything, then resample."""
+    img = Image.open(path)
+    img.load()
+    img = ImageOps.exif_transpose(img)
+    if cover:
+        return ImageOps.fit(img, box, Image.LANCZOS)
+    img.thumbnail(box, Image.LANCZOS, reducing_gap=None)
+    return img
+
+
+def reduced_decode(path, box, cover):
+    with open(path, 'rb') as f:
+        img = open_image(f, box, cover=cover)
+        return resize_image(img, box, cover=cover)
+
+
+MODES = {'full': full_decode, 'reduced': reduced_decode}
+
+
+def measure(mode, path, box, cover, conn):
+    # Runs in a fresh child: ru_maxrss starts at the parent's size, the growth is ours.
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    MODES[mode](path, box, cover).tobytes()
+    seconds = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    conn.send((seconds, peak * 1024))
+    conn.close()
+
+
+class Command(BaseCommand):
+    help = 'Compare time and peak memory of full vs reduced (draft mode) decoding when making image variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', help='Images to test (default: a generated photo, see --generate)')
+        parser.add_argument(
+            '--generate',
+            default='6000x4000',
+            help='Size of the generated test JPEG when no files are given (default: 6000x4000)',
+        )
+        parser.add_argument(
+            '--preset',
+            default='thumb_small',
+            choices=sorted(PRESET_SIZES),
+            help='Variant to make (default: thumb_small)',
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per image and mode (default: 3)')
+
+    def handle(self, *args, **options):
+        files = options['files']
+        tmp = None
+        if not files:
+            try:
+                width, height = (int(x) for x in options['generate'].lower().split('x'))
+            except ValueError:
+                raise CommandError('--generate must look like 6000x4000')
+            tmp = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
+            Image.effect_noise((width, height), 64).convert('RGB').save(tmp, 'JPEG', quality=90)
+            tmp.close()
+            files = [tmp.name]
+
+        preset = PRESET_SIZES[options['preset']]
+        box = (preset['width'], preset['height'])
+        cover = preset['resize_type'] == 'fill'
+        context = multiprocessing.get_context('fork')
+
+        try:
+            for path in files:
+                with Image.open(path) as img:
+                    self.stdout.write(f'{os.path.basename(path)} {img.size[0]}x{img.size[1]} '
+                                      f'({os.path.getsize(path) / 2 ** 20:.1f} MB) -> {options["preset"]}')
+                for mode in MODES:
+                    runs = []
+                    for _ in range(options['repeat']):
+                        parent, child = context.Pipe(duplex=False)
+                        process = context.Process(target=measure, args=(mode, path, box, cover, child))
+                        process.start()
+                        runs.append(parent.recv())
+                        process.join()
+                    seconds = statistics.median(run[0] for run in runs)
+                    peak = max(run[1] for run in runs)
+                    self.stdout.write(f'  {mode:8} {seconds * 1000:8.1f} ms  {peak / 2 ** 20:7.1f} MB peak')
+        finally:
+            if tmp:
+                os.unlink(tmp.name)
+
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,61 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from apps.common import media_gc
+from apps.main.models import School
+
+
+class Command(BaseCommand):
+    help = 'Delete media files no row or HTML content links to anymore, continuing from the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reindex',
+            action='store_true',
+            help='Rebuild the index of files linked from HTML content first',
+        )
+        parser.add_argument(
+            '--max-files',
+            type=int,
+            default=settings.MEDIA_GC_MAX_FILES,
+            help=f'Files to check in this run (default: {settings.MEDIA_GC_MAX_FILES})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.MEDIA_GC_BATCH_SIZE,
+            help=f'Files checked and deleted together (default: {settings.MEDIA_GC_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--grace-days',
+            type=float,
+            default=settings.MEDIA_GC_GRACE_DAYS,
+            help=f'Keep files younger than this (default: {settings.MEDIA_GC_GRACE_DAYS})',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        if options['reindex']:
+            total = media_gc.reindex(stdout=self.stdout)
+            self.stdout.write(self.style.SUCCESS(f'{total} references indexed'))
+
+        sweep = media_gc.collect(
+            max_files=options['max_files'],
+            batch_size=options['batch_size'],
+            grace=timedelta(days=options['grace_days']),
+            dry_run=options['dry_run'],
+        )
+
+        domains = dict(
+            School.objects.filter(pk__in=[key for key in sweep.by_school if key != '-']).values_list('pk', 'domain')
+        )
+        for key, size in sorted(sweep.by_school.items(), key=lambda item: -item[1]):
+            school = domains.get(int(key), key) if key != '-' else '(no school)'
+            self.stdout.write(f'  {school}: {filesizeformat(size)}')
+
+        verb = 'would be deleted' if options['dry_run'] else 'deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{sweep.scanned} files checked, {sweep.deleted} {verb} ({filesizeformat(sweep.reclaimed_bytes)}); '
+            + (f'next run starts after {sweep.position}' if sweep.position else 'storage fully walked')
+        ))
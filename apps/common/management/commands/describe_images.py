@@ -0,0 +1,37 @@
+import os
+from django.core.management.base import BaseCommand
+from django.db import models
+from apps.common.files import file_fields
+from apps.common.images import describe_stored_image
+from apps.common.media_gc import database_aliases
+from apps.common.models import ImageMetadata
+
+
+class Command(BaseCommand):
+    help = 'Store the size, dominant color and BlurHash of images that have none yet (without re-encoding them)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Also images that already have them')
+
+    def handle(self, *args, **options):
+        names = set()
+        for model, field in file_fields():
+            if not isinstance(field, models.ImageField):
+                continue
+            for alias in database_aliases():
+                names.update(
+                    model._base_manager.using(alias).exclude(**{field.name: ''})
+                    .values_list(field.name, flat=True).distinct()
+                )
+        names = {name for name in names if name and os.path.splitext(name)[1].lower() != '.svg'}
+        if not options['force']:
+            names -= set(ImageMetadata.objects.exclude(blurhash='').values_list('name', flat=True))
+
+        described = failed = 0
+        for name in sorted(names):
+            if describe_stored_image(name):
+                described += 1
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'  {name}: missing or not readable'))
+        self.stdout.write(self.style.SUCCESS(f'{described} images described, {failed} skipped'))
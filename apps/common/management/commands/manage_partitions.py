@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from apps.common import partitioning
+from apps.common.db_routers import database_aliases
+
+
+class Command(BaseCommand):
+    help = 'Convert PARTITIONED_MODELS tables to monthly partitions, create upcoming partitions and archive old ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convert tables that are not partitioned yet (locks the table while rows are copied)',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.PARTITION_MONTHS_AHEAD,
+            help='How many future months should already have a partition',
+        )
+        parser.add_argument(
+            '--archive-older-than',
+            type=int,
+            default=settings.PARTITION_RETENTION_MONTHS,
+            help='Detach partitions older than this many months into the "archive" schema',
+        )
+
+    def handle(self, *args, **options):
+        aliases = [alias for alias in database_aliases() if partitioning.is_supported(alias)]
+        if not aliases:
+            self.stdout.write(self.style.WARNING('Partitioning needs PostgreSQL, nothing to do.'))
+            return
+
+        if options['convert']:
+            for alias in aliases:
+                for model in partitioning.partitioned_models():
+                    table = model._meta.db_table
+                    if partitioning.is_partitioned(table, alias):
+                        continue
+                    partitioning.convert_table(model, alias)
+                    self.stdout.write(self.style.SUCCESS(f'{alias}: {table}: converted to monthly partitions'))
+
+        report = partitioning.maintain(options['months_ahead'], options['archive_older_than'])
+        if not report:
+            self.stdout.write(self.style.WARNING('No partitioned tables found, run with --convert first.'))
+
+        for alias, tables in report.items():
+            for table, result in tables.items():
+                self.stdout.write(self.style.SUCCESS(
+                    f"{alias}: {table}: {len(result['created'])} partition(s) created, "
+                    f"{len(result['archived'])} archived"
+                ))
+                for name in result['archived']:
+                    self.stdout.write(f'  archived {partitioning.ARCHIVE_SCHEMA}.{name}')
@@ -0,0 +1,34 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from apps.common.media_gc import database_aliases
+from apps.common.richtext import render_instance, rendered_fields, rendered_values
+
+
+class Command(BaseCommand):
+    help = 'Render the rich text of existing rows into their *_rendered fields (lazy, responsive images)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows written per query (default: 200)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model in apps.get_models():
+            # Inherited fields are rendered with the parent (Service, not CultureService).
+            if not rendered_fields(model) or model._meta.parents:
+                continue
+            total = 0
+            for alias in database_aliases():
+                batch, fields = [], None
+                for instance in model._base_manager.using(alias).order_by('pk').iterator(chunk_size=batch_size):
+                    render_instance(instance)
+                    fields = fields or list(rendered_values(instance))
+                    batch.append(instance)
+                    if len(batch) >= batch_size:
+                        model._base_manager.using(alias).bulk_update(batch, fields)
+                        total += len(batch)
+                        batch = []
+                if batch:
+                    model._base_manager.using(alias).bulk_update(batch, fields)
+                    total += len(batch)
+            self.stdout.write(f'  {model._meta.label}: {total} rows rendered')
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,51 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from apps.common.images import image_fields
+from apps.common.imgproxy import IMAGE_PRESETS
+from apps.common.media_gc import database_aliases
+from apps.common.tasks import warm_image
+from apps.common.warming import warm_image as warm
+
+
+class Command(BaseCommand):
+    help = 'Request the IMAGE_PRESETS variants of stored images so imgproxy (or the local fallback) has them cached'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=sorted(IMAGE_PRESETS),
+            help='Only these models (default: all in IMAGE_PRESETS)',
+        )
+        parser.add_argument('--sync', action='store_true', help='Warm here instead of queueing Celery tasks')
+
+    def handle(self, *args, **options):
+        queued = failed = 0
+        for label in options['models'] or sorted(IMAGE_PRESETS):
+            try:
+                model = apps.get_model(label)
+            except LookupError:
+                raise CommandError(f'Unknown model: {label}')
+            presets = list(IMAGE_PRESETS[label])
+            names = set()
+            for attname in image_fields(model):
+                for alias in database_aliases():
+                    names.update(
+                        model._base_manager.using(alias).exclude(**{attname: ''})
+                        .values_list(attname, flat=True).distinct()
+                    )
+            names.discard(None)
+
+            for name in sorted(names):
+                if options['sync']:
+                    missing = warm(name, presets)
+                    if missing:
+                        failed += 1
+                        self.stdout.write(self.style.WARNING(f'  {name}: {", ".join(missing)} not warmed'))
+                else:
+                    warm_image.delay(name, presets)
+                queued += 1
+            self.stdout.write(f'  {label}: {len(names)} images')
+
+        verb = 'warmed' if options['sync'] else 'queued'
+        self.stdout.write(self.style.SUCCESS(f'{queued - failed} images {verb}, {failed} failed'))
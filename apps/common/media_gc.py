@@ -0,0 +1,248 @@
+"""
+Removal of media files nothing uses anymore.
+
+django_cleanup deletes a file when its FileField changes, but images put
+into HTML content through the TinyMCE upload view are only linked from the
+HTML: their TinyMCEImage row keeps them alive forever. So the stored files
+linked from every HTMLField are indexed as MediaReference rows when a row
+is saved, and `collect()` walks the storage in name order, a bounded number
+of files per run, continuing where the previous run (MediaSweep) stopped.
+
+A file older than MEDIA_GC_GRACE_DAYS is deleted when no FileField (other
+than TinyMCEImage's) and no MediaReference points to it. Before deleting,
+the HTML fields are searched for the name as well, so content written
+without signals (bulk inserts, cloned schools) never loses its images.
+"""
+import html
+import os
+import re
+from datetime import timedelta
+from functools import lru_cache, reduce
+from operator import or_
+from urllib.parse import unquote, urlsplit
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+from tinymce.models import HTMLField
+from apps.common.db_routers import database_aliases
+from apps.common.files import referenced_files
+from apps.common.images import SIBLING_FORMATS, sibling_names
+
+
+# Not walked: variants made from other files, and files still being written.
+SKIPPED_DIRS = {'derivatives', 'cas/.tmp'}
+
+
+@lru_cache(maxsize=None)
+def html_fields(model):
+    """attnames of the model's HTMLFields (translated copies included)."""
+    return tuple(
+        field.attname for field in model._meta.local_concrete_fields if isinstance(field, HTMLField)
+    )
+
+
+@lru_cache(maxsize=None)
+def html_models():
+    return tuple(model for model in apps.get_models() if html_fields(model))
+
+
+@lru_cache(maxsize=None)
+def _media_url_pattern():
+    base_url = getattr(default_storage, 'base_url', None) or settings.MEDIA_URL
+    path = urlsplit(base_url).path
+    return re.compile(re.escape(path) + r'''([^"'\s<>?#)]+)''')
+
+
+def media_names(text):
+    """Storage names of the media files linked from the HTML `text`."""
+    if not text:
+        return set()
+    return {unquote(match) for match in _media_url_pattern().findall(html.unescape(text))}
+
+
+def index_references(sender, instance, raw=False, update_fields=None, **kwargs):
+    """post_save receiver: record the media files linked from the row's HTML."""
+    fields = html_fields(sender)
+    if raw or not fields or (update_fields is not None and not set(fields) & set(update_fields)):
+        return
+    from apps.common.models import MediaReference
+    from apps.main.services.tenancy import school_id_of
+
+    names = set().union(*(media_names(getattr(instance, attname)) for attname in fields))
+    content_type = ContentType.objects.get_for_model(sender)
+    references = MediaReference.objects.filter(content_type=content_type, object_id=instance.pk)
+    if set(references.values_list('name', flat=True)) == names:
+        return
+    references.delete()
+    school_id = school_id_of(instance)
+    MediaReference.objects.bulk_create(
+        MediaReference(name=name, content_type=content_type, object_id=instance.pk, school_id=school_id)
+        for name in names
+    )
+
+
+def drop_references(sender, instance, **kwargs):
+    """post_delete receiver: the row's HTML does not link anything anymore."""
+    if html_fields(sender):
+        from apps.common.models import MediaReference
+
+        content_type = ContentType.objects.get_for_model(sender)
+        MediaReference.objects.filter(content_type=content_type, object_id=instance.pk).delete()
+
+
+def reindex(batch_size=500, stdout=None):
+    """Rebuild MediaReference from the HTML of every row. Returns the number of references."""
+    from apps.common.models import MediaReference
+    from apps.main.services.tenancy import school_id_of
+
+    MediaReference.objects.all().delete()
+    total = 0
+    for model in html_models():
+        content_type = ContentType.objects.get_for_model(model)
+        fields = html_fields(model)
+        for alias in database_aliases():
+            rows = model._base_manager.using(alias).order_by('pk')
+            batch = []
+            for instance in rows.iterator(chunk_size=batch_size):
+                names = set().union(*(media_names(getattr(instance, attname)) for attname in fields))
+                school_id = school_id_of(instance)
+                batch.extend(
+                    MediaReference(name=name, content_type=content_type, object_id=instance.pk, school_id=school_id)
+                    for name in names
+                )
+                if len(batch) >= batch_size:
+                    MediaReference.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            MediaReference.objects.bulk_create(batch)
+            total += len(batch)
+        if stdout:
+            stdout.write(f'  {model._meta.label}: indexed')
+    return total
+
+
+def walk(position='', directory=''):
+    """Stored file names in name order, starting after `position`."""
+    after = tuple(position.split('/')) if position else ()
+    dirs, files = default_storage.listdir(directory)
+    entries = sorted([(name, True) for name in dirs] + [(name, False) for name in files])
+    for entry, is_dir in entries:
+        name = f'{directory}/{entry}' if directory else entry
+        parts = tuple(name.split('/'))
+        if is_dir:
+            if name in SKIPPED_DIRS or parts < after[:len(parts)]:
+                continue
+            yield from walk(position, name)
+        elif parts > after:
+            yield name
+
+
+def is_sibling(name):
+    base, ext = os.path.splitext(name)
+    return ext[1:] in SIBLING_FORMATS and default_storage.exists(base)
+
+
+def linked_from_html(names):
+    """The subset of `names` that appear in some HTMLField (index and full-text search)."""
+    from apps.common.models import MediaReference
+
+    found = set(MediaReference.objects.filter(name__in=names).values_list('name', flat=True))
+    remaining = set(names) - found
+    for model in html_models():
+        if not remaining:
+            break
+        condition = reduce(or_, (
+            Q(**{f'{attname}__contains': name}) for attname in html_fields(model) for name in remaining
+        ))
+        for alias in database_aliases():
+            texts = model._base_manager.using(alias).filter(condition).values_list(*html_fields(model))
+            for row in texts:
+                found.update(name for name in remaining if any(text and name in text for text in row))
+            remaining -= found
+    return found
+
+
+def _orphans(names):
+    """Names from `names` nothing points to: no FileField except TinyMCEImage's, no HTML."""
+    from apps.common.models import TinyMCEImage
+
+    tinymce_field = TinyMCEImage._meta.get_field('image')
+    remaining = set(names) - referenced_files(names, exclude=(tinymce_field,))
+    return remaining - linked_from_html(remaining) if remaining else remaining
+
+
+def _remove(names, dry_run):
+    """Delete the files and their TinyMCEImage rows. Returns {name: school id or None}."""
+    from apps.common.models import ImageMetadata, TinyMCEImage
+
+    owners = dict.fromkeys(names)
+    for alias in database_aliases():
+        rows = TinyMCEImage.objects.using(alias).filter(image__in=names)
+        owners.update(rows.values_list('image', 'school_id'))
+        if not dry_run:
+            rows.delete()
+    if not dry_run:
+        for name in names:
+            default_storage.delete(name)
+            for sibling in sibling_names(name).values():
+                if default_storage.exists(sibling):
+                    default_storage.delete(sibling)
+        ImageMetadata.objects.filter(name__in=names).delete()
+    return owners
+
+
+def collect(max_files=None, batch_size=None, grace=None, dry_run=False):
+    """
+    Check the next `max_files` stored files and delete the orphans older than
+    `grace` (a timedelta) in batches of `batch_size`. Returns the MediaSweep.
+    """
+    from apps.common.models import MediaSweep
+
+    max_files = max_files or settings.MEDIA_GC_MAX_FILES
+    batch_size = batch_size or settings.MEDIA_GC_BATCH_SIZE
+    grace = timedelta(days=settings.MEDIA_GC_GRACE_DAYS) if grace is None else grace
+    cutoff = timezone.now() - grace
+
+    last = MediaSweep.objects.filter(dry_run=False).order_by('-started_at').first()
+    sweep = MediaSweep.objects.create(position=last.position if last else '', dry_run=dry_run)
+    by_school = {}
+
+    def flush(batch):
+        sizes = {}
+        for name in batch:
+            try:
+                if default_storage.get_modified_time(name) < cutoff:
+                    sizes[name] = default_storage.size(name)
+            except OSError:
+                continue
+        orphans = _orphans(sizes) if sizes else set()
+        for name, school_id in _remove(orphans, dry_run).items():
+            key = str(school_id) if school_id else '-'
+            by_school[key] = by_school.get(key, 0) + sizes[name]
+            sweep.deleted += 1
+            sweep.reclaimed_bytes += sizes[name]
+
+    batch, finished = [], True
+    for name in walk(sweep.position):
+        if sweep.scanned >= max_files:
+            finished = False
+            break
+        sweep.scanned += 1
+        sweep.position = name
+        if not is_sibling(name):
+            batch.append(name)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    flush(batch)
+
+    if finished:
+        # The whole storage was walked: the next run starts from the beginning.
+        sweep.position = ''
+    sweep.by_school = by_school
+    sweep.finished_at = timezone.now()
+    sweep.save()
+    return sweep
@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.db.models.query import QuerySet
-from django.db import models
+from django.db import models, transaction
+
+from apps.common.db_routers import use_replica, reset_replica
 
 
 class ActiveRecordMiddleware:
@@ -32,4 +35,56 @@ class ActiveRecordMiddleware:
         
     def __call__(self, request):
         response = self.get_response(request)
-        return response 
\ No newline at end of file
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Replaces `ATOMIC_REQUESTS` with a per-method policy:
+
+    * GET/HEAD/OPTIONS run without a transaction and read from the replica
+      (if one is configured), unless the client is pinned to the primary.
+    * Other methods run on the primary inside `transaction.atomic()`.
+      A successful write pins the client to the primary for
+      `REPLICA_PIN_SECONDS` so it reads its own writes.
+
+    Admin paths always use the primary. Resumable uploads (apps.common.uploads)
+    read the offset from the primary and run without a request transaction:
+    a chunk written to the temp file must not be undone in the database
+    because the response is an error. Should be placed before
+    `SubdomainMiddleware` so the school lookup is routed as well.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+    PRIMARY_PATHS = ('/admin/', '/api/uploads/')
+    NON_ATOMIC_PATHS = ('/api/uploads/',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_cookie = getattr(settings, 'REPLICA_PIN_COOKIE', 'primary_pin')
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+    def __call__(self, request):
+        if request.method in self.SAFE_METHODS:
+            token = use_replica(self._can_use_replica(request))
+            try:
+                return self.get_response(request)
+            finally:
+                reset_replica(token)
+
+        if request.path.startswith(self.NON_ATOMIC_PATHS):
+            response = self.get_response(request)
+        else:
+            with transaction.atomic():
+                response = self.get_response(request)
+                if response.status_code >= 400:
+                    transaction.set_rollback(True)
+
+        if response.status_code < 400 and self.pin_seconds:
+            response.set_cookie(self.pin_cookie, '1', max_age=self.pin_seconds, httponly=True)
+        return response
+
+    def _can_use_replica(self, request):
+        if request.COOKIES.get(self.pin_cookie):
+            return False
+        return not request.path.startswith(self.PRIMARY_PATHS)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Fayl')),
+                ('width', models.PositiveIntegerField(blank=True, null=True, verbose_name='Eni')),
+                ('height', models.PositiveIntegerField(blank=True, null=True, verbose_name="Bo'yi")),
+                ('format', models.CharField(blank=True, max_length=10, verbose_name='Format')),
+                ('original_size', models.PositiveBigIntegerField(default=0, verbose_name='Asl hajmi')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Hajmi')),
+                ('processed_at', models.DateTimeField(auto_now=True, verbose_name='Qayta ishlangan sana')),
+            ],
+            options={
+                'verbose_name': "Rasm ma'lumoti",
+                'verbose_name_plural': "Rasm ma'lumotlari",
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_imagemetadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemetadata',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='Kontent xeshi'),
+        ),
+    ]
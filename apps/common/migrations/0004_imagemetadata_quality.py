@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_imagemetadata_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemetadata',
+            name='quality',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Sifat'),
+        ),
+        migrations.AddField(
+            model_name='imagemetadata',
+            name='ssim',
+            field=models.FloatField(blank=True, null=True, verbose_name='SSIM'),
+        ),
+        migrations.AddField(
+            model_name='imagemetadata',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Variantlar'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0004_imagemetadata_quality'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Fayl')),
+                ('content_hash', models.CharField(db_index=True, max_length=64, verbose_name='Kontent xeshi')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Hajmi')),
+                ('refcount', models.PositiveIntegerField(default=1, verbose_name='Yuklashlar soni')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan sana')),
+            ],
+            options={
+                'verbose_name': 'Blob',
+                'verbose_name_plural': 'Bloblar',
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_blobindex'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('main', '0045_schooldeletionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaSweep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Boshlangan')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan')),
+                ('position', models.CharField(blank=True, max_length=255, verbose_name="To'xtagan joyi")),
+                ('scanned', models.PositiveIntegerField(default=0, verbose_name="Ko'rilgan fayllar")),
+                ('deleted', models.PositiveIntegerField(default=0, verbose_name="O'chirilgan fayllar")),
+                ('reclaimed_bytes', models.PositiveBigIntegerField(default=0, verbose_name="Bo'shatilgan hajm")),
+                ('by_school', models.JSONField(blank=True, default=dict, verbose_name="Maktablar bo'yicha")),
+                ('dry_run', models.BooleanField(default=False, verbose_name='Sinov')),
+            ],
+            options={
+                'verbose_name': 'Media tozalash',
+                'verbose_name_plural': 'Media tozalashlar',
+                'ordering': ('-started_at',),
+            },
+        ),
+        migrations.AddField(
+            model_name='tinymceimage',
+            name='school',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tinymce_images', to='main.school', verbose_name='Maktab'),
+        ),
+        migrations.CreateModel(
+            name='MediaReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=255, verbose_name='Fayl')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Obyekt ID')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='Model')),
+                ('school', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.school', verbose_name='Maktab')),
+            ],
+            options={
+                'verbose_name': 'Media havola',
+                'verbose_name_plural': 'Media havolalar',
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='common_medi_content_2383be_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0006_media_references'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemetadata',
+            name='blurhash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='BlurHash'),
+        ),
+        migrations.AddField(
+            model_name='imagemetadata',
+            name='dominant_color',
+            field=models.CharField(blank=True, max_length=7, verbose_name='Asosiy rang'),
+        ),
+    ]
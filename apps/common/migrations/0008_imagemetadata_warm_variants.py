@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0007_image_placeholders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemetadata',
+            name='warm_variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Tayyor variantlar'),
+        ),
+    ]
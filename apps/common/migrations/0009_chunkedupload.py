@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:05
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0008_imagemetadata_warm_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(max_length=100, verbose_name='Model')),
+                ('filename', models.CharField(max_length=255, verbose_name='Fayl nomi')),
+                ('length', models.PositiveBigIntegerField(verbose_name='Hajmi')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Qabul qilingan')),
+                ('checksum', models.CharField(blank=True, max_length=64, verbose_name='SHA-256')),
+                ('file', models.CharField(blank=True, max_length=255, verbose_name='Saqlangan fayl')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Boshlangan')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name="O'zgartirilgan sana")),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': "Bo'laklab yuklash",
+                'verbose_name_plural': "Bo'laklab yuklashlar",
+            },
+        ),
+    ]
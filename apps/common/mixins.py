@@ -2,6 +2,7 @@ from django.utils.text import slugify
 from rest_framework import exceptions
 from modeltranslation.admin import TabbedTranslationAdmin
 from django.db.models import QuerySet
+from apps.common.counting import EstimatedCountPaginator
 
 
 class ActiveQuerySet(QuerySet):
@@ -177,6 +178,67 @@ class SchoolAdminMixin:
         super().save_model(request, obj, form, change)
         
         
+class EstimatedCountAdminMixin:
+    """
+    Changelists of large tables: page count comes from `cached_count()`
+    and the unfiltered "N total" count is not computed at all.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class ChunkedUploadAdminMixin:
+    """
+    File fields of `chunked_upload_fields` are sent in resumable chunks
+    (apps.common.uploads) before the form is submitted; the form then
+    posts `<field>_upload`, the id of the complete upload, instead of the file.
+    """
+    chunked_upload_fields = ('file',)
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        from apps.common.uploads import ChunkedFileInput
+
+        if db_field.name in self.chunked_upload_fields:
+            kwargs['widget'] = ChunkedFileInput(target=self.model._meta.label_lower)
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
+
+    def get_form(self, request, obj=None, **kwargs):
+        from apps.common.uploads import completed_upload
+
+        form_class = super().get_form(request, obj, **kwargs)
+        upload_fields = [name for name in self.chunked_upload_fields if name in form_class.base_fields]
+
+        class ChunkedUploadForm(form_class):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.chunked_uploads = []
+                for name in upload_fields:
+                    if self.data.get(f'{name}_upload'):
+                        self.fields[name].required = False
+
+            def clean(self):
+                cleaned_data = super().clean()
+                for name in upload_fields:
+                    upload_id = self.data.get(f'{name}_upload')
+                    if not upload_id:
+                        continue
+                    upload = completed_upload(upload_id, request.user, self._meta.model)
+                    if upload is None:
+                        self.add_error(name, "Fayl yuklanishi tugallanmagan. Faylni qaytadan tanlang.")
+                        continue
+                    cleaned_data[name] = upload.file
+                    self.chunked_uploads.append(upload)
+                return cleaned_data
+
+        return ChunkedUploadForm
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # The file belongs to the row now; the upload can't be attached again.
+        for upload in getattr(form, 'chunked_uploads', ()):
+            upload.delete()
+
+
 class AdminTranslation(TabbedTranslationAdmin):
     class Media:
         css = {
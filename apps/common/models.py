@@ -1,6 +1,6 @@
-from apps.common.utils import compress
 import os
 import uuid
+from django.conf import settings
 from django.db import models
 from django.db.models import QuerySet
 
@@ -46,6 +46,10 @@ def get_image_path(instance, filename):
 
 
 class TinyMCEImage(models.Model):
+    school = models.ForeignKey(
+        'main.School', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='tinymce_images', verbose_name="Maktab",
+    )
     title = models.CharField(max_length=255, blank=True)
     image = models.ImageField(upload_to=get_image_path)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -56,8 +60,132 @@ class TinyMCEImage(models.Model):
     def save(self, *args, **kwargs):
         if not self.title and self.image:
             self.title = os.path.basename(self.image.name)
-            
-        if self.image:
-            self.image = compress(self.image)
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        # Compressed in the background, see apps.common.images
+        super().save(*args, **kwargs)
+
+
+################################################
+#--------------- IMAGE METADATA ---------------#
+################################################
+
+class ImageMetadata(models.Model):
+    """What the image pipeline (apps.common.images) found and did for one stored image."""
+    name = models.CharField(max_length=255, unique=True, verbose_name="Fayl")
+    width = models.PositiveIntegerField(null=True, blank=True, verbose_name="Eni")
+    height = models.PositiveIntegerField(null=True, blank=True, verbose_name="Bo'yi")
+    format = models.CharField(max_length=10, blank=True, verbose_name="Format")
+    original_size = models.PositiveBigIntegerField(default=0, verbose_name="Asl hajmi")
+    size = models.PositiveBigIntegerField(default=0, verbose_name="Hajmi")
+    content_hash = models.CharField(max_length=64, blank=True, verbose_name="Kontent xeshi")
+    quality = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Sifat")
+    ssim = models.FloatField(null=True, blank=True, verbose_name="SSIM")
+    variants = models.JSONField(default=dict, blank=True, verbose_name="Variantlar")
+    dominant_color = models.CharField(max_length=7, blank=True, verbose_name="Asosiy rang")
+    blurhash = models.CharField(max_length=64, blank=True, verbose_name="BlurHash")
+    warm_variants = models.JSONField(default=dict, blank=True, verbose_name="Tayyor variantlar")
+    processed_at = models.DateTimeField(auto_now=True, verbose_name="Qayta ishlangan sana")
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def saved_bytes(self):
+        return self.original_size - self.size
+
+    class Meta:
+        verbose_name = "Rasm ma'lumoti"
+        verbose_name_plural = "Rasm ma'lumotlari"
+
+
+
+################################################
+#------------------ BLOB INDEX ----------------#
+################################################
+
+class BlobIndex(models.Model):
+    """A file stored by ContentAddressedStorage and how many uploads it stands for."""
+    name = models.CharField(max_length=255, unique=True, verbose_name="Fayl")
+    content_hash = models.CharField(max_length=64, db_index=True, verbose_name="Kontent xeshi")
+    size = models.PositiveBigIntegerField(default=0, verbose_name="Hajmi")
+    refcount = models.PositiveIntegerField(default=1, verbose_name="Yuklashlar soni")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Blob"
+        verbose_name_plural = "Bloblar"
+
+
+################################################
+#--------------- MEDIA REFERENCES -------------#
+################################################
+
+class MediaReference(models.Model):
+    """A stored file linked from the HTML content of a row (see apps.common.media_gc)."""
+    name = models.CharField(max_length=255, db_index=True, verbose_name="Fayl")
+    content_type = models.ForeignKey('contenttypes.ContentType', on_delete=models.CASCADE, verbose_name="Model")
+    object_id = models.PositiveBigIntegerField(verbose_name="Obyekt ID")
+    school = models.ForeignKey(
+        'main.School', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='+', verbose_name="Maktab",
+    )
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Media havola"
+        verbose_name_plural = "Media havolalar"
+        indexes = [models.Index(fields=['content_type', 'object_id'])]
+
+
+class MediaSweep(models.Model):
+    """One run of the orphan media collector; the last run's `position` is where the next one starts."""
+    started_at = models.DateTimeField(auto_now_add=True, verbose_name="Boshlangan")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan")
+    position = models.CharField(max_length=255, blank=True, verbose_name="To'xtagan joyi")
+    scanned = models.PositiveIntegerField(default=0, verbose_name="Ko'rilgan fayllar")
+    deleted = models.PositiveIntegerField(default=0, verbose_name="O'chirilgan fayllar")
+    reclaimed_bytes = models.PositiveBigIntegerField(default=0, verbose_name="Bo'shatilgan hajm")
+    by_school = models.JSONField(default=dict, blank=True, verbose_name="Maktablar bo'yicha")
+    dry_run = models.BooleanField(default=False, verbose_name="Sinov")
+
+    def __str__(self):
+        return f"{self.started_at:%Y-%m-%d %H:%M} ({self.deleted})"
+
+    class Meta:
+        ordering = ('-started_at',)
+        verbose_name = "Media tozalash"
+        verbose_name_plural = "Media tozalashlar"
+
+
+################################################
+#--------------- CHUNKED UPLOADS --------------#
+################################################
+
+class ChunkedUpload(models.Model):
+    """A resumable admin upload (see apps.common.uploads); `file` is the stored name once complete."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='+', verbose_name="Foydalanuvchi",
+    )
+    target = models.CharField(max_length=100, verbose_name="Model")
+    filename = models.CharField(max_length=255, verbose_name="Fayl nomi")
+    length = models.PositiveBigIntegerField(verbose_name="Hajmi")
+    offset = models.PositiveBigIntegerField(default=0, verbose_name="Qabul qilingan")
+    checksum = models.CharField(max_length=64, blank=True, verbose_name="SHA-256")
+    file = models.CharField(max_length=255, blank=True, verbose_name="Saqlangan fayl")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Boshlangan")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="O'zgartirilgan sana")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan")
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.length})"
+
+    class Meta:
+        verbose_name = "Bo'laklab yuklash"
+        verbose_name_plural = "Bo'laklab yuklashlar"
@@ -0,0 +1,218 @@
+"""
+Monthly range partitioning by `created_at` for append-only tables.
+
+PostgreSQL only: on any other backend (SQLite in local development) every
+function here is a no-op and the tables stay ordinary tables.
+
+Partitions are named `<table>_pYYYYMM` and hold one calendar month (UTC).
+A `<table>_default` partition catches rows outside the created range, so an
+insert never fails because maintenance did not run in time. When the month
+of such rows gets its partition later, the default partition is detached,
+its rows of that month are moved over and it is attached again: PostgreSQL
+refuses to create a partition for values the default one already holds.
+
+The tables are tenant tables, so every database (default and the school
+shards) has its own copy; each is partitioned and maintained separately.
+"""
+import datetime
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from apps.common.db_routers import database_aliases
+
+
+ARCHIVE_SCHEMA = 'archive'
+
+
+def is_supported(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'postgresql'
+
+
+def partitioned_models():
+    return [apps.get_model(label) for label in settings.PARTITIONED_MODELS]
+
+
+def month_start(value):
+    return datetime.datetime(value.year, value.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(table, start):
+    return f'{table}_p{start:%Y%m}'
+
+
+def is_partitioned(table, using=DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [table])
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table, using=DEFAULT_DB_ALIAS):
+    """[(partition name, lower bound)] of `table`; the default partition has no bound."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+            [table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        start = None
+        if bound.startswith('FOR VALUES FROM'):
+            start = datetime.datetime.fromisoformat(bound.split("'")[1]).astimezone(datetime.timezone.utc)
+        partitions.append((name, start))
+    return partitions
+
+
+def create_partition(table, start, using=DEFAULT_DB_ALIAS):
+    """
+    Create the month partition starting at `start` unless it already
+    exists, taking over the rows of that month from the default partition.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    name = partition_name(table, start)
+    end = add_months(start, 1)
+    default = f'{table}_default'
+    bounds = [start, end]
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [default])
+        has_default = cursor.fetchone()[0]
+        stray = False
+        if has_default:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {qn(default)} WHERE created_at >= %s AND created_at < %s)', bounds,
+            )
+            stray = cursor.fetchone()[0]
+        if stray:
+            cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(default)}')
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(table)} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        if stray:
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {qn(default)} WHERE created_at >= %s AND created_at < %s RETURNING *) '
+                f'INSERT INTO {qn(table)} SELECT * FROM moved',
+                bounds,
+            )
+            cursor.execute(f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(default)} DEFAULT')
+    return name
+
+
+def convert_table(model, using=DEFAULT_DB_ALIAS):
+    """
+    Turn the regular table of `model` into a table partitioned by month of
+    `created_at`, copying the existing rows.
+
+    The primary key becomes (id, created_at), as PostgreSQL requires the
+    partition key in every unique index; `id` keeps its sequence so the
+    ORM sees no difference. Indexes and foreign keys declared on the model
+    are recreated on the new table.
+    """
+    table = model._meta.db_table
+    legacy = f'{table}_legacy'
+    sequence = f'{table}_id_seq'
+    connection = connections[using]
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(using=using), connection.schema_editor(atomic=False) as editor:
+        editor.execute(f'LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE')
+        editor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+        editor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        editor.execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT min(created_at) FROM {qn(legacy)}')
+            oldest = cursor.fetchone()[0] or now
+        start, end = month_start(oldest), add_months(month_start(now), settings.PARTITION_MONTHS_AHEAD + 1)
+        while start < end:
+            create_partition(table, start, using)
+            start = add_months(start, 1)
+
+        editor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}')
+        # Dropping the old table frees its sequence, pkey and index names.
+        editor.execute(f'DROP TABLE {qn(legacy)}')
+
+        editor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id')
+        editor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        editor.execute(f"SELECT setval('{sequence}', COALESCE((SELECT max(id) FROM {qn(table)}), 0) + 1, false)")
+        editor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, created_at)')
+        for sql in editor._model_indexes_sql(model):
+            editor.execute(sql)
+        for field in model._meta.local_fields:
+            if field.remote_field and field.db_constraint:
+                editor.execute(editor._create_fk_sql(model, field, '_fk_%(to_table)s_%(to_column)s'))
+
+
+def ensure_partitions(model, months_ahead=None, using=DEFAULT_DB_ALIAS):
+    """Create missing partitions from the current month `months_ahead` months forward."""
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+    table = model._meta.db_table
+    start = month_start(datetime.datetime.now(datetime.timezone.utc))
+    existing = {name for name, _ in list_partitions(table, using)}
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(start, offset)
+        if partition_name(table, month) not in existing:
+            created.append(create_partition(table, month, using))
+    return created
+
+
+def archive_partitions(model, retention_months, using=DEFAULT_DB_ALIAS):
+    """
+    Detach partitions older than `retention_months` and move them to the
+    `archive` schema, where they can be dumped or dropped as a whole.
+    """
+    table = model._meta.db_table
+    cutoff = add_months(month_start(datetime.datetime.now(datetime.timezone.utc)), -retention_months)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+
+    archived = []
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {qn(ARCHIVE_SCHEMA)}')
+        for name, start in list_partitions(table, using):
+            if start is None or add_months(start, 1) > cutoff:
+                continue
+            cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+            cursor.execute(f'ALTER TABLE {qn(name)} SET SCHEMA {qn(ARCHIVE_SCHEMA)}')
+            archived.append(name)
+    return archived
+
+
+def maintain(months_ahead=None, retention_months=None):
+    """
+    Create upcoming partitions (and archive old ones when a retention is
+    configured) for every already partitioned table in PARTITIONED_MODELS,
+    in every database. Returns {alias: {table: {'created': [...], 'archived': [...]}}}.
+    """
+    if retention_months is None:
+        retention_months = settings.PARTITION_RETENTION_MONTHS
+
+    report = {}
+    for alias in database_aliases():
+        if not is_supported(alias):
+            continue
+        for model in partitioned_models():
+            table = model._meta.db_table
+            if not is_partitioned(table, alias):
+                continue
+            report.setdefault(alias, {})[table] = {
+                'created': ensure_partitions(model, months_ahead, alias),
+                'archived': archive_partitions(model, retention_months, alias) if retention_months else [],
+            }
+    return report
@@ -0,0 +1,108 @@
+"""
+What the frontend needs to lay out an image before it is downloaded: the
+dominant color and a BlurHash (https://blurha.sh, ~30 characters that
+decode to a blurred preview). Both come from a 32px copy, so the pure
+Python encoder below is fast enough for the image pipeline.
+"""
+import math
+from PIL import Image
+
+
+SAMPLE_SIZE = 32
+# BlurHash components (horizontal, vertical); 4x3 suits landscape photos.
+COMPONENTS = (4, 3)
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def _sample(img):
+    """Small RGB copy of `img`."""
+    if img.mode not in ('RGB', 'RGBA', 'L'):
+        img = img.convert('RGBA')
+    if img.mode == 'RGBA':
+        # Transparent parts are shown on white.
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    small = img.convert('RGB')
+    small.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE), Image.BILINEAR, reducing_gap=2.0)
+    return small
+
+
+def _encode83(value, length):
+    return ''.join(BASE83[value // 83 ** (length - i) % 83] for i in range(1, length + 1))
+
+
+def _to_linear(value):
+    value /= 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _to_srgb(value):
+    value = min(max(value, 0), 1)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exp):
+    return math.copysign(abs(value) ** exp, value)
+
+
+def blurhash(img, components=COMPONENTS):
+    """BlurHash of the image (from a small copy)."""
+    small = _sample(img)
+    width, height = small.size
+    columns, rows = components
+    table = [_to_linear(value) for value in range(256)]
+    pixels = [tuple(table[c] for c in pixel) for pixel in small.getdata()]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(columns)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(rows)]
+
+    factors = []
+    for j in range(rows):
+        for i in range(columns):
+            r = g = b = 0.0
+            for y in range(height):
+                row_basis = cos_y[j][y]
+                offset = y * width
+                for x in range(width):
+                    basis = cos_x[i][x] * row_basis
+                    pr, pg, pb = pixels[offset + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = (1 if i == j == 0 else 2) / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((columns - 1) + (rows - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = int(max(0, min(82, math.floor(actual_max * 166 - 0.5))))
+        maximum = (quantised_max + 1) / 166
+        result += _encode83(quantised_max, 1)
+    else:
+        maximum = 1
+        result += _encode83(0, 1)
+
+    result += _encode83((_to_srgb(dc[0]) << 16) + (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4)
+    for factor in ac:
+        r, g, b = (
+            int(max(0, min(18, math.floor(_sign_pow(value / maximum, 0.5) * 9 + 9.5)))) for value in factor
+        )
+        result += _encode83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def dominant_color(img):
+    """'#rrggbb' of the most common of a few representative colors."""
+    small = _sample(img).quantize(colors=5)
+    palette = small.getpalette()
+    count, index = max(small.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def describe(img):
+    """The placeholder fields of ImageMetadata for `img` (upright, as shown)."""
+    return {'dominant_color': dominant_color(img), 'blurhash': blurhash(img)}
@@ -3,11 +3,14 @@ from io import BytesIO
 from django.core.files import File
 from PIL import Image
 from django.utils import timezone, dateformat
+from django.db.models.manager import BaseManager
+from rest_framework import serializers
 from rest_framework.exceptions import ErrorDetail
 from rest_framework.serializers import as_serializer_error
 from rest_framework.views import exception_handler
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, LimitOffsetPagination
 from django.utils.translation import gettext_lazy as _
+from apps.common.counting import cached_count
 
 
 
@@ -48,3 +51,157 @@ class Pagination(PageNumberPagination):
     page_size = 9
     page_size_query_param = 'page_size'
     max_page_size = 999
+
+
+class EstimatedCountPagination(LimitOffsetPagination):
+    """
+    LimitOffsetPagination whose `count` comes from `cached_count()`:
+    cached per tenant, estimated by the planner on very large results.
+    """
+
+    def get_count(self, queryset):
+        if not hasattr(queryset, 'query'):
+            return super().get_count(queryset)
+        school = getattr(self.request, 'school', None)
+        return cached_count(queryset, tenant=getattr(school, 'pk', None))
+
+
+IMAGE_METADATA_CONTEXT_KEY = '_image_metadata'
+
+
+def load_image_metadata(names):
+    """{name: ImageMetadataField value or None} for stored image `names`."""
+    from apps.common.models import ImageMetadata
+
+    found = dict.fromkeys(names)
+    rows = ImageMetadata.objects.filter(name__in=found).values_list(
+        'name', 'width', 'height', 'dominant_color', 'blurhash',
+    )
+    for name, width, height, color, blurhash in rows:
+        if width and height:
+            found[name] = {'width': width, 'height': height, 'color': color or None, 'blurhash': blurhash or None}
+    return found
+
+
+class ImageMetadataField(serializers.Field):
+    """
+    Width, height, dominant color and BlurHash of an image field, so the
+    frontend can reserve space and show a placeholder. None until the
+    image pipeline has processed the file (apps.common.images).
+
+    Use with `list_serializer_class = ImageMetadataListSerializer` so a
+    list needs one query instead of one per row.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        name = getattr(value, 'name', None)
+        if not name:
+            return None
+        memo = self.context.setdefault(IMAGE_METADATA_CONTEXT_KEY, {})
+        if name not in memo:
+            memo.update(load_image_metadata([name]))
+        return memo[name]
+
+
+class ImageMetadataListSerializer(serializers.ListSerializer):
+    """Loads the ImageMetadata of every row of the list in one query."""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        fields = [field for field in self.child.fields.values() if isinstance(field, ImageMetadataField)]
+        memo = self.context.setdefault(IMAGE_METADATA_CONTEXT_KEY, {})
+        names = {
+            getattr(field.get_attribute(item), 'name', None)
+            for field in fields for item in items
+        } - set(memo) - {None, ''}
+        if names:
+            memo.update(load_image_metadata(names))
+        return super().to_representation(items)
+
+
+class ImgproxyImageField(serializers.Field):
+    """
+    {preset: URL} of an image field for the given PRESET_SIZES presets
+    (default: the model's IMAGE_PRESETS, which are also pre-warmed on
+    upload), made by imgproxy (signed when IMGPROXY_KEY/SALT are set) or
+    locally without it, see `apps.common.imgproxy.get_preset_url`.
+    """
+
+    def __init__(self, presets=None, quality=85, **kwargs):
+        from apps.common.imgproxy import PRESET_SIZES
+
+        unknown = set(presets or ()) - set(PRESET_SIZES)
+        if unknown:
+            raise ValueError(f"Unknown presets: {sorted(unknown)}")
+        self.presets = tuple(presets) if presets else None
+        self.quality = quality
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def bind(self, field_name, parent):
+        from apps.common.imgproxy import IMAGE_PRESETS
+
+        super().bind(field_name, parent)
+        if self.presets is None:
+            self.presets = IMAGE_PRESETS[parent.Meta.model._meta.label_lower]
+
+    def to_representation(self, value):
+        from apps.common.imgproxy import get_preset_url
+
+        if not getattr(value, 'name', None):
+            return None
+        request = self.context.get('request')
+        absolute = request.build_absolute_uri if request is not None else (lambda url: url)
+        # imgproxy fetches the source itself, so it needs the absolute URL.
+        url = absolute(value.url)
+        return {preset: absolute(get_preset_url(url, preset, self.quality)) for preset in self.presets}
+
+
+class RenderedHTMLField(serializers.Field):
+    """
+    A rich text field as rendered at save time (`<field>_rendered`, see
+    apps.common.richtext) in the current language; the raw HTML while a
+    row has not been rendered yet.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', '*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return getattr(instance, f'{self.field_name}_rendered', None) or getattr(instance, self.field_name)
+
+
+class DownloadURLField(serializers.Field):
+    """Absolute URL of the counted download endpoint of a file, see apps.common.downloads."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', '*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        from apps.common.downloads import download_url
+
+        if not instance.file:
+            return None
+        return download_url(instance, self.context.get('request'))
+
+
+class ArchiveURLField(serializers.Field):
+    """Absolute URL of the ZIP of a collection's files, see apps.common.archives."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', '*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        from apps.common.archives import archive_url
+
+        return archive_url(instance, self.context.get('request'))
@@ -0,0 +1,163 @@
+"""
+Rendering rich text (HTMLField) content for the API once, at save time.
+
+Images put into the editor are stored full size and embedded with a plain
+`src`. `render_html()` rewrites every `<img>` pointing to our media into
+lazy, responsive markup: `width`/`height` from ImageMetadata (so the page
+does not jump), an imgproxy `srcset` of CONTENT_IMAGE_WIDTHS no wider than
+the original, `sizes`, `loading="lazy"` and `decoding="async"`.
+
+A model opts in with a `<field>_rendered` TextField next to an HTMLField;
+the pre_save receiver fills it for every language, and serializers return
+it through RenderedHTMLField, so requests never parse HTML.
+"""
+import re
+from functools import lru_cache
+from html import escape
+from html.parser import HTMLParser
+from django.conf import settings
+from tinymce.models import HTMLField
+
+
+IMG_TAG = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+RENDERED_SUFFIX = '_rendered'
+
+
+class _TagParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.attrs = None
+
+    def handle_starttag(self, tag, attrs):
+        self.attrs = attrs
+
+    handle_startendtag = handle_starttag
+
+
+def parse_tag(tag):
+    """Attributes of a single start tag as an ordered dict."""
+    parser = _TagParser()
+    parser.feed(tag)
+    parser.close()
+    return dict(parser.attrs or [])
+
+
+def build_tag(attrs):
+    parts = ''.join(f' {name}' if value is None else f' {name}="{escape(value)}"' for name, value in attrs.items())
+    return f'<img{parts}>'
+
+
+def image_details(names):
+    """{name: (width, height)} of stored images, described now if the pipeline has not done it yet."""
+    from apps.common.images import describe_stored_image
+    from apps.common.models import ImageMetadata
+
+    found = {
+        name: (width, height)
+        for name, width, height in ImageMetadata.objects.filter(name__in=names, width__isnull=False)
+        .values_list('name', 'width', 'height')
+    }
+    for name in set(names) - set(found):
+        metadata = describe_stored_image(name)
+        if metadata:
+            found[name] = (metadata.width, metadata.height)
+    return found
+
+
+def _int(value):
+    try:
+        return int(str(value).strip().removesuffix('px'))
+    except (TypeError, ValueError):
+        return None
+
+
+def rewrite_image(attrs, size):
+    """The attributes of one `<img>` whose stored image is `size` (width, height) or None."""
+    from apps.common.imgproxy import get_responsive_url
+
+    attrs = dict(attrs)
+    src = attrs.get('src')
+    width, height = _int(attrs.get('width')), _int(attrs.get('height'))
+    if size:
+        # Keep the editor's display size; fill in what is missing from the file's ratio.
+        if not width and not height:
+            width, height = size
+        elif not height:
+            height = round(width * size[1] / size[0])
+        elif not width:
+            width = round(height * size[0] / size[1])
+        attrs['width'], attrs['height'] = str(width), str(height)
+
+        # imgproxy fetches the source itself, so it needs an absolute URL.
+        if settings.IMGPROXY_ENABLED and src.startswith(('http://', 'https://')):
+            widths = [w for w in settings.CONTENT_IMAGE_WIDTHS if w < size[0]] + [size[0]]
+            attrs['srcset'] = ', '.join(f'{get_responsive_url(src, w)} {w}w' for w in widths)
+            attrs['sizes'] = f'(max-width: {width}px) 100vw, {width}px'
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    return attrs
+
+
+def render_html(text):
+    """`text` with its media `<img>` tags made lazy and responsive."""
+    from apps.common.derivatives import storage_name
+
+    if not text or '<img' not in text.lower():
+        return text or ''
+
+    tags = {}
+    for tag in set(IMG_TAG.findall(text)):
+        attrs = parse_tag(tag)
+        if attrs.get('src'):
+            tags[tag] = (attrs, storage_name(attrs['src']))
+    sizes = image_details({name for attrs, name in tags.values() if name})
+
+    def replace(match):
+        if match.group(0) not in tags:
+            return match.group(0)
+        attrs, name = tags[match.group(0)]
+        return build_tag(rewrite_image(attrs, sizes.get(name)))
+
+    return IMG_TAG.sub(replace, text)
+
+
+@lru_cache(maxsize=None)
+def rendered_fields(model):
+    """[(html field, rendered field)] names of the model (inherited fields included)."""
+    names = {field.name for field in model._meta.concrete_fields}
+    return [
+        (field.name, f'{field.name}{RENDERED_SUFFIX}')
+        for field in model._meta.concrete_fields
+        if isinstance(field, HTMLField) and f'{field.name}{RENDERED_SUFFIX}' in names
+    ]
+
+
+def render_instance(instance):
+    """Fill the instance's rendered fields for every language."""
+    for source, target in rendered_fields(instance.__class__):
+        for language in settings.MODELTRANSLATION_LANGUAGES:
+            text = getattr(instance, f'{source}_{language}', None)
+            setattr(instance, f'{target}_{language}', render_html(text))
+
+
+def rendered_values(instance):
+    """{rendered field_<language>: value} of the instance."""
+    return {
+        f'{target}_{language}': getattr(instance, f'{target}_{language}')
+        for source, target in rendered_fields(instance.__class__)
+        for language in settings.MODELTRANSLATION_LANGUAGES
+    }
+
+
+def render_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """pre_save receiver for models with `<field>_rendered` fields."""
+    if raw or not rendered_fields(sender):
+        return
+    if update_fields is None:
+        render_instance(instance)
+        return
+    sources = {source for source, target in rendered_fields(sender)}
+    if any(name in sources or name.rsplit('_', 1)[0] in sources for name in update_fields):
+        # update_fields can't be extended from here: write the rendered HTML separately.
+        render_instance(instance)
+        sender._base_manager.filter(pk=instance.pk).update(**rendered_values(instance))
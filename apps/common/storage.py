@@ -0,0 +1,107 @@
+"""
+Content-addressed media storage (enable with CONTENT_ADDRESSED_MEDIA=True).
+
+Files are stored as cas/<aa>/<bb>/<sha256><ext>, whatever name the upload
+had, so an identical file uploaded again (the same logo by two schools, a
+TinyMCE re-upload) is stored once. Names never change for a given content,
+so the CDN can cache them forever, and no `exists()` probing is needed to
+find a free name.
+
+BlobIndex counts the uploads of every stored blob. It is kept in the
+default database only, whichever shard the uploading school lives in, and
+never read from the replica. A blob is removed from disk by `delete()`
+only when no row in any database references it anymore (cloned schools
+share files without uploading them, see apps.common.files).
+"""
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from django.core.files.storage import FileSystemStorage
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from apps.common.files import is_file_referenced
+
+
+CAS_DIR = 'cas'
+
+
+def blobs():
+    """BlobIndex rows, always in the default database."""
+    from apps.common.models import BlobIndex
+
+    return BlobIndex.objects.using(DEFAULT_DB_ALIAS)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    content_addressed = True
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save(); nothing to probe.
+        return name
+
+    def blob_name(self, digest, name):
+        ext = os.path.splitext(name)[1].lower()
+        return f'{CAS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+    def _spool(self, content):
+        """Copy `content` to a temp file under the storage root, hashing it on the way."""
+        spool_dir = self.path(f'{CAS_DIR}/.tmp')
+        os.makedirs(spool_dir, exist_ok=True)
+        digest, size = hashlib.sha256(), 0
+        fd, tmp = tempfile.mkstemp(dir=spool_dir)
+        with os.fdopen(fd, 'wb') as f:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for chunk in content.chunks():
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        return digest.hexdigest(), size, tmp
+
+    def _save(self, name, content):
+        digest, size, tmp = self._spool(content)
+        name = self.blob_name(digest, name)
+        path = self.path(name)
+        if os.path.exists(path):
+            os.unlink(tmp)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp, self.file_permissions_mode)
+            os.replace(tmp, path)
+
+        updated = blobs().filter(name=name).update(refcount=F('refcount') + 1)
+        if not updated:
+            try:
+                with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                    blobs().create(name=name, content_hash=digest, size=size)
+            except IntegrityError:
+                # Saved concurrently by another request.
+                blobs().filter(name=name).update(refcount=F('refcount') + 1)
+        return name
+
+    def delete(self, name):
+        if not name:
+            return
+        blobs().filter(name=name, refcount__gt=0).update(refcount=F('refcount') - 1)
+        if is_file_referenced(name):
+            return
+        self.delete_unreferenced(name)
+
+    def release(self, names):
+        """
+        Drop one use per occurrence in `names` of rows deleted without
+        signals (raw deletes), as `delete()` does; nothing is removed.
+        """
+        by_count = {}
+        for name, count in Counter(name for name in names if name).items():
+            by_count.setdefault(count, []).append(name)
+        for count, group in by_count.items():
+            blobs().filter(name__in=group).update(refcount=Greatest(F('refcount') - count, 0))
+
+    def delete_unreferenced(self, name):
+        """Remove a blob the caller has checked nothing uses (no per-file reference queries)."""
+        blobs().filter(name=name).delete()
+        super().delete(name)
@@ -0,0 +1,95 @@
+import logging
+from functools import partial, update_wrapper
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from kombu.exceptions import OperationalError
+from apps.common import partitioning
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task, *args):
+    """`task.delay(*args)`; a broker that is down is logged instead of failing the request."""
+    try:
+        return task.delay(*args)
+    except OperationalError:
+        logger.exception('Could not queue %s%r', task.name, args)
+        return None
+
+
+def enqueue_on_commit(task, *args, using=None):
+    """Queue `task` once the current transaction commits (see `enqueue`)."""
+    transaction.on_commit(update_wrapper(partial(enqueue, task, *args), enqueue), using=using, robust=True)
+
+
+@shared_task
+def maintain_partitions():
+    """
+    Create next months' partitions (and archive expired ones) for the
+    partitioned tables. Scheduled by CELERY_BEAT_SCHEDULE.
+    """
+    return partitioning.maintain()
+
+
+@shared_task(ignore_result=True)
+def process_image(name, presets=()):
+    """
+    Orient, strip, resize and re-encode a newly uploaded image (see
+    apps.common.images), then warm its `presets` variants.
+    """
+    from apps.common.images import process_stored_image
+
+    metadata = process_stored_image(name)
+    if presets and settings.IMGPROXY_WARM_ENABLED:
+        # Content-addressed storage stores the result under a new name.
+        warm_image.delay(metadata.name if metadata else name, list(presets))
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=4)
+def warm_image(self, name, presets):
+    """Request the image's preset variants so they are cached (see apps.common.warming)."""
+    from apps.common.warming import warm_image as warm
+
+    failed = warm(name, presets)
+    if failed and self.request.retries < self.max_retries:
+        raise self.retry(args=(name, failed), countdown=30 * 2 ** self.request.retries)
+
+
+@shared_task
+def collect_media():
+    """Delete the next share of orphaned media files (see apps.common.media_gc)."""
+    from apps.common.media_gc import collect
+
+    sweep = collect()
+    return {'scanned': sweep.scanned, 'deleted': sweep.deleted, 'reclaimed_bytes': sweep.reclaimed_bytes}
+
+
+@shared_task(ignore_result=True)
+def build_archive(kind, pk, school_id=None):
+    """Build a ZIP too large to stream within a request (see apps.common.archives)."""
+    from apps.common.archives import build_archive as build
+    from apps.common.db_routers import reset_current_school, set_current_school
+
+    token = set_current_school(school_id)
+    try:
+        build(kind, pk)
+    finally:
+        reset_current_school(token)
+
+
+@shared_task(ignore_result=True)
+def flush_download_counts():
+    """Write the download counts kept in the cache (see apps.common.downloads)."""
+    from apps.common.downloads import flush_downloads
+
+    flush_downloads()
+
+
+@shared_task
+def expire_uploads():
+    """Remove resumable uploads nobody finished or attached (see apps.common.uploads)."""
+    from apps.common.uploads import expire_uploads as expire
+
+    return expire()
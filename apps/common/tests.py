@@ -1,3 +1,239 @@
-from django.test import TestCase
+import base64
+import hashlib
+import io
+import os
+import tempfile
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.http import http_date
+from apps.common.db_routers import REPLICA_DB_ALIAS, PrimaryReplicaRouter, reset_replica, use_replica
+from apps.common.downloads import ranged_file_response
+from apps.common.models import BlobIndex, ChunkedUpload, TinyMCEImage
+from apps.common.storage import ContentAddressedStorage
+from apps.common.uploads import UploadError, append_chunk, part_path, start_upload
+from apps.user.models import User
 
-# Create your tests here.
+
+class MediaRootMixin:
+    """Stores files in a temporary MEDIA_ROOT for the duration of the test."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+@mock.patch('apps.common.db_routers.replica_configured', return_value=True)
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def allow_replica(self, enabled=True):
+        token = use_replica(enabled)
+        self.addCleanup(reset_replica, token)
+
+    def test_reads_use_the_primary_by_default(self, configured):
+        self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+
+    def test_reads_use_the_replica_when_allowed(self, configured):
+        self.allow_replica()
+        self.assertEqual(self.router.db_for_read(None), REPLICA_DB_ALIAS)
+
+    def test_reads_use_the_primary_without_a_replica(self, configured):
+        configured.return_value = False
+        self.allow_replica()
+        self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+
+    def test_a_write_pins_the_following_reads_to_the_primary(self, configured):
+        self.allow_replica()
+        self.assertEqual(self.router.db_for_write(None), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+
+    def test_the_replica_is_never_migrated(self, configured):
+        self.assertFalse(self.router.allow_migrate(REPLICA_DB_ALIAS, 'main'))
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'main'))
+
+
+class RangedFileResponseTests(MediaRootMixin, SimpleTestCase):
+    content = b'0123456789'
+
+    def setUp(self):
+        super().setUp()
+        self.name = default_storage.save('docs/file.txt', ContentFile(self.content))
+        self.modified = http_date(os.stat(default_storage.path(self.name)).st_mtime)
+
+    def get(self, **headers):
+        request = RequestFactory().get('/download/', headers=headers)
+        return ranged_file_response(request, self.name, 'file.txt')
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_whole_file_without_range(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Last-Modified'], self.modified)
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertEqual(self.body(response), self.content)
+
+    def test_byte_range(self):
+        response = self.get(Range='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+        self.assertEqual(self.body(response), b'2345')
+
+    def test_open_and_suffix_ranges(self):
+        self.assertEqual(self.body(self.get(Range='bytes=7-')), b'789')
+        response = self.get(Range='bytes=-3')
+        self.assertEqual(response['Content-Range'], 'bytes 7-9/10')
+        self.assertEqual(self.body(response), b'789')
+
+    def test_range_past_the_end_is_cut(self):
+        response = self.get(Range='bytes=8-100')
+        self.assertEqual(response['Content-Range'], 'bytes 8-9/10')
+        self.assertEqual(self.body(response), b'89')
+
+    def test_unsatisfiable_range(self):
+        response = self.get(Range='bytes=10-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_if_range_matching_the_file(self):
+        response = self.get(Range='bytes=2-5', If_Range=self.modified)
+        self.assertEqual(response.status_code, 206)
+
+    def test_stale_if_range_gets_the_whole_file(self):
+        response = self.get(Range='bytes=2-5', If_Range=http_date(0))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+
+    def test_missing_file(self):
+        self.name = 'docs/missing.txt'
+        with self.assertRaises(Http404):
+            self.get()
+
+
+class AppendChunkTests(MediaRootMixin, TestCase):
+    content = b'abcdefghij'
+
+    def setUp(self):
+        super().setUp()
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+        settings_override = override_settings(CHUNKED_UPLOAD_DIR=upload_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        user = User.objects.create_user(username='admin', password='x')
+        self.upload = start_upload(user, len(self.content), {'filename': 'plan.pdf', 'target': 'main.document'})
+
+    def append(self, offset, data, checksum=None):
+        return append_chunk(self.upload, offset, io.BytesIO(data), len(data), checksum)
+
+    def checksum(self, data):
+        return f'sha256 {base64.b64encode(hashlib.sha256(data).digest()).decode()}'
+
+    def test_chunks_complete_the_upload(self):
+        self.append(0, self.content[:4])
+        self.assertEqual(ChunkedUpload.objects.get(pk=self.upload.pk).offset, 4)
+        self.append(4, self.content[4:])
+        upload = ChunkedUpload.objects.get(pk=self.upload.pk)
+        self.assertIsNotNone(upload.completed_at)
+        with default_storage.open(upload.file) as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertFalse(os.path.exists(part_path(upload)))
+
+    def test_offset_mismatch_is_a_conflict(self):
+        self.append(0, self.content[:4])
+        with self.assertRaises(UploadError) as raised:
+            self.append(2, self.content[2:6])
+        self.assertEqual(raised.exception.status, 409)
+        self.assertEqual(ChunkedUpload.objects.get(pk=self.upload.pk).offset, 4)
+
+    def test_stale_offset_of_a_concurrent_request_is_a_conflict(self):
+        ChunkedUpload.objects.filter(pk=self.upload.pk).update(offset=4)
+        with self.assertRaises(UploadError) as raised:
+            self.append(0, self.content[:4])
+        self.assertEqual(raised.exception.status, 409)
+
+    def test_checksum_mismatch_drops_the_chunk(self):
+        self.append(0, self.content[:4])
+        with self.assertRaises(UploadError) as raised:
+            self.append(4, self.content[4:], checksum=self.checksum(b'something else'))
+        self.assertEqual(raised.exception.status, 460)
+        self.assertEqual(ChunkedUpload.objects.get(pk=self.upload.pk).offset, 4)
+        self.assertEqual(os.path.getsize(part_path(self.upload)), 4)
+
+        self.append(4, self.content[4:], checksum=self.checksum(self.content[4:]))
+        self.assertIsNotNone(ChunkedUpload.objects.get(pk=self.upload.pk).completed_at)
+
+    def test_whole_file_checksum_mismatch_restarts_the_upload(self):
+        user = User.objects.get(username='admin')
+        metadata = {'filename': 'plan.pdf', 'target': 'main.document', 'sha256': hashlib.sha256(b'other').hexdigest()}
+        self.upload = start_upload(user, len(self.content), metadata)
+        with self.assertRaises(UploadError) as raised:
+            self.append(0, self.content)
+        self.assertEqual(raised.exception.status, 460)
+        upload = ChunkedUpload.objects.get(pk=self.upload.pk)
+        self.assertEqual(upload.offset, 0)
+        self.assertIsNone(upload.completed_at)
+
+    def test_chunk_past_the_length_is_refused(self):
+        with self.assertRaises(UploadError) as raised:
+            self.append(0, self.content + b'!')
+        self.assertEqual(raised.exception.status, 413)
+
+
+class BlobIndexTests(TestCase):
+    def setUp(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        self.storage = ContentAddressedStorage(location=location.name)
+
+    def save(self, content=b'logo'):
+        return self.storage.save('logo.png', ContentFile(content))
+
+    def refcount(self, name):
+        return BlobIndex.objects.get(name=name).refcount
+
+    def test_same_content_is_stored_once(self):
+        name = self.save()
+        self.assertEqual(self.save(), name)
+        self.assertEqual(self.refcount(name), 2)
+        self.assertNotEqual(self.save(b'other'), name)
+
+    def test_release_drops_one_use_per_name(self):
+        name, other = self.save(), self.save(b'other')
+        self.save()
+        self.save()
+        self.storage.release([name, name, other, ''])
+        self.assertEqual(self.refcount(name), 1)
+        self.assertEqual(self.refcount(other), 0)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_release_never_goes_below_zero(self):
+        name = self.save()
+        self.storage.release([name, name, name])
+        self.assertEqual(self.refcount(name), 0)
+
+    def test_delete_removes_an_unreferenced_blob(self):
+        name = self.save()
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(BlobIndex.objects.filter(name=name).exists())
+
+    def test_delete_keeps_a_blob_a_row_still_uses(self):
+        name = self.save()
+        self.save()
+        TinyMCEImage.objects.create(title='logo', image=name)
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.refcount(name), 1)
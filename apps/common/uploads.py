@@ -0,0 +1,278 @@
+"""
+Resumable uploads of large files from the admin, following the core of
+the tus protocol (https://tus.io/protocols/resumable-upload).
+
+`POST /api/uploads/` starts an upload of Upload-Length bytes; its
+Upload-Metadata names the file (`filename`), the model it is for
+(`target`, one of UPLOAD_TARGETS) and optionally the `sha256` of the whole
+file. Each `PATCH` appends one chunk at Upload-Offset to a temp file in
+CHUNKED_UPLOAD_DIR; a chunk whose Upload-Checksum does not match is
+dropped (460) and is sent again. After an interruption `HEAD` tells how
+much has arrived, and the upload goes on from there instead of from zero.
+
+The last chunk moves the file into the storage under the target model's
+upload path. The admin form then only posts the upload id (see
+ChunkedUploadAdminMixin), so no single request carries more than
+CHUNKED_UPLOAD_CHUNK_SIZE bytes. Uploads not finished (or not attached)
+within CHUNKED_UPLOAD_EXPIRY_HOURS are removed by `expire_uploads()`; a
+stored file nothing refers to is left to the media GC.
+"""
+import base64
+import binascii
+import hashlib
+import os
+from datetime import timedelta
+from types import SimpleNamespace
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.urls import reverse
+from django.utils import timezone
+
+
+TUS_VERSION = '1.0.0'
+TUS_EXTENSIONS = 'creation,termination,checksum'
+CHECKSUM_ALGORITHMS = ('sha256', 'sha1', 'md5')
+READ_SIZE = 64 * 1024
+
+# Model -> its file field that may be uploaded in chunks.
+UPLOAD_TARGETS = {
+    'resource.resourcefile': 'file',
+    'main.document': 'file',
+    'main.timetable': 'file',
+}
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class AssembledFile(File):
+    """The complete temp file: FileSystemStorage moves it instead of copying."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def part_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{upload.pk}.part')
+
+
+def parse_metadata(header):
+    """Upload-Metadata: comma separated `key base64(value)` pairs."""
+    metadata = {}
+    for pair in filter(None, (pair.strip() for pair in (header or '').split(','))):
+        key, _, value = pair.partition(' ')
+        try:
+            metadata[key] = base64.b64decode(value.strip(), validate=True).decode()
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError(f"Upload-Metadata: '{key}' noto'g'ri")
+    return metadata
+
+
+def parse_checksum(header):
+    """Upload-Checksum: `<algorithm> base64(digest)` -> (hash object, expected digest)."""
+    algorithm, _, value = (header or '').strip().partition(' ')
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise UploadError(f"Upload-Checksum: {algorithm} qo'llab-quvvatlanmaydi")
+    try:
+        return hashlib.new(algorithm), base64.b64decode(value.strip(), validate=True)
+    except binascii.Error:
+        raise UploadError("Upload-Checksum noto'g'ri")
+
+
+def target_field(label):
+    """(model, file field) of an upload target."""
+    if label not in UPLOAD_TARGETS:
+        raise UploadError("Bu model uchun bo'laklab yuklash yo'q")
+    model = apps.get_model(label)
+    return model, model._meta.get_field(UPLOAD_TARGETS[label])
+
+
+def validation_error(field, filename, size):
+    """Messages of the field's validators for a file of this name and size."""
+    try:
+        for validator in field.validators:
+            validator(SimpleNamespace(name=filename, size=size))
+    except ValidationError as e:
+        return ' '.join(e.messages)
+    return None
+
+
+def upload_url(upload):
+    return reverse('chunked_upload', args=[upload.pk])
+
+
+############################################
+# Protocol
+############################################
+
+def start_upload(user, length, metadata):
+    """A new ChunkedUpload of `length` bytes; the field's validators run up front."""
+    from apps.common.models import ChunkedUpload
+
+    filename = os.path.basename(metadata.get('filename', '').replace('\\', '/')).strip()
+    if not filename:
+        raise UploadError("Upload-Metadata: 'filename' ko'rsatilmagan")
+    target = metadata.get('target', '').lower()
+    model, field = target_field(target)
+    checksum = metadata.get('sha256', '').lower()
+    if checksum and len(checksum) != 64:
+        raise UploadError("Upload-Metadata: 'sha256' noto'g'ri")
+    # Size and extension are known before the first byte: a 60 MB file is
+    # refused now, not after it has been sent.
+    error = validation_error(field, filename, length)
+    if error:
+        # An error that goes away for an empty file is about the size.
+        raise UploadError(error, status=400 if validation_error(field, filename, 0) else 413)
+
+    upload = ChunkedUpload.objects.create(
+        user=user, target=target, filename=filename, length=length, checksum=checksum,
+    )
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    open(part_path(upload), 'wb').close()
+    if not length:
+        complete_upload(upload)
+    return upload
+
+
+def append_chunk(upload, offset, stream, size, checksum=None):
+    """
+    Write `size` bytes read from `stream` at `offset`. Without a checksum
+    what arrived before a broken connection is kept (and HEAD reports it);
+    with one the whole chunk is verified and dropped on a mismatch.
+    """
+    from apps.common.models import ChunkedUpload
+
+    if upload.completed_at:
+        raise UploadError("Yuklash tugagan", status=403)
+    if offset != upload.offset:
+        raise UploadError("Upload-Offset mos emas", status=409)
+    if size > settings.CHUNKED_UPLOAD_CHUNK_SIZE or offset + size > upload.length:
+        raise UploadError("Bo'lak juda katta", status=413)
+    digest, expected = parse_checksum(checksum) if checksum else (None, None)
+
+    path = part_path(upload)
+    received = 0
+    try:
+        with open(path, 'r+b') as part:
+            # Anything after the offset is left over from a dropped chunk.
+            part.truncate(offset)
+            part.seek(offset)
+            while received < size:
+                data = stream.read(min(READ_SIZE, size - received)) if stream is not None else b''
+                if not data:
+                    break
+                if digest is not None:
+                    digest.update(data)
+                part.write(data)
+                received += len(data)
+            if digest is not None and (received < size or digest.digest() != expected):
+                part.truncate(offset)
+                if received < size:
+                    raise UploadError("Bo'lak to'liq kelmadi")
+                raise UploadError("Bo'lak nazorat summasi mos emas", status=460)
+    except FileNotFoundError:
+        raise UploadError("Yuklash topilmadi", status=404)
+
+    # Two requests with the same offset: only one of them moves it on.
+    updated = ChunkedUpload.objects.filter(pk=upload.pk, offset=offset).update(
+        offset=offset + received, updated_at=timezone.now(),
+    )
+    if not updated:
+        raise UploadError("Upload-Offset mos emas", status=409)
+    upload.offset = offset + received
+    if upload.offset == upload.length:
+        complete_upload(upload)
+    return upload
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def complete_upload(upload):
+    """Store the assembled file under the target model's upload path."""
+    from apps.common.models import ChunkedUpload
+
+    path = part_path(upload)
+    if upload.checksum and file_sha256(path) != upload.checksum:
+        # Something went wrong on the way: the whole file is sent again. The
+        # offset goes first; a temp file longer than it is cut by the next chunk.
+        ChunkedUpload.objects.filter(pk=upload.pk).update(offset=0, updated_at=timezone.now())
+        upload.offset = 0
+        open(path, 'wb').close()
+        raise UploadError("Fayl nazorat summasi mos emas", status=460)
+
+    model, field = target_field(upload.target)
+    name = field.generate_filename(model(), upload.filename)
+    with open(path, 'rb') as f:
+        upload.file = field.storage.save(name, AssembledFile(f, name=upload.filename), max_length=field.max_length)
+    if os.path.exists(path):
+        os.unlink(path)
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['file', 'completed_at', 'updated_at'])
+    return upload
+
+
+def terminate_upload(upload):
+    if os.path.exists(part_path(upload)):
+        os.unlink(part_path(upload))
+    upload.delete()
+
+
+def expire_uploads(hours=None):
+    """Delete uploads untouched for `hours` (CHUNKED_UPLOAD_EXPIRY_HOURS) with their temp files."""
+    from apps.common.models import ChunkedUpload
+
+    hours = settings.CHUNKED_UPLOAD_EXPIRY_HOURS if hours is None else hours
+    expired = ChunkedUpload.objects.filter(updated_at__lt=timezone.now() - timedelta(hours=hours))
+    count = 0
+    for upload in expired.iterator():
+        terminate_upload(upload)
+        count += 1
+    return count
+
+
+############################################
+# Admin
+############################################
+
+class ChunkedFileInput(forms.ClearableFileInput):
+    """File input that chunked_upload.js sends through the upload endpoint."""
+
+    class Media:
+        js = ('js/chunked_upload.js',)
+
+    def __init__(self, target, attrs=None):
+        super().__init__(attrs)
+        self.target = target
+
+    def get_context(self, name, value, attrs):
+        attrs = {
+            **(attrs or {}),
+            'data-chunked-upload': reverse('chunked_uploads'),
+            'data-target': self.target,
+            'data-chunk-size': settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+        }
+        return super().get_context(name, value, attrs)
+
+
+def completed_upload(upload_id, user, model):
+    """The complete upload `upload_id` of `user` for `model`, or None."""
+    from apps.common.models import ChunkedUpload
+
+    try:
+        return ChunkedUpload.objects.filter(
+            pk=upload_id, user=user, target=model._meta.label_lower, completed_at__isnull=False,
+        ).exclude(file='').first()
+    except ValidationError:
+        return None
@@ -1,9 +1,17 @@
 from django.urls import path
 
-from .views import upload_image, APIDocumentationView
+from .views import (
+    upload_image, APIDocumentationView, DBPoolMetricsView, FileDownloadView, ArchiveDownloadView,
+    ChunkedUploadView, ChunkedUploadDetailView,
+)
 
 urlpatterns = [
     path('tinymce-upload/', upload_image, name='tinymce_upload'),
     path('docs/', APIDocumentationView.as_view(), name='api_documentation'),
+    path('metrics/db-pool/', DBPoolMetricsView.as_view(), name='db_pool_metrics'),
+    path('downloads/<str:kind>/<int:pk>/', FileDownloadView.as_view(), name='file_download'),
+    path('archives/<str:kind>/<int:pk>/', ArchiveDownloadView.as_view(), name='archive_download'),
+    path('uploads/', ChunkedUploadView.as_view(), name='chunked_uploads'),
+    path('uploads/<uuid:pk>/', ChunkedUploadDetailView.as_view(), name='chunked_upload'),
 ]
 
@@ -21,6 +21,9 @@ def generate_upload_path(instance, filename: str) -> str:
     base_dir   = f"{app_label}/{model_name}/{today}"
 
     candidate  = f"{base_dir}/{name}{ext.lower()}"
+    if getattr(default_storage, "content_addressed", False):
+        # The storage names the file after its content, clashes can't happen
+        return candidate
     # If the exact name exists, keep trying until it's unique
     while default_storage.exists(candidate):
         candidate = f"{base_dir}/{name}-{uuid4().hex[:8]}{ext.lower()}"
@@ -33,10 +36,9 @@ def compress(image):
         return image
     if '.svg' in image.name:
         return image
-    img = Image.open(image)
-    img_size = len(img.fp.read())
-
-    if img_size / (1024 * 1024) > 1:
+    # File.size comes from the storage/upload, the image is not read for it.
+    if image.size / (1024 * 1024) > 1:
+        img = Image.open(image)
         if image.name.split('.')[1] == 'png':
             img = img.convert('RGB', palette=Image.ADAPTIVE, colors=256)
             thumb_io = BytesIO()
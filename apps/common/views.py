@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.contrib import admin
+from django.http import Http404
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
@@ -8,6 +10,19 @@ from .models import TinyMCEImage
 from django.shortcuts import render
 from django.views.generic import TemplateView
 from django.utils.decorators import method_decorator
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .archives import archive_container, archive_items, archive_response
+from .db_pool import get_pool_stats
+from .models import ChunkedUpload
+from .uploads import (
+    TUS_EXTENSIONS, TUS_VERSION, UploadError, append_chunk, parse_metadata, start_upload, terminate_upload, upload_url,
+)
+from .downloads import (
+    accel_response, counts_as_download, download_filename, download_model, download_queryset,
+    download_school, ranged_file_response, record_download,
+)
 
 
 @csrf_exempt
@@ -26,7 +41,7 @@ def upload_image(request):
     if not uploaded_file.content_type.startswith('image/'):
         return JsonResponse({'error': 'File is not an image'}, status=400)
     
-    image = TinyMCEImage(title=uploaded_file.name)
+    image = TinyMCEImage(title=uploaded_file.name, school_id=request.user.school_id)
     image.image = uploaded_file
     image.save()
     
@@ -298,4 +313,128 @@ class APIDocumentationView(TemplateView):
             }
         ]
         
-        return context
\ No newline at end of file
+        return context
+
+
+class DBPoolMetricsView(APIView):
+    """Database connection pool metrics of the worker serving the request (staff only)."""
+    permission_classes = [IsAdminUser]
+    swagger_schema = None
+
+    def get(self, request):
+        return Response(get_pool_stats())
+
+
+class FileDownloadView(APIView):
+    """
+    Download of a document, time table, resource or service file of the
+    current school, counted and sent by nginx (X-Accel-Redirect) or
+    streamed with Range support, see apps.common.downloads.
+    """
+    swagger_schema = None
+
+    def get(self, request, kind, pk):
+        model = download_model(kind)
+        school = download_school(request)
+        queryset = download_queryset(model, school)
+        show_inactive = request.query_params.get('show_inactive', 'false').lower() == 'true'
+        if not (show_inactive and request.user.is_staff):
+            queryset = queryset.filter(is_active=True)
+        instance = queryset.filter(pk=pk).first()
+        if instance is None or not instance.file:
+            raise Http404
+
+        if counts_as_download(request):
+            record_download(instance, getattr(school, 'id', None))
+        filename = download_filename(instance)
+        if settings.DOWNLOAD_ACCEL_PREFIX:
+            return accel_response(instance.file.name, filename)
+        return ranged_file_response(request, instance.file.name, filename)
+
+
+class ArchiveDownloadView(APIView):
+    """
+    ZIP of every active photo of a media collection or document of a
+    document category of the current school, see apps.common.archives.
+    """
+    swagger_schema = None
+
+    def get(self, request, kind, pk):
+        model, related_name, file_field = archive_container(kind)
+        container = download_queryset(model, download_school(request)).filter(pk=pk, is_active=True).first()
+        if container is None:
+            raise Http404
+        items = archive_items(container, related_name)
+        if not items:
+            raise Http404
+        return archive_response(request, kind, container, items, file_field)
+
+
+def tus_response(status=204, data=None, **headers):
+    response = Response(data, status=status)
+    response['Tus-Resumable'] = TUS_VERSION
+    response['Cache-Control'] = 'no-store'
+    for name, value in headers.items():
+        response[name.replace('_', '-')] = value
+    if status == 460:
+        response.reason_phrase = 'Checksum Mismatch'
+    return response
+
+
+def header_int(request, name):
+    try:
+        value = int(request.headers.get(name, ''))
+    except ValueError:
+        raise UploadError(f"{name} ko'rsatilmagan")
+    if value < 0:
+        raise UploadError(f"{name} noto'g'ri")
+    return value
+
+
+class ChunkedUploadView(APIView):
+    """Start a resumable upload (tus `creation`), see apps.common.uploads."""
+    permission_classes = [IsAdminUser]
+    swagger_schema = None
+
+    def options(self, request, *args, **kwargs):
+        return tus_response(Tus_Version=TUS_VERSION, Tus_Extension=TUS_EXTENSIONS)
+
+    def post(self, request):
+        try:
+            length = header_int(request, 'Upload-Length')
+            upload = start_upload(request.user, length, parse_metadata(request.headers.get('Upload-Metadata')))
+        except UploadError as e:
+            return tus_response(e.status, {'detail': str(e)})
+        return tus_response(201, Location=request.build_absolute_uri(upload_url(upload)), Upload_Offset=upload.offset)
+
+
+class ChunkedUploadDetailView(APIView):
+    """Offset (HEAD), next chunk (PATCH) and cancelling (DELETE) of a resumable upload."""
+    permission_classes = [IsAdminUser]
+    swagger_schema = None
+
+    def get_upload(self, request, pk):
+        upload = ChunkedUpload.objects.filter(pk=pk, user=request.user).first()
+        if upload is None:
+            raise Http404
+        return upload
+
+    def head(self, request, pk):
+        upload = self.get_upload(request, pk)
+        return tus_response(200, Upload_Offset=upload.offset, Upload_Length=upload.length)
+
+    def patch(self, request, pk):
+        upload = self.get_upload(request, pk)
+        if request.content_type != 'application/offset+octet-stream':
+            return tus_response(415, {'detail': "Content-Type: application/offset+octet-stream bo'lishi kerak"})
+        try:
+            offset = header_int(request, 'Upload-Offset')
+            size = header_int(request, 'Content-Length')
+            append_chunk(upload, offset, request.stream, size, request.headers.get('Upload-Checksum'))
+        except UploadError as e:
+            return tus_response(e.status, {'detail': str(e)}, Upload_Offset=upload.offset)
+        return tus_response(Upload_Offset=upload.offset)
+
+    def delete(self, request, pk):
+        terminate_upload(self.get_upload(request, pk))
+        return tus_response()
@@ -0,0 +1,99 @@
+"""
+Pre-warming the resized variants of new uploads.
+
+The first request for an imgproxy URL makes imgproxy download and resize
+the original while the visitor waits. Right after an upload (and after the
+image pipeline, see apps.common.images) the `warm_image` task requests the
+model's IMAGE_PRESETS URLs once per output format, with at most
+IMGPROXY_WARM_CONCURRENCY requests in flight, so the cache in front of
+imgproxy already holds them. Without imgproxy the local variants
+(apps.common.derivatives) are rendered instead.
+
+Warm variants are recorded in ImageMetadata.warm_variants and skipped
+when the task is retried.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from requests import RequestException, Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from apps.common.imgproxy import IMAGE_PRESETS, get_preset_url
+
+
+ACCEPT_HEADERS = {
+    'avif': 'image/avif,image/webp,*/*',
+    'webp': 'image/webp,*/*',
+    'original': '*/*',
+}
+
+
+def presets_for(model):
+    return IMAGE_PRESETS.get(model._meta.label_lower, ())
+
+
+def variant_key(preset, quality):
+    return f'{preset}-q{quality}'
+
+
+def _session():
+    # Connection errors and 502/503/504 are retried right away with a short
+    # backoff; whatever still fails is retried later by the task.
+    retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504), allowed_methods=('GET',))
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=settings.IMGPROXY_WARM_CONCURRENCY)
+    session = Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _fetch(session, url, accept):
+    """True when imgproxy answered 200 (the body is read so it gets cached)."""
+    try:
+        with session.get(url, headers={'Accept': accept}, timeout=settings.IMGPROXY_WARM_TIMEOUT, stream=True) as r:
+            for _ in r.iter_content(64 * 1024):
+                pass
+            return r.status_code == 200
+    except RequestException:
+        return False
+
+
+def warm_image(name, presets, quality=85):
+    """
+    Make sure the `presets` variants of the stored image `name` are cached.
+    Returns the presets that could not be warmed.
+    """
+    from apps.common.models import ImageMetadata
+
+    warm = ImageMetadata.objects.filter(name=name).values_list('warm_variants', flat=True).first() or {}
+    pending = [preset for preset in presets if variant_key(preset, quality) not in warm]
+    if not pending:
+        return []
+
+    failed = set()
+    if settings.IMGPROXY_ENABLED:
+        source = default_storage.url(name)
+        jobs = [
+            (preset, get_preset_url(source, preset, quality), ACCEPT_HEADERS.get(fmt, '*/*'))
+            for preset in pending for fmt in settings.IMGPROXY_WARM_FORMATS
+        ]
+        with _session() as session, ThreadPoolExecutor(settings.IMGPROXY_WARM_CONCURRENCY) as pool:
+            results = pool.map(lambda job: _fetch(session, job[1], job[2]), jobs)
+            failed = {preset for (preset, url, accept), ok in zip(jobs, results) if not ok}
+    else:
+        from apps.common.derivatives import get_derivative
+
+        for preset in pending:
+            try:
+                get_derivative(name, preset, quality)
+            except OSError:
+                failed.add(preset)
+
+    done = [preset for preset in pending if preset not in failed]
+    if done:
+        now = timezone.now().isoformat()
+        metadata, created = ImageMetadata.objects.get_or_create(name=name)
+        metadata.warm_variants.update({variant_key(preset, quality): now for preset in done})
+        metadata.save(update_fields=['warm_variants'])
+    return sorted(failed)
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from apps.common.mixins import DescriptionMixin, SchoolAdminMixin, AdminTranslation
+from apps.common.mixins import (
+    ChunkedUploadAdminMixin, DescriptionMixin, SchoolAdminMixin, AdminTranslation, EstimatedCountAdminMixin,
+)
 from mptt.admin import DraggableMPTTAdmin
 from modeltranslation.admin import TranslationTabularInline, TranslationStackedInline
 from modeltranslation import settings as mt_settings
@@ -8,6 +10,13 @@ from django.utils.translation import gettext_lazy as _
 from . import models
 from django.utils.safestring import mark_safe
 from django import forms
+from django.contrib import messages
+from django.contrib.admin import helpers
+from django.shortcuts import render
+from django.http import HttpResponseRedirect
+from django.urls import reverse
+from apps.main.services.cloning import CloneError, clone_school
+from apps.main.services.deletion import count_school_rows, start_school_deletion
 
 
 @admin.register(models.Menu)
@@ -54,6 +63,14 @@ class SiteSettingsInline(TranslationStackedInline):
         }
 
 
+class CloneFromTemplateForm(forms.Form):
+    source = forms.ModelChoiceField(queryset=models.School.objects.all(), label="Namuna maktab")
+    replace = forms.BooleanField(
+        required=False, label="Standart menyu, o'quv reja va sayt matnlarini almashtirish",
+        help_text="Belgilanmasa, maktabda bor bo'lgan menyu, o'quv reja va sayt matnlari o'zgarmaydi.",
+    )
+
+
 @admin.register(models.School)
 class SchoolAdmin(DescriptionMixin, SchoolAdminMixin, AdminTranslation):
     list_display = ('name', 'domain', 'is_active')
@@ -71,6 +88,7 @@ class SchoolAdmin(DescriptionMixin, SchoolAdminMixin, AdminTranslation):
     prepopulated_fields = {
         'slug': ('name',),
     }
+    actions = ['clone_from_template']
     
     def get_readonly_fields(self, request, obj=None):
         ro = list(super().get_readonly_fields(request, obj))
@@ -83,7 +101,110 @@ class SchoolAdmin(DescriptionMixin, SchoolAdminMixin, AdminTranslation):
 
     def has_delete_permission(self, request, obj=None):
         return request.user.is_superuser
-    
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        if not request.user.is_superuser:
+            actions.pop('clone_from_template', None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        """
+        Only counts per model: collecting every related object of a school
+        for the confirmation page is as slow as deleting it.
+        """
+        to_delete, model_count = [], {}
+        for obj in objs:
+            to_delete.append(f"{obj} (ma'lumotlari fon rejimida o'chiriladi)")
+            for model, rows in count_school_rows(obj.pk).items():
+                name = model._meta.verbose_name_plural
+                model_count[name] = model_count.get(name, 0) + rows
+        return to_delete, model_count, set(), []
+
+    def delete_model(self, request, obj):
+        start_school_deletion(obj, request.user)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            start_school_deletion(obj, request.user)
+
+    def response_delete(self, request, obj_display, obj_id):
+        self.message_user(request, f"“{obj_display}” o'chirish navbatga qo'yildi", messages.SUCCESS)
+        return HttpResponseRedirect(reverse('admin:main_schooldeletionjob_changelist'))
+
+    @admin.action(description="Namuna maktabdan tarkibni nusxalash")
+    def clone_from_template(self, request, queryset):
+        form = CloneFromTemplateForm(request.POST if 'apply' in request.POST else None)
+        if not form.is_valid():
+            return render(request, 'admin/main/school/clone_from_template.html', {
+                **self.admin_site.each_context(request),
+                'title': "Namuna maktabdan tarkibni nusxalash",
+                'opts': self.model._meta,
+                'form': form,
+                'schools': queryset,
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            })
+
+        source = form.cleaned_data['source']
+        for target in queryset.exclude(pk=source.pk):
+            try:
+                timings = clone_school(source, target, replace=form.cleaned_data['replace'])
+            except CloneError as e:
+                self.message_user(request, f"{target}: {e}", messages.ERROR)
+                continue
+            summary = ", ".join(
+                f"{label}: {rows} ({seconds:.2f}s)" for label, rows, seconds in timings if rows is not None
+            )
+            self.message_user(request, f"{target} ← {source}: {summary}", messages.SUCCESS)
+            skipped = ", ".join(label for label, rows, _ in timings if rows is None)
+            if skipped:
+                self.message_user(
+                    request,
+                    f"{target}: {skipped} nusxalanmadi, maktabda ular allaqachon bor "
+                    f"(almashtirish uchun \"Standart menyu... almashtirish\"ni belgilang)",
+                    messages.WARNING,
+                )
+    
+
+@admin.register(models.SchoolDeletionJob)
+class SchoolDeletionJobAdmin(admin.ModelAdmin):
+    list_display = ('school_name', 'status', 'progress_bar', 'deleted_rows', 'total_rows', 'deleted_files', 'current_model', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = [f.name for f in models.SchoolDeletionJob._meta.fields]
+    actions = ['retry']
+
+    def has_module_permission(self, request):
+        return request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def progress_bar(self, obj):
+        return mark_safe(
+            f'<div style="width: 120px; background: #eee; border-radius: 4px;">'
+            f'<div style="width: {obj.progress}%; background: #28a745; color: #fff; font-size: 11px; '
+            f'text-align: center; border-radius: 4px;">{obj.progress}%</div></div>'
+        )
+    progress_bar.short_description = "Jarayon"
+
+    @admin.action(description="Qayta ishga tushirish")
+    def retry(self, request, queryset):
+        from apps.common.tasks import enqueue
+        from apps.main.tasks import delete_school
+
+        for job in queryset.filter(status='failed'):
+            models.SchoolDeletionJob.objects.filter(pk=job.pk).update(status='running', error='')
+            if enqueue(delete_school, job.pk) is None:
+                models.SchoolDeletionJob.objects.filter(pk=job.pk).update(status='failed', error=job.error)
+                self.message_user(request, "Navbat serveri ishlamayapti, keyinroq urinib ko'ring", messages.ERROR)
+                return
+
 
 @admin.register(models.Banner)
 class BannerAdmin(SchoolAdminMixin, AdminTranslation):
@@ -269,20 +390,22 @@ class VacancyAdmin(SchoolAdminMixin, AdminTranslation):
 
 
 @admin.register(models.Document)
-class DocumentAdmin(SchoolAdminMixin, AdminTranslation):
-    list_display = ('title', 'category', 'is_active', 'created_at')
+class DocumentAdmin(ChunkedUploadAdminMixin, SchoolAdminMixin, AdminTranslation):
+    list_display = ('title', 'category', 'download_count', 'is_active', 'created_at')
     list_filter = ('is_active', 'category', 'created_at')
     search_fields = ('title',)
+    readonly_fields = ('download_count',)
 
     def has_module_permission(self, request):
         return not request.user.is_superuser
 
 
 @admin.register(models.TimeTable)
-class TimeTableAdmin(SchoolAdminMixin, AdminTranslation):
-    list_display = ('title', 'file', 'is_active')
+class TimeTableAdmin(ChunkedUploadAdminMixin, SchoolAdminMixin, AdminTranslation):
+    list_display = ('title', 'file', 'download_count', 'is_active')
     list_filter = ('is_active',)
     search_fields = ('title',)
+    readonly_fields = ('download_count',)
     
     def has_module_permission(self, request):
         return not request.user.is_superuser
@@ -402,7 +525,7 @@ class SiteSettingsAdmin(SchoolAdminMixin, AdminTranslation):
 
 
 @admin.register(models.ContactForm)
-class ContactFormAdmin(SchoolAdminMixin, admin.ModelAdmin):
+class ContactFormAdmin(EstimatedCountAdminMixin, SchoolAdminMixin, admin.ModelAdmin):
     list_display = ('full_name', 'phone_number', 'created_at', 'is_active')
     list_filter = ('is_active', 'created_at')
     search_fields = ('full_name', 'phone_number', 'message')
@@ -439,7 +562,7 @@ class CommentsAdmin(SchoolAdminMixin, AdminTranslation):
 
 
 @admin.register(models.EmailSubscription)
-class EmailSubscriptionAdmin(SchoolAdminMixin, admin.ModelAdmin):
+class EmailSubscriptionAdmin(EstimatedCountAdminMixin, SchoolAdminMixin, admin.ModelAdmin):
     def has_module_permission(self, request):
         return not request.user.is_superuser
     
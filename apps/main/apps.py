@@ -4,4 +4,13 @@ from django.apps import AppConfig
 class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.main'
-    verbose_name = 'Asosiy qism'
\ No newline at end of file
+    verbose_name = 'Asosiy qism'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_migrate, post_save
+        from apps.main.services import shards
+
+        for model in shards.global_models():
+            post_save.connect(shards.replicate_on_save, sender=model, dispatch_uid=f'main.replicate_on_save.{model._meta.label}')
+            post_delete.connect(shards.replicate_on_delete, sender=model, dispatch_uid=f'main.replicate_on_delete.{model._meta.label}')
+        post_migrate.connect(shards.prepare_shard, sender=self, dispatch_uid='main.prepare_shard')
@@ -1,5 +1,10 @@
+import time
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from apps.common.cache import bump_generation
 from apps.main.models import School, TimeTable
+from apps.main.services.provisioning import DEFAULT_TIMETABLES, create_timetables
 
 
 class Command(BaseCommand):
@@ -16,87 +21,63 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be created without actually creating',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Schools handled per INSERT / transaction',
+        )
 
     def handle(self, *args, **options):
         school_id = options.get('school_id')
         dry_run = options.get('dry_run')
-        
-        # Define the default timetables structure
-        time_tables = [
-            {'uz': '1-sinflar', 'ru': '1-классы', 'en': '1-classes'},
-            {'uz': '2-sinflar', 'ru': '2-классы', 'en': '2-classes'},
-            {'uz': '3-sinflar', 'ru': '3-классы', 'en': '3-classes'},
-            {'uz': '4-sinflar', 'ru': '4-классы', 'en': '4-classes'},
-            {'uz': '5-sinflar', 'ru': '5-классы', 'en': '5-classes'},
-            {'uz': '6-sinflar', 'ru': '6-классы', 'en': '6-classes'},
-            {'uz': '7-sinflar', 'ru': '7-классы', 'en': '7-classes'},
-            {'uz': '8-sinflar', 'ru': '8-классы', 'en': '8-classes'},
-            {'uz': '9-sinflar', 'ru': '9-классы', 'en': '9-classes'},
-        ]
-        
+        batch_size = options['batch_size']
+
+        schools = School.objects.all()
         if school_id:
-            # Process specific school
-            try:
-                schools = [School.objects.get(id=school_id)]
-                self.stdout.write(f"Processing school ID: {school_id}")
-            except School.DoesNotExist:
+            if not schools.filter(id=school_id).exists():
                 self.stdout.write(
                     self.style.ERROR(f'School with ID {school_id} does not exist.')
                 )
                 return
-        else:
-            # Get all schools
-            schools = School.objects.all()
-            self.stdout.write(f"Processing {schools.count()} schools")
-        
-        schools_processed = 0
-        timetables_created = 0
-        
-        for school in schools:
-            # Check if school already has timetables
-            existing_timetables = TimeTable.objects.filter(school=school).count()
-            
-            if existing_timetables == 0:
-                schools_processed += 1
-                
-                if dry_run:
-                    self.stdout.write(
-                        f"[DRY RUN] Would create {len(time_tables)} timetables for school: {school.name} (ID: {school.id})"
-                    )
-                    timetables_created += len(time_tables)
-                else:
-                    # Create timetables for this school
-                    for time_table in time_tables:
-                        TimeTable.objects.create(
-                            school=school,
-                            title=time_table['uz'],
-                            title_uz=time_table['uz'],
-                            title_ru=time_table['ru'],
-                            title_en=time_table['en']
-                        )
-                        timetables_created += 1
-                    
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"Created {len(time_tables)} timetables for school: {school.name} (ID: {school.id})"
-                        )
-                    )
-            else:
+            schools = schools.filter(id=school_id)
+
+        # One query for every school without a single timetable.
+        missing = list(
+            schools.filter(~Exists(TimeTable.objects.filter(school=OuterRef('pk'))))
+            .order_by('pk')
+            .only('pk', 'name')
+        )
+        self.stdout.write(f"{len(missing)} schools without timetables")
+
+        if dry_run:
+            for school in missing:
                 self.stdout.write(
-                    f"School '{school.name}' (ID: {school.id}) already has {existing_timetables} timetables. Skipping."
+                    f"[DRY RUN] Would create {len(DEFAULT_TIMETABLES)} timetables for school: {school.name} (ID: {school.id})"
                 )
-        
-        if dry_run:
             self.stdout.write(
                 self.style.WARNING(
-                    f"\n[DRY RUN COMPLETE] Would have processed {schools_processed} schools "
-                    f"and created {timetables_created} timetables."
+                    f"\n[DRY RUN COMPLETE] Would have processed {len(missing)} schools "
+                    f"and created {len(missing) * len(DEFAULT_TIMETABLES)} timetables."
                 )
             )
-        else:
+            return
+
+        started = time.monotonic()
+        timetables_created = 0
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            with transaction.atomic():
+                timetables_created += create_timetables(batch)
             self.stdout.write(
-                self.style.SUCCESS(
-                    f"\nCompleted! Processed {schools_processed} schools "
-                    f"and created {timetables_created} timetables."
-                )
-            ) 
\ No newline at end of file
+                f"{start + len(batch)}/{len(missing)} schools ({time.monotonic() - started:.2f}s)"
+            )
+        if timetables_created:
+            bump_generation(TimeTable)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nCompleted! Processed {len(missing)} schools "
+                f"and created {timetables_created} timetables."
+            )
+        )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.main.models import School
+from apps.main.services.cloning import DEFAULT_CLONE_MODELS, CloneError, clone_school
+
+
+class Command(BaseCommand):
+    help = "Copy a template school's content structure (menus, FAQs, directions, site texts...) into another school"
+
+    def add_arguments(self, parser):
+        parser.add_argument('source_id', type=int, help='Template school ID')
+        parser.add_argument('target_id', type=int, help='School ID to copy into')
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            default=list(DEFAULT_CLONE_MODELS),
+            help=f'Models to copy (default: {" ".join(DEFAULT_CLONE_MODELS)})',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Copy every tenant model except contact forms and email subscriptions',
+        )
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help="Delete the target's default menu, time tables and site texts before copying them",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            source = School.objects.get(pk=options['source_id'])
+            target = School.objects.get(pk=options['target_id'])
+        except School.DoesNotExist as e:
+            raise CommandError(str(e))
+
+        labels = None if options['all'] else options['models']
+        try:
+            timings = clone_school(source, target, labels, replace=options['replace'])
+        except (CloneError, LookupError) as e:
+            raise CommandError(str(e))
+
+        for label, rows, seconds in timings:
+            if rows is None:
+                self.stdout.write(self.style.WARNING(f'  {label}: skipped, the target has its own rows (see --replace)'))
+            else:
+                self.stdout.write(f'  {label}: {rows} rows in {seconds:.3f}s')
+        total = sum(seconds for _, _, seconds in timings)
+        self.stdout.write(self.style.SUCCESS(f'Cloned {source} into {target} in {total:.2f}s'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.main.models import School
+from apps.main.services.portability import export_school
+
+
+class Command(BaseCommand):
+    help = "Export one school's data as JSON Lines (data.jsonl) with a media manifest (media.jsonl)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('school_id', type=int, help='School ID')
+        parser.add_argument('output_dir', help='Directory to write the export to')
+        parser.add_argument(
+            '--with-media',
+            action='store_true',
+            help='Also copy the referenced media files into <output_dir>/media',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            school = School.objects.get(pk=options['school_id'])
+        except School.DoesNotExist as e:
+            raise CommandError(str(e))
+
+        stats = export_school(school, options['output_dir'], with_media=options['with_media'])
+        for label, rows in stats.items():
+            self.stdout.write(f'  {label}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {school} ({sum(stats.values())} rows) to {options["output_dir"]}'
+        ))
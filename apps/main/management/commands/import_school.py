@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.main.services.portability import PortabilityError, import_school
+
+
+class Command(BaseCommand):
+    help = 'Create a new school from a directory written by export_school'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input_dir', help='Export directory')
+        parser.add_argument('--domain', help='Domain of the new school (default: the exported one)')
+        parser.add_argument('--slug', help='Slug of the new school (default: the exported one)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per INSERT (default: 500)')
+
+    def handle(self, *args, **options):
+        try:
+            school, stats = import_school(
+                options['input_dir'],
+                domain=options['domain'],
+                slug=options['slug'],
+                batch_size=options['batch_size'],
+            )
+        except (PortabilityError, FileNotFoundError, LookupError) as e:
+            raise CommandError(str(e))
+
+        for label, rows in stats['rows'].items():
+            self.stdout.write(f'  {label}: {rows} rows')
+        media = stats['media']
+        self.stdout.write(
+            f'  media: {media["copied"]} copied, {media["skipped"]} already present, {media["missing"]} missing'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Imported {school} (ID {school.pk})'))
@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from apps.common.db_routers import REPLICA_DB_ALIAS, forget_school_shard, shard_for_school
+from apps.main.models import School, SchoolShard
+from apps.main.services import shards, tenancy
+
+
+class Command(BaseCommand):
+    help = (
+        "Move a school's data to another database alias (shard). "
+        "Writes of the school made while the command runs are lost, so run it in a quiet period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('school_id', type=int, help='School ID')
+        parser.add_argument('alias', help='Target database alias (a key of DATABASES)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows read and written per query',
+        )
+        parser.add_argument(
+            '--keep-source',
+            action='store_true',
+            help='Do not delete the rows from the old database after the move',
+        )
+
+    def handle(self, *args, **options):
+        alias = options['alias']
+        batch_size = options['batch_size']
+        if alias not in settings.DATABASES or alias == REPLICA_DB_ALIAS:
+            raise CommandError(f'Unknown database alias "{alias}"')
+
+        try:
+            school = School.objects.using(DEFAULT_DB_ALIAS).get(pk=options['school_id'])
+        except School.DoesNotExist:
+            raise CommandError(f"School {options['school_id']} not found")
+
+        forget_school_shard(school.pk)
+        source = shard_for_school(school.pk)
+        if source == alias:
+            self.stdout.write(self.style.WARNING(f'{school} is already in "{alias}"'))
+            return
+
+        self.stdout.write(f'Moving {school} from "{source}" to "{alias}"')
+        models = tenancy.tenant_models()
+
+        with transaction.atomic(using=alias):
+            if alias != DEFAULT_DB_ALIAS:
+                # Later saves of global rows are copied by the signals in
+                # apps.main.services.shards; this catches up bulk changes.
+                shards.sync_globals(alias, batch_size)
+            for model in models:
+                copied = self._copy_model(model, school, source, alias, batch_size)
+                if copied:
+                    self.stdout.write(f'  {model._meta.label}: {copied}')
+            shards.reset_sequences(models, alias)
+
+        if alias == DEFAULT_DB_ALIAS:
+            SchoolShard.objects.filter(school=school).delete()
+        else:
+            SchoolShard.objects.update_or_create(school=school, defaults={'alias': alias})
+        forget_school_shard(school.pk)
+
+        if not options['keep_source']:
+            # Raw deletes: no cascades and no signals, so django_cleanup
+            # keeps the media files that the moved rows still use.
+            with transaction.atomic(using=source):
+                for model in reversed(models):
+                    tenancy.school_queryset(model, school.pk, source)._raw_delete(source)
+
+        self.stdout.write(self.style.SUCCESS(f'{school} moved to "{alias}"'))
+
+    def _copy_model(self, model, school, source, alias, batch_size):
+        queryset = tenancy.school_queryset(model, school.pk, source).order_by('pk')
+        tree_ids = self._tree_id_map(model, queryset, alias)
+
+        copied = 0
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            if tree_ids:
+                setattr(obj, model._mptt_meta.tree_id_attr, tree_ids[getattr(obj, model._mptt_meta.tree_id_attr)])
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                copied += self._insert(model, batch, alias)
+                batch = []
+        if batch:
+            copied += self._insert(model, batch, alias)
+        return copied
+
+    def _insert(self, model, objs, alias):
+        conflicts = model._base_manager.using(alias).filter(pk__in=[obj.pk for obj in objs])
+        if conflicts.exists():
+            raise CommandError(
+                f'{model._meta.label}: ids {list(conflicts.values_list("pk", flat=True)[:10])} '
+                f'already exist in "{alias}"'
+            )
+        tenancy.insert_rows(model, objs, alias)
+        return len(objs)
+
+    def _tree_id_map(self, model, queryset, alias):
+        """MPTT tree ids are per table: give the school's trees ids unused in the target."""
+        if not hasattr(model, '_mptt_meta'):
+            return {}
+        attr = model._mptt_meta.tree_id_attr
+        old_ids = sorted(set(queryset.values_list(attr, flat=True)))
+        last = model._base_manager.using(alias).order_by(f'-{attr}').values_list(attr, flat=True).first() or 0
+        return {old: last + index for index, old in enumerate(old_ids, start=1)}
+
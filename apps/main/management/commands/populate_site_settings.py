@@ -1,5 +1,12 @@
+import time
+from functools import reduce
+from operator import or_
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from apps.common.cache import bump_generation, update_rows
 from apps.main.models import School, SiteSettings
+from apps.main.services.provisioning import DEFAULT_SITE_SETTINGS, create_site_settings
 
 
 class Command(BaseCommand):
@@ -21,110 +28,68 @@ class Command(BaseCommand):
             action='store_true',
             help='Update existing SiteSettings with default values (use with caution)',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Schools handled per INSERT / transaction',
+        )
 
     def handle(self, *args, **options):
         school_id = options.get('school_id')
         dry_run = options.get('dry_run')
         force = options.get('force')
-        
-        # Define default SiteSettings values
-        default_settings = {
-            'school_life': "Maktabimiz hayoti haqida ma'lumot",
-            'directions': "Bizning yo'nalishlar haqida ma'lumot",
-            'numbers': "Maktab raqamlari haqida ma'lumot",
-            'teachers': "O'qituvchilarimiz haqida ma'lumot",
-            'honors': "Maktabimiz faxrlari haqida ma'lumot",
-            'news': "Yangiliklar bo'limi haqida ma'lumot",
-            'gallery': "Galereya bo'limi haqida ma'lumot",
-            'contact': "Bog'lanish bo'limi haqida ma'lumot",
-            'comments': "Izohlar bo'limi haqida ma'lumot",
-            'faqs': "Ko'p beriladigan savollar haqida ma'lumot",
-            'leaders': "Rahbariyat bo'limi haqida ma'lumot",
-            'vacancies': "Vakansiyalar bo'limi haqida ma'lumot",
-            'documents': "Hujjatlar bo'limi haqida ma'lumot",
-            'timetables': "O'quv reja bo'limi haqida ma'lumot",
-            'edu_infos': "Ta'lim ma'lumotlari bo'limi haqida ma'lumot",
-            'events': "Tadbirlar bo'limi haqida ma'lumot",
-            'resources': "Resurslar bo'limi haqida ma'lumot",
-            'culture_services': "Madaniy xizmatlar haqida ma'lumot",
-            'culture_arts': "Madaniy san'at haqida ma'lumot",
-            'fine_arts': "Tasviriy san'at haqida ma'lumot"
-        }
-        
+        batch_size = options['batch_size']
+
+        schools = School.objects.all()
+        settings_qs = SiteSettings.objects.all()
         if school_id:
-            # Process specific school
-            try:
-                schools = [School.objects.get(id=school_id)]
-                self.stdout.write(f"Processing specific school: {schools[0].name} (ID: {school_id})")
-            except School.DoesNotExist:
+            if not schools.filter(id=school_id).exists():
                 self.stdout.write(
                     self.style.ERROR(f'School with ID {school_id} does not exist.')
                 )
                 return
+            schools = schools.filter(id=school_id)
+            settings_qs = settings_qs.filter(school_id=school_id)
+
+        # One query each: schools without SiteSettings, existing ones with an empty text.
+        missing = list(
+            schools.filter(~Exists(SiteSettings.objects.filter(school=OuterRef('pk'))))
+            .order_by('pk')
+            .only('pk', 'name')
+        )
+        empty = {field: Q(**{f'{field}__isnull': True}) | Q(**{field: ''}) for field in DEFAULT_SITE_SETTINGS}
+        to_update = settings_qs.filter(reduce(or_, empty.values())).count() if force else 0
+        skipped_count = settings_qs.count() - to_update
+        self.stdout.write(f"Processing {schools.count()} schools: {len(missing)} without SiteSettings")
+
+        if dry_run:
+            for school in missing:
+                self.stdout.write(
+                    self.style.SUCCESS(f'[DRY RUN] Would create SiteSettings for: {school.name}')
+                )
+            created_count, updated_count = len(missing), to_update
         else:
-            # Process all schools
-            schools = School.objects.all()
-            self.stdout.write(f"Processing all schools ({schools.count()} found)")
-        
-        if not schools:
-            self.stdout.write(self.style.WARNING('No schools found.'))
-            return
-        
-        created_count = 0
-        updated_count = 0
-        skipped_count = 0
-        
-        for school in schools:
-            try:
-                # Check if SiteSettings already exists
-                existing_settings = SiteSettings.objects.filter(school=school).first()
-                
-                if existing_settings and not force:
-                    self.stdout.write(
-                        self.style.WARNING(f'→ {school.name}: SiteSettings already exists (ID: {existing_settings.id}) - skipped')
-                    )
-                    skipped_count += 1
-                    continue
-                
-                if dry_run:
-                    if existing_settings and force:
-                        self.stdout.write(
-                            self.style.WARNING(f'[DRY RUN] Would update SiteSettings for: {school.name}')
-                        )
-                        updated_count += 1
-                    else:
-                        self.stdout.write(
-                            self.style.SUCCESS(f'[DRY RUN] Would create SiteSettings for: {school.name}')
-                        )
-                        created_count += 1
-                    continue
-                
-                if existing_settings and force:
-                    # Update existing settings
-                    for field, value in default_settings.items():
-                        if not getattr(existing_settings, field):  # Only update empty fields
-                            setattr(existing_settings, field, value)
-                    existing_settings.save()
-                    self.stdout.write(
-                        self.style.SUCCESS(f'✔ {school.name}: Updated existing SiteSettings (ID: {existing_settings.id})')
-                    )
-                    updated_count += 1
-                else:
-                    # Create new settings
-                    site_settings = SiteSettings.objects.create(
-                        school=school,
-                        **default_settings
-                    )
-                    self.stdout.write(
-                        self.style.SUCCESS(f'✔ {school.name}: Created SiteSettings (ID: {site_settings.id})')
-                    )
-                    created_count += 1
-                    
-            except Exception as e:
+            started = time.monotonic()
+            created_count = 0
+            for start in range(0, len(missing), batch_size):
+                batch = missing[start:start + batch_size]
+                with transaction.atomic():
+                    created_count += create_site_settings(batch)
                 self.stdout.write(
-                    self.style.ERROR(f'✗ {school.name}: Error - {str(e)}')
+                    f'{start + len(batch)}/{len(missing)} schools ({time.monotonic() - started:.2f}s)'
                 )
-        
+
+            updated_count = 0
+            if force and to_update:
+                # Only empty fields are filled: one UPDATE per field for all schools.
+                with transaction.atomic():
+                    for field, value in DEFAULT_SITE_SETTINGS.items():
+                        update_rows(settings_qs.filter(empty[field]), **{field: value})
+                updated_count = to_update
+            if created_count:
+                bump_generation(SiteSettings)
+
         # Summary
         self.stdout.write('')
         self.stdout.write(self.style.SUCCESS('=== SUMMARY ==='))
@@ -135,12 +100,12 @@ class Command(BaseCommand):
             self.stdout.write(f'Created: {created_count}')
             self.stdout.write(f'Updated: {updated_count}')
         self.stdout.write(f'Skipped: {skipped_count}')
-        self.stdout.write(f'Total schools processed: {len(schools)}')
-        
+        self.stdout.write(f'Total schools processed: {created_count + updated_count + skipped_count}')
+
         if dry_run:
             self.stdout.write('')
             self.stdout.write(self.style.WARNING('This was a dry run. No changes were made.'))
             self.stdout.write('Run without --dry-run to apply changes.')
         else:
             self.stdout.write('')
-            self.stdout.write(self.style.SUCCESS('✅ Operation completed successfully!')) 
\ No newline at end of file
+            self.stdout.write(self.style.SUCCESS('✅ Operation completed successfully!'))
@@ -0,0 +1,115 @@
+import csv
+import time
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+from apps.common.cache import bump_generation
+from apps.common.richtext import render_instance
+from apps.main.models import School
+from apps.main.services.provisioning import apply_default_counts, create_defaults
+
+
+class Command(BaseCommand):
+    help = (
+        'Create schools from a CSV file together with their default menu, timetables and SiteSettings. '
+        'The header row holds School field names (domain and name are required, e.g. domain,name,name_ru,address).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path to the CSV file (UTF-8)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Schools created per transaction',
+        )
+        parser.add_argument(
+            '--skip-invalid',
+            action='store_true',
+            help='Skip invalid or already existing rows instead of aborting',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only validate the file',
+        )
+
+    def handle(self, *args, **options):
+        with open(options['csv_file'], encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            self._check_header(reader.fieldnames or [])
+            rows = list(reader)
+
+        schools, errors = self._build_schools(rows)
+        for line, message in errors:
+            self.stdout.write(self.style.ERROR(f'Line {line}: {message}'))
+        if errors and not options['skip_invalid']:
+            raise CommandError(f'{len(errors)} invalid row(s), nothing was created')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{len(schools)} school(s) would be created'))
+            return
+
+        batch_size = options['batch_size']
+        total = 0
+        for start in range(0, len(schools), batch_size):
+            batch = schools[start:start + batch_size]
+            started = time.monotonic()
+            for school in batch:
+                # bulk_create skips the pre_save receiver that renders the description.
+                render_instance(school)
+            with transaction.atomic():
+                created = School.objects.bulk_create(batch)
+                create_defaults(created)
+            total += len(created)
+            self.stdout.write(f'{total}/{len(schools)} schools ({time.monotonic() - started:.2f}s)')
+
+        bump_generation(School)
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {total} schools'))
+
+    def _check_header(self, header):
+        allowed = {
+            field.name for field in School._meta.concrete_fields
+            if field.editable and not field.primary_key
+        }
+        unknown = set(header) - allowed
+        if unknown:
+            raise CommandError(f'Unknown columns: {", ".join(sorted(unknown))}')
+        if not {'domain', 'name'} <= set(header):
+            raise CommandError('Columns "domain" and "name" are required')
+
+    def _build_schools(self, rows):
+        schools, errors = [], []
+        seen = {}
+        for line, row in enumerate(rows, start=2):
+            school = School(**{key: value.strip() for key, value in row.items() if value and value.strip()})
+            school.domain = (school.domain or '').lower()
+            if not school.slug:
+                school.slug = slugify(school.name or '')
+            apply_default_counts(school)
+            try:
+                school.clean_fields()
+            except ValidationError as e:
+                errors.append((line, '; '.join(f'{k}: {" ".join(v)}' for k, v in e.message_dict.items())))
+                continue
+            for field in ('domain', 'slug'):
+                key = (field, getattr(school, field))
+                if key in seen:
+                    errors.append((line, f'{field} "{key[1]}" repeats line {seen[key]}'))
+                    break
+                seen[key] = line
+            else:
+                schools.append((line, school))
+
+        existing = set(School.objects.filter(domain__in=[s.domain for _, s in schools]).values_list('domain', flat=True))
+        existing_slugs = set(School.objects.filter(slug__in=[s.slug for _, s in schools]).values_list('slug', flat=True))
+        valid = []
+        for line, school in schools:
+            if school.domain in existing:
+                errors.append((line, f'domain "{school.domain}" already exists'))
+            elif school.slug in existing_slugs:
+                errors.append((line, f'slug "{school.slug}" already exists'))
+            else:
+                valid.append(school)
+        return valid, sorted(errors)
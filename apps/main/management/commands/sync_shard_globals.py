@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.main.services import shards, tenancy
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the global tables (School, Direction, Subject...) to the shards and point '
+        "their sequences into the shard's id block. Run after bulk changes of global rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='Shard aliases (default: all)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows read and written per query',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or shards.shard_aliases()
+        unknown = set(aliases) - set(shards.shard_aliases())
+        if unknown:
+            raise CommandError(f'Unknown shard alias(es): {", ".join(sorted(unknown))}')
+
+        for alias in aliases:
+            shards.sync_globals(alias, options['batch_size'])
+            shards.reset_sequences(tenancy.tenant_models(), alias)
+            self.stdout.write(self.style.SUCCESS(f'"{alias}" is up to date'))
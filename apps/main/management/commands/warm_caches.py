@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.main.models import School
+from apps.main.services.sections import warm_schools
+
+
+class Command(BaseCommand):
+    help = 'Fill the cached school lookups, menus, site settings and school info of all active schools'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schools', nargs='+', type=int, help='Only these school IDs')
+        parser.add_argument(
+            '--languages',
+            nargs='+',
+            choices=[code for code, name in settings.LANGUAGES],
+            help='Languages to warm (default: all)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.CACHE_WARM_WORKERS,
+            help=f'Pool size (default: {settings.CACHE_WARM_WORKERS})',
+        )
+        parser.add_argument('--processes', action='store_true', help='Use a process pool instead of threads')
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=settings.CACHE_WARM_RATE,
+            help='Schools started per second, 0 for no limit',
+        )
+
+    def handle(self, *args, **options):
+        results = warm_schools(
+            school_ids=options['schools'],
+            languages=options['languages'],
+            workers=options['workers'],
+            processes=options['processes'],
+            rate=options['rate'],
+        )
+        domains = dict(School.objects.filter(pk__in=[r[0] for r in results]).values_list('pk', 'domain'))
+
+        failed = 0
+        for school_id, seconds, error in sorted(results):
+            if error:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'  {domains.get(school_id, school_id)}: {error}'))
+            else:
+                self.stdout.write(f'  {domains.get(school_id, school_id)}: {seconds:.3f}s')
+
+        total = sum(seconds for _, seconds, error in results if not error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {len(results) - failed} schools ({total:.2f}s of work), {failed} failed'
+        ))
@@ -1,7 +1,8 @@
 # apps/core/middleware.py
 from django.http import Http404, HttpResponse
 from django.utils.deprecation import MiddlewareMixin
-from apps.main.models import School
+from apps.main.services.sections import school_for_domain
+from apps.common.db_routers import set_current_school, reset_current_school
 
 class SubdomainMiddleware(MiddlewareMixin):
     
@@ -33,16 +34,39 @@ class SubdomainMiddleware(MiddlewareMixin):
             request.subdomain = subdomain
             
             try:
-                school = School.objects.get(domain=subdomain)
+                school = school_for_domain(subdomain)
+                if school is None:
+                    return HttpResponse("Maktab topilmadi", status=403)
                 if school.is_active:
                     request.school = school
                 else:
                     return HttpResponse("Maktab faol emas", status=403)
-            except School.DoesNotExist:
-                return HttpResponse("Maktab topilmadi", status=403)
             except Exception as e:
                 # Only catch other exceptions, not Http404
                 print(f"Unexpected error in SubdomainMiddleware: {e}")
                 # Don't set request.school, leaving it as None
         
         # If no header or empty, subdomain and school remain None
+
+
+class SchoolShardMiddleware:
+    """
+    Makes the request's school known to TenantShardRouter: the school from
+    the `School` header (SubdomainMiddleware) or, in the admin, the school
+    of the logged in school admin. Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        school = getattr(request, 'school', None)
+        school_id = school.pk if school else None
+        if school_id is None and request.user.is_authenticated:
+            school_id = request.user.school_id
+
+        token = set_current_school(school_id)
+        try:
+            return self.get_response(request)
+        finally:
+            reset_current_school(token)
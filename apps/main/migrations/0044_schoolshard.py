@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0043_directionschool_direction_image_teacher_subject_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchoolShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=64, verbose_name="Ma'lumotlar bazasi")),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name="O'zgartirilgan sana")),
+                ('school', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='shard', to='main.school', verbose_name='Maktab')),
+            ],
+            options={
+                'verbose_name': 'Maktab sharding',
+                'verbose_name_plural': 'Maktablar sharding',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0044_schoolshard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchoolDeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('school_name', models.CharField(max_length=255, verbose_name='Maktab nomi')),
+                ('status', models.CharField(choices=[('pending', 'Navbatda'), ('running', 'Bajarilmoqda'), ('done', 'Tugallandi'), ('failed', 'Xatolik')], default='pending', max_length=20, verbose_name='Holati')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Jami yozuvlar')),
+                ('deleted_rows', models.PositiveIntegerField(default=0, verbose_name="O'chirilgan yozuvlar")),
+                ('deleted_files', models.PositiveIntegerField(default=0, verbose_name="O'chirilgan fayllar")),
+                ('current_model', models.CharField(blank=True, max_length=100, verbose_name='Joriy model')),
+                ('error', models.TextField(blank=True, verbose_name='Xatolik')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan sana')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan sana')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Kim tomonidan')),
+                ('school', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deletion_jobs', to='main.school', verbose_name='Maktab')),
+            ],
+            options={
+                'verbose_name': "Maktabni o'chirish ",
+                'verbose_name_plural': "Maktablarni o'chirish",
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
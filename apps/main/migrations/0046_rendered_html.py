@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0045_schooldeletionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='school',
+            name='description_rendered',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Tafsilot (HTML)'),
+        ),
+        migrations.AddField(
+            model_name='school',
+            name='description_rendered_en',
+            field=models.TextField(blank=True, default='', editable=False, null=True, verbose_name='Tafsilot (HTML)'),
+        ),
+        migrations.AddField(
+            model_name='school',
+            name='description_rendered_ru',
+            field=models.TextField(blank=True, default='', editable=False, null=True, verbose_name='Tafsilot (HTML)'),
+        ),
+        migrations.AddField(
+            model_name='school',
+            name='description_rendered_uz',
+            field=models.TextField(blank=True, default='', editable=False, null=True, verbose_name='Tafsilot (HTML)'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0046_rendered_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Yuklab olishlar soni'),
+        ),
+        migrations.AddField(
+            model_name='timetable',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Yuklab olishlar soni'),
+        ),
+    ]
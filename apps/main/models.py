@@ -1,5 +1,5 @@
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from mptt.models import MPTTModel, TreeForeignKey
 from apps.common.mixins import SlugifyMixin
@@ -16,6 +16,8 @@ class School(SlugifyMixin, BaseModel):
     name = models.CharField(max_length=255, verbose_name="Nomi")
     slug = models.SlugField(verbose_name="Slug")
     description = HTMLField(null=True, blank=True, verbose_name="Tafsilot")
+    # Filled on save from `description`, see apps.common.richtext
+    description_rendered = models.TextField(blank=True, default='', editable=False, verbose_name="Tafsilot (HTML)")
     short_description = HTMLField(null=True, blank=True, verbose_name="Qisqacha tafsilot")
     founded_year = models.SmallIntegerField(null=True, blank=True, verbose_name="Ishga tushgan yili")
     capacity = models.PositiveIntegerField(null=True, blank=True, verbose_name="O'quvchilar sig'imi")
@@ -52,6 +54,76 @@ class School(SlugifyMixin, BaseModel):
         ]
 
 
+class SchoolShard(models.Model):
+    """
+    Database alias that holds the school's data when tenant sharding is
+    used (see apps.common.db_routers.TenantShardRouter). Schools without a
+    row live in `default`. Change only through `manage.py move_school_shard`.
+    """
+    school = models.OneToOneField(
+        School, on_delete=models.CASCADE,
+        verbose_name="Maktab",
+        related_name="shard",
+    )
+    alias = models.CharField(max_length=64, verbose_name="Ma'lumotlar bazasi")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="O'zgartirilgan sana")
+
+    def __str__(self):
+        return f"{self.school} -> {self.alias}"
+
+    class Meta:
+        verbose_name = "Maktab sharding"
+        verbose_name_plural = "Maktablar sharding"
+
+
+class SchoolDeletionJob(models.Model):
+    """
+    Background deletion of a school and all of its data
+    (see apps.main.services.deletion).
+    """
+    STATUSES = [
+        ('pending', "Navbatda"),
+        ('running', "Bajarilmoqda"),
+        ('done', "Tugallandi"),
+        ('failed', "Xatolik"),
+    ]
+
+    school = models.ForeignKey(
+        School, on_delete=models.SET_NULL,
+        null=True, blank=True,
+        verbose_name="Maktab",
+        related_name="deletion_jobs",
+    )
+    school_name = models.CharField(max_length=255, verbose_name="Maktab nomi")
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending', verbose_name="Holati")
+    total_rows = models.PositiveIntegerField(default=0, verbose_name="Jami yozuvlar")
+    deleted_rows = models.PositiveIntegerField(default=0, verbose_name="O'chirilgan yozuvlar")
+    deleted_files = models.PositiveIntegerField(default=0, verbose_name="O'chirilgan fayllar")
+    current_model = models.CharField(max_length=100, blank=True, verbose_name="Joriy model")
+    error = models.TextField(blank=True, verbose_name="Xatolik")
+    created_by = models.ForeignKey(
+        'user.User', on_delete=models.SET_NULL,
+        null=True, blank=True,
+        verbose_name="Kim tomonidan",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan sana")
+
+    def __str__(self):
+        return f"{self.school_name} ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        if not self.total_rows:
+            return 100 if self.status == 'done' else 0
+        return min(100, round(self.deleted_rows * 100 / self.total_rows))
+
+    class Meta:
+        verbose_name = "Maktabni o'chirish "
+        verbose_name_plural = "Maktablarni o'chirish"
+        ordering = ['-created_at']
+
+
 class SchoolLife(BaseModel):
     school = models.ForeignKey(
         School, on_delete=models.CASCADE,
@@ -557,6 +629,7 @@ class TimeTable(BaseModel):
         validators=[file_size_50, FileExtensionValidator(allowed_extensions=['pdf'])],
         help_text="Fayl 50 MB dan katta bo'lishi mumkin emas. Fayl PDF formatida bo'lishi kerak."
     )
+    download_count = models.PositiveIntegerField(default=0, verbose_name="Yuklab olishlar soni")
     
     def __str__(self):
         return self.title
@@ -613,6 +686,7 @@ class Document(BaseModel):
         validators=[file_size_50],
         help_text="Fayl 50 MB dan katta bo'lishi mumkin emas."
     )
+    download_count = models.PositiveIntegerField(default=0, verbose_name="Yuklab olishlar soni")
     
     def __str__(self):
         return self.title
@@ -807,155 +881,22 @@ class SiteSettings(BaseModel):
         verbose_name = "Maktab text tavsilotlar"
         verbose_name_plural = "Maktab text tavsilotlar"
 
+@receiver(pre_save, sender=School)
+def set_school_default_counts(sender, instance, raw=False, **kwargs):
+    """
+    Set default values of a new School before it is inserted.
+    """
+    if instance._state.adding and not raw:
+        from apps.main.services.provisioning import apply_default_counts
+        apply_default_counts(instance)
+
+
 # Signal to create default instances when a new School is created
 @receiver(post_save, sender=School)
-def create_school_defaults(sender, instance, created, **kwargs):
+def create_school_defaults(sender, instance, created, raw=False, **kwargs):
     """
-    Create default instances and set default values when a new School is created.
+    Create default menu, timetables and SiteSettings when a new School is created.
     """
-    if created:
-        # Set default values for the school if not provided
-        if not instance.capacity:
-            instance.capacity = 0
-        if not instance.student_count:
-            instance.student_count = 0
-        if not instance.teacher_count:
-            instance.teacher_count = 0
-        if not instance.direction_count:
-            instance.direction_count = 0
-        if not instance.class_count:
-            instance.class_count = 0
-        
-        # Save the instance with default values
-        instance.save()
-        
-        # Create hierarchical menu structure in correct order
-        # Using ordered list instead of dictionary to maintain order
-        menu_structure = [
-            {
-                "title": "Maktab",
-                "url": "#",
-                "children": [
-                    {"title": "Maktab haqida", "url": "#"},
-                    {"title": "Rahbariyat va o'qituvchilar xodimlar", "url": "#"},
-                    {"title": "Bo'sh ish o'rinlari", "url": "#"},
-                ]
-            },
-            {
-                "title": "Faoliyat",
-                "url": "#",
-                "children": [
-                    {"title": "Yo'nalishlar", "url": "#"},
-                    {"title": "Tadbirlar", "url": "#"},
-                    {"title": "Tanlov va festivallar", "url": "#"},
-                    {"title": "Maktabimiz faxrlariz", "url": "#"},
-                    {"title": "Mahorat darslari", "url": "#"},
-                ]
-            },
-            {
-                "title": "Ta'lim jarayoni",
-                "url": "#",
-                "children": [
-                    {"title": "O'quv reja va dastur", "url": "#"},
-                    {"title": "Ta'limga oid ma'lumotlar", "url": "#"},
-                    {"title": "Resurslar (🔗 YouTube, PDF darsliklar)", "url": "#"},
-                ]
-            },
-            {
-                "title": "Matbuot",
-                "url": "#",
-                "children": [
-                    {"title": "Yangiliklar va e'lonlar", "url": "#"},
-                    {"title": "Media (rasm va videolar)", "url": "#"},
-                ]
-            },
-            {
-                "title": "Hujjatlar",
-                "url": "#",
-                "children": [
-                    {"title": "Rasmiy hujjatlar", "url": "#"},
-                    {"title": "Ochiq ma'lumotlar", "url": "#"},
-                ]
-            },
-            {
-                "title": "Tijoriy bo'lim",
-                "url": "#",
-                "children": [
-                    {"title": "Madaniy xizmatlar", "url": "#"},
-                    {"title": "Amaliy san'at", "url": "#"},
-                    {"title": "Tasviriy san'at", "url": "#"},
-                ]
-            },
-            {
-                "title": "Bog'lanish",
-                "url": "#",
-                "children": []
-            }
-        ]
-        
-        # Create menu items in correct order
-        for menu_data in menu_structure:
-            # Create parent menu item
-            parent_menu = Menu.objects.create(
-                school=instance,
-                title=menu_data["title"],
-                url=menu_data["url"],
-                parent=None
-            )
-            
-            # Create child menu items
-            for child_data in menu_data["children"]:
-                Menu.objects.create(
-                    school=instance,
-                    title=child_data["title"],
-                    url=child_data["url"],
-                    parent=parent_menu
-                )
-        
-        # Create TimeTable instances for the new school with translations
-        
-        time_tables = [
-            {'uz': '1-sinflar', 'ru': '1-классы', 'en': '1-classes'},
-            {'uz': '2-sinflar', 'ru': '2-классы', 'en': '2-classes'},
-            {'uz': '3-sinflar', 'ru': '3-классы', 'en': '3-classes'},
-            {'uz': '4-sinflar', 'ru': '4-классы', 'en': '4-classes'},
-            {'uz': '5-sinflar', 'ru': '5-классы', 'en': '5-classes'},
-            {'uz': '6-sinflar', 'ru': '6-классы', 'en': '6-classes'},
-            {'uz': '7-sinflar', 'ru': '7-классы', 'en': '7-classes'},
-            {'uz': '8-sinflar', 'ru': '8-классы', 'en': '8-classes'},
-            {'uz': '9-sinflar', 'ru': '9-классы', 'en': '9-classes'},
-        ]
-        
-        for time_table in time_tables:
-            TimeTable.objects.create(
-                school=instance,
-                title=time_table['uz'],
-                title_uz=time_table['uz'],
-                title_ru=time_table['ru'],
-                title_en=time_table['en']
-            )
-        
-        # Create default SiteSettings instance for the new school
-        SiteSettings.objects.create(
-            school=instance,
-            school_life="Maktabimiz hayoti haqida ma'lumot",
-            directions="Bizning yo'nalishlar haqida ma'lumot",
-            numbers="Maktab raqamlari haqida ma'lumot",
-            teachers="O'qituvchilarimiz haqida ma'lumot",
-            honors="Maktabimiz faxrlari haqida ma'lumot",
-            news="Yangiliklar bo'limi haqida ma'lumot",
-            gallery="Galereya bo'limi haqida ma'lumot",
-            contact="Bog'lanish bo'limi haqida ma'lumot",
-            comments="Izohlar bo'limi haqida ma'lumot",
-            faqs="Ko'p beriladigan savollar haqida ma'lumot",
-            leaders="Rahbariyat bo'limi haqida ma'lumot",
-            vacancies="Vakansiyalar bo'limi haqida ma'lumot",
-            documents="Hujjatlar bo'limi haqida ma'lumot",
-            timetables="O'quv reja bo'limi haqida ma'lumot",
-            edu_infos="Ta'lim ma'lumotlari bo'limi haqida ma'lumot",
-            events="Tadbirlar bo'limi haqida ma'lumot",
-            resources="Resurslar bo'limi haqida ma'lumot",
-            culture_services="Madaniy xizmatlar haqida ma'lumot",
-            culture_arts="Madaniy san'at haqida ma'lumot",
-            fine_arts="Tasviriy san'at haqida ma'lumot"
-        )
\ No newline at end of file
+    if created and not raw:
+        from apps.main.services.provisioning import create_defaults
+        create_defaults([instance])
\ No newline at end of file
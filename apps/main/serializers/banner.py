@@ -1,8 +1,13 @@
 from rest_framework import serializers
+from apps.common.rest_framework import ImageMetadataField, ImageMetadataListSerializer, ImgproxyImageField
 from apps.main.models import Banner
 
 
 class BannerSerializer(serializers.ModelSerializer):
+    image_meta = ImageMetadataField(source='image')
+    image_srcset = ImgproxyImageField(source='image')
+
     class Meta:
         model = Banner
-        fields = ['id', 'title', 'image', 'button_text', 'link'] 
\ No newline at end of file
+        fields = ['id', 'title', 'image', 'image_meta', 'image_srcset', 'button_text', 'link']
+        list_serializer_class = ImageMetadataListSerializer 
\ No newline at end of file
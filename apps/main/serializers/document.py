@@ -1,18 +1,22 @@
 from rest_framework import serializers
+from apps.common.rest_framework import ArchiveURLField, DownloadURLField
 from ..models import Document, DocumentCategory
 
 
 class DocumentCategorySerializer(serializers.ModelSerializer):
+    archive_url = ArchiveURLField()
+
     class Meta:
         model = DocumentCategory
-        fields = ['id', 'name']
+        fields = ['id', 'name', 'archive_url']
 
 
 class DocumentSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
+    download_url = DownloadURLField()
     
     class Meta:
         model = Document
         fields = [
-            'id', 'title', 'file', 'category', 'category_name', 'created_at'
+            'id', 'title', 'file', 'download_url', 'download_count', 'category', 'category_name', 'created_at'
         ] 
\ No newline at end of file
@@ -1,8 +1,11 @@
 from rest_framework import serializers
+from apps.common.rest_framework import RenderedHTMLField
 from apps.main.models import School
 
 
 class SchoolSerializer(serializers.ModelSerializer):
+    description = RenderedHTMLField()
+
     class Meta:
         model = School
         fields = ['id', 'name', 'slug', 'domain', 'description', 'short_description', 
@@ -1,8 +1,13 @@
 from rest_framework import serializers
+from apps.common.rest_framework import ImageMetadataField, ImageMetadataListSerializer, ImgproxyImageField
 from apps.main.models import SchoolLife
 
 
 class SchoolLifeSerializer(serializers.ModelSerializer):
+    image_meta = ImageMetadataField(source='image')
+    image_srcset = ImgproxyImageField(source='image')
+
     class Meta:
         model = SchoolLife
-        fields = ['id', 'image', 'title', 'description'] 
\ No newline at end of file
+        fields = ['id', 'image', 'image_meta', 'image_srcset', 'title', 'description']
+        list_serializer_class = ImageMetadataListSerializer 
\ No newline at end of file
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.common.rest_framework import ImageMetadataField, ImageMetadataListSerializer, ImgproxyImageField
 from ..models import Teacher, Direction, TeacherExperience
 
 
@@ -16,10 +17,13 @@ class TeacherExperienceSerializer(serializers.ModelSerializer):
 
 class TeacherListSerializer(serializers.ModelSerializer):
     direction = serializers.SerializerMethodField()
+    image_meta = ImageMetadataField(source='image')
+    image_srcset = ImgproxyImageField(source='image')
     
     class Meta:
         model = Teacher
-        fields = ['id', 'full_name', 'slug', 'image', 'experience_years', 'direction', 'created_at']
+        fields = ['id', 'full_name', 'slug', 'image', 'image_meta', 'image_srcset', 'experience_years', 'direction', 'created_at']
+        list_serializer_class = ImageMetadataListSerializer
     
     def get_direction(self, obj):
         first_direction = obj.directions.first()
@@ -31,10 +35,12 @@ class TeacherListSerializer(serializers.ModelSerializer):
 class TeacherDetailSerializer(serializers.ModelSerializer):
     directions = DirectionBasicSerializer(many=True, read_only=True)
     experiences = TeacherExperienceSerializer(many=True, read_only=True)
+    image_meta = ImageMetadataField(source='image')
+    image_srcset = ImgproxyImageField(source='image')
     
     class Meta:
         model = Teacher
         fields = [
-            'id', 'full_name', 'slug', 'image', 'experience_years',
+            'id', 'full_name', 'slug', 'image', 'image_meta', 'image_srcset', 'experience_years',
             'directions', 'experiences', 'created_at'
         ] 
\ No newline at end of file
@@ -1,10 +1,13 @@
 from rest_framework import serializers
+from apps.common.rest_framework import DownloadURLField
 from apps.main.models import TimeTable
 
 
 class TimeTableListSerializer(serializers.ModelSerializer):
+    download_url = DownloadURLField()
+
     class Meta:
         model = TimeTable
         fields = [
-            'id', 'title', 'file', 'created_at'
+            'id', 'title', 'file', 'download_url', 'download_count', 'created_at'
         ] 
\ No newline at end of file
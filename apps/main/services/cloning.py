@@ -0,0 +1,225 @@
+"""
+Copy the content structure of a template school into another school.
+
+Rows are read per model, their foreign keys (and M2M through rows) are
+remapped in memory to the newly created ids and written with
+`bulk_create`. A row the target already has (same slug) is reused, so
+cloning again only adds what is missing. File fields keep pointing to the template's media files,
+nothing is copied in storage (see apps.common.files.keep_shared_files).
+"""
+import time
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from apps.common.cache import bump_generation
+from apps.common.db_routers import shard_for_school
+from apps.main.models import School
+from apps.main.services import tenancy
+
+
+DEFAULT_CLONE_MODELS = (
+    'main.Menu',
+    'main.FAQ',
+    'main.DocumentCategory',
+    'main.DirectionSchool',
+    'main.DirectionImage',
+    'main.DirectionVideo',
+    'main.TimeTable',
+    'main.SiteSettings',
+    'news.Category',
+)
+
+# Submitted by visitors, never part of a template.
+NOT_CLONED_MODELS = {'main.contactform', 'main.emailsubscription'}
+
+# Created for every new school (apps.main.services.provisioning): the only
+# rows `replace` deletes. Anything else of the target is kept.
+REPLACEABLE_MODELS = {'main.menu', 'main.timetable', 'main.sitesettings'}
+
+
+class CloneError(Exception):
+    pass
+
+
+def resolve_models(labels=None):
+    """
+    Tenant models to clone, in dependency order. M2M through tables of the
+    chosen models are added automatically. `None` means every tenant model.
+    """
+    if labels is None:
+        chosen = {m for m in tenancy.tenant_models() if m._meta.label_lower not in NOT_CLONED_MODELS}
+    else:
+        chosen = {apps.get_model(label) for label in labels}
+
+    for model in tenancy.tenant_models():
+        if model._meta.auto_created and model._meta.auto_created in chosen:
+            chosen.add(model)
+
+    for model in chosen:
+        if not tenancy.is_tenant_model(model):
+            raise CloneError(f'{model._meta.label} is not tenant-scoped')
+        for field in tenancy.relation_fields(model):
+            related = field.related_model
+            if not field.null and tenancy.is_tenant_model(related) and related not in chosen:
+                raise CloneError(f'{model._meta.label} needs {related._meta.label} to be cloned as well')
+    return [model for model in tenancy.tenant_models() if model in chosen]
+
+
+def _remap(obj, fields, target, pk_map):
+    """Point `obj`'s foreign keys at the cloned rows. False if a required parent is missing."""
+    for field in fields:
+        old = getattr(obj, field.attname)
+        if old is None:
+            continue
+        related = field.related_model
+        if related is School:
+            setattr(obj, field.attname, target.pk)
+        elif tenancy.is_tenant_model(related):
+            new = pk_map.get(related, {}).get(old)
+            if new is None and not field.null:
+                return False
+            setattr(obj, field.attname, new)
+    return True
+
+
+def _write(model, objs, using):
+    if model._meta.parents:
+        # Multi-table children: the parent row already exists, pk is the parent link.
+        tenancy.insert_rows(model, objs, using)
+    else:
+        for obj in objs:
+            obj.pk = None
+            obj._state.adding = True
+        model._base_manager.using(using).bulk_create(objs)
+
+
+def school_unique_keys(model):
+    """Field attnames of `model`'s unique constraints that include its school."""
+    school_field = next((f for f in tenancy.relation_fields(model) if f.related_model is School), None)
+    if school_field is None:
+        return []
+    sets = [c.fields for c in model._meta.total_unique_constraints] + list(model._meta.unique_together)
+    return [
+        tuple(model._meta.get_field(name).attname for name in fields)
+        for fields in sets if school_field.name in fields
+    ]
+
+
+def existing_rows(model, target, target_db):
+    """{(unique key attnames, values): pk} of the target's rows, to reuse instead of duplicating."""
+    existing = {}
+    for attnames in school_unique_keys(model):
+        for row in tenancy.school_queryset(model, target.pk, target_db).values('pk', *attnames):
+            existing[(attnames, tuple(row[name] for name in attnames))] = row['pk']
+    return existing
+
+
+def clone_model(model, source, target, pk_map, source_db, target_db):
+    is_mptt = hasattr(model, '_mptt_meta')
+    order = ('tree_id', 'lft') if is_mptt else ('pk',)
+    rows = list(tenancy.school_queryset(model, source.pk, source_db).order_by(*order))
+    fields = tenancy.relation_fields(model)
+    self_fields = [f for f in fields if f.related_model is model]
+
+    if is_mptt:
+        attr = model._mptt_meta.tree_id_attr
+        last = model._base_manager.using(target_db).order_by(f'-{attr}').values_list(attr, flat=True).first() or 0
+        tree_ids = {}
+        for obj in rows:
+            old = getattr(obj, attr)
+            tree_ids.setdefault(old, last + len(tree_ids) + 1)
+            setattr(obj, attr, tree_ids[old])
+
+    mapping = pk_map.setdefault(model, {})
+    existing = existing_rows(model, target, target_db)
+    keys = school_unique_keys(model)
+    copied = 0
+    pending = rows
+    while pending:
+        # Rows pointing to rows of the same table go in waves, parents first.
+        ready, waiting = [], []
+        for obj in pending:
+            parents = (getattr(obj, f.attname) for f in self_fields)
+            (ready if all(p is None or p in mapping for p in parents) else waiting).append(obj)
+        if not ready:
+            break
+        pending = waiting
+        batch, old_pks = [], []
+        for obj in ready:
+            old_pk = obj.pk
+            if not _remap(obj, fields, target, pk_map):
+                continue
+            # The target has this row already (same slug): children go under it.
+            match = next((
+                existing[key] for key in ((names, tuple(getattr(obj, n) for n in names)) for names in keys)
+                if key in existing
+            ), None)
+            if match is not None:
+                mapping[old_pk] = match
+                continue
+            batch.append(obj)
+            old_pks.append(old_pk)
+        _write(model, batch, target_db)
+        copied += len(batch)
+        mapping.update(zip(old_pks, (obj.pk for obj in batch)))
+    return copied
+
+
+def replaced_models(models):
+    """Models of `models` whose target rows `replace` deletes, with their M2M through tables."""
+    replaced = [m for m in models if m._meta.label_lower in REPLACEABLE_MODELS]
+    return [
+        m for m in models
+        if m in replaced or (m._meta.auto_created and m._meta.auto_created in replaced)
+    ]
+
+
+def check_dependents(models, target, target_db):
+    """Refuse to delete target rows that rows of other tables still point to."""
+    for model in models:
+        rows = tenancy.school_queryset(model, target.pk, target_db)
+        for relation in model._meta.related_objects:
+            related = relation.related_model
+            if related in models:
+                continue
+            if related._base_manager.using(target_db).filter(**{f'{relation.field.name}__in': rows}).exists():
+                raise CloneError(f"{related._meta.label} rows of {target} refer to its {model._meta.label} rows")
+
+
+def clone_school(source, target, labels=DEFAULT_CLONE_MODELS, replace=False):
+    """
+    Clone `labels` models of `source` into `target`.
+
+    With `replace` the target's provisioned defaults among them (menu, time
+    tables, site texts, see REPLACEABLE_MODELS) are deleted first; without
+    it those are skipped when the target has them already, which every
+    provisioned school does. Other rows of the target are never deleted.
+    Returns [(model label, rows, seconds)], rows being None for a skipped model.
+    """
+    if source.pk == target.pk:
+        raise CloneError('Source and target school are the same')
+
+    models = resolve_models(labels)
+    source_db, target_db = shard_for_school(source.pk), shard_for_school(target.pk)
+    replaced = replaced_models(models)
+    pk_map, timings = {}, []
+
+    try:
+        with transaction.atomic(using=target_db):
+            if replace:
+                check_dependents(replaced, target, target_db)
+                for model in reversed(replaced):
+                    tenancy.school_queryset(model, target.pk, target_db).delete()
+            for model in models:
+                started = time.monotonic()
+                if not replace and model in replaced and tenancy.school_queryset(model, target.pk, target_db).exists():
+                    timings.append((model._meta.label, None, 0.0))
+                    continue
+                copied = clone_model(model, source, target, pk_map, source_db, target_db)
+                timings.append((model._meta.label, copied, time.monotonic() - started))
+    except IntegrityError as e:
+        # E.g. a document category with the same slug exists in the target.
+        raise CloneError(str(e))
+
+    for model in models:
+        bump_generation(model)
+    return timings
@@ -0,0 +1,159 @@
+"""
+Deleting a school in the background.
+
+The admin only deactivates the school and queues a SchoolDeletionJob. The
+Celery task then deletes the school's rows model by model (children
+first) in chunks of SCHOOL_DELETE_CHUNK_SIZE, each chunk in its own short
+transaction, and removes the chunk's media files from storage in a thread
+pool. A task run stops after SCHOOL_DELETE_TIME_BUDGET seconds and queues
+the next run, so the job also survives worker restarts.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.utils import timezone
+from apps.common.cache import bump_generation, update_rows
+from apps.common.db_routers import forget_school_shard, shard_for_school
+from apps.common.files import discard, referenced_files
+from apps.main.models import School, SchoolDeletionJob
+from apps.main.services import tenancy
+
+
+def start_school_deletion(school, user=None):
+    """Deactivate `school` right away and queue the deletion of its data."""
+    from apps.common.tasks import enqueue_on_commit
+    from apps.main.tasks import delete_school
+
+    # Cached domain lookups must see it right away.
+    update_rows(School.objects.filter(pk=school.pk), is_active=False)
+    job = SchoolDeletionJob.objects.create(
+        school=school,
+        school_name=str(school),
+        created_by=user if user and user.is_authenticated else None,
+    )
+    enqueue_on_commit(delete_school, job.pk)
+    return job
+
+
+def count_school_rows(school_id):
+    """{model: rows} of everything that belongs to the school."""
+    using = shard_for_school(school_id)
+    counts = {}
+    for model in tenancy.tenant_models():
+        rows = tenancy.school_queryset(model, school_id, using).count()
+        if rows:
+            counts[model] = rows
+    return counts
+
+
+def _file_fields(model):
+    return [f.attname for f in model._meta.local_concrete_fields if isinstance(f, models.FileField)]
+
+
+def delete_files(names):
+    """
+    Release the files of rows deleted without signals and remove the ones
+    nothing points to anymore (with their WebP/AVIF siblings and resized
+    variants), in parallel. Returns the number removed.
+    """
+    from apps.common.derivatives import delete_derivatives
+    from apps.common.images import sibling_names
+    from apps.common.models import ImageMetadata, MediaReference
+
+    names = [name for name in names if name]
+    if hasattr(default_storage, 'release'):
+        # What post_delete would have done for each row (BlobIndex refcounts).
+        default_storage.release(names)
+    names = set(names)
+    names -= referenced_files(names)
+    names -= set(MediaReference.objects.filter(name__in=names).values_list('name', flat=True))
+    if not names:
+        return 0
+
+    def remove(name):
+        try:
+            delete_derivatives(name, names)
+            discard(name)
+            for sibling in sibling_names(name).values():
+                if default_storage.exists(sibling):
+                    discard(sibling)
+            return 1
+        except Exception:
+            return 0
+
+    with ThreadPoolExecutor(max_workers=settings.SCHOOL_DELETE_FILE_WORKERS) as pool:
+        removed = sum(pool.map(remove, names))
+    ImageMetadata.objects.filter(name__in=names).delete()
+    return removed
+
+
+def detach_self_references(model, school_id, using):
+    """Clear links between rows of the same table (Menu.parent) so any chunk can go first."""
+    for field in tenancy.relation_fields(model):
+        if field.related_model is model and field.null:
+            tenancy.school_queryset(model, school_id, using).filter(
+                **{f'{field.name}__isnull': False}
+            ).update(**{field.attname: None})
+
+
+def delete_chunk(model, school_id, using, chunk_size):
+    """Delete up to `chunk_size` rows of `model`; returns (rows, file names)."""
+    queryset = tenancy.school_queryset(model, school_id, using)
+    file_fields = _file_fields(model)
+    with transaction.atomic(using=using):
+        pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return 0, []
+        chunk = model._base_manager.using(using).filter(pk__in=pks)
+        names = []
+        if file_fields:
+            for row in chunk.values_list(*file_fields):
+                names.extend(row)
+        # No cascades and no signals: children are already gone and files are handled here.
+        chunk._raw_delete(using)
+    return len(pks), names
+
+
+def run_deletion_job(job, time_budget=None):
+    """
+    Work on `job` for at most `time_budget` seconds.
+    Returns True when the school is completely deleted.
+    """
+    if time_budget is None:
+        time_budget = settings.SCHOOL_DELETE_TIME_BUDGET
+    deadline = time.monotonic() + time_budget
+    school_id = job.school_id
+    using = shard_for_school(school_id)
+
+    if job.status == 'pending':
+        job.status = 'running'
+        job.total_rows = sum(count_school_rows(school_id).values())
+        job.save(update_fields=['status', 'total_rows'])
+
+    for model in reversed(tenancy.tenant_models()):
+        detach_self_references(model, school_id, using)
+        while True:
+            if time.monotonic() > deadline:
+                return False
+            rows, names = delete_chunk(model, school_id, using, settings.SCHOOL_DELETE_CHUNK_SIZE)
+            if not rows:
+                break
+            job.deleted_rows += rows
+            job.deleted_files += delete_files(names)
+            job.current_model = model._meta.label
+            job.save(update_fields=['deleted_rows', 'deleted_files', 'current_model'])
+            bump_generation(model)
+
+    # Only global rows are left (users, shard mapping); a regular delete is cheap now.
+    if using != DEFAULT_DB_ALIAS:
+        School._base_manager.using(using).filter(pk=school_id)._raw_delete(using)
+    School.objects.filter(pk=school_id).delete()
+    forget_school_shard(school_id)
+
+    job.status = 'done'
+    job.current_model = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'current_model', 'finished_at'])
+    return True
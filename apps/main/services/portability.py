@@ -0,0 +1,290 @@
+"""
+Export and import of a single school as JSON Lines.
+
+An export directory holds:
+
+* `data.jsonl`  - one JSON object per line: the school, the global rows
+  it refers to (Direction, Subject...) and then every tenant row, model by
+  model in dependency order;
+* `media.jsonl` - manifest of the referenced media files (name, size,
+  sha256);
+* `media/`      - the files themselves (only with `with_media`).
+
+Rows are streamed with `.iterator()` on export and inserted with
+`bulk_create` in batches on import, so memory does not grow with the
+number of rows (only the old -> new id maps are kept). Imported rows get
+new primary keys; global rows are matched by slug and created if missing.
+"""
+import hashlib
+import json
+import os
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from apps.common.cache import bump_generation
+from apps.common.db_routers import shard_for_school
+from apps.main.models import School
+from apps.main.services import tenancy
+
+
+FORMAT_VERSION = 1
+DATA_FILE = 'data.jsonl'
+MANIFEST_FILE = 'media.jsonl'
+MEDIA_DIR = 'media'
+
+
+class PortabilityError(Exception):
+    pass
+
+
+def _fields(model):
+    return [f for f in model._meta.local_concrete_fields if not (f.primary_key and not f.is_relation)]
+
+
+def serialize_row(kind, obj):
+    values = {}
+    for field in _fields(obj.__class__):
+        value = getattr(obj, field.attname)
+        if isinstance(field, models.FileField):
+            value = value.name or None
+        values[field.attname] = value
+    return json.dumps(
+        {'type': kind, 'model': obj._meta.label_lower, 'pk': obj.pk, 'fields': values},
+        cls=DjangoJSONEncoder, ensure_ascii=False,
+    )
+
+
+def _file_names(obj):
+    for field in obj._meta.local_concrete_fields:
+        if isinstance(field, models.FileField):
+            name = getattr(obj, field.attname).name
+            if name:
+                yield name
+
+
+def media_entry(name, copy_to=None):
+    """Manifest entry of a stored file (hashed in one streaming pass), None if missing."""
+    if not default_storage.exists(name):
+        return None
+    digest, size = hashlib.sha256(), 0
+    target = None
+    if copy_to:
+        path = os.path.join(copy_to, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        target = open(path, 'wb')
+    try:
+        with default_storage.open(name, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+                size += len(chunk)
+                if target:
+                    target.write(chunk)
+    finally:
+        if target:
+            target.close()
+    return {'name': name, 'size': size, 'sha256': digest.hexdigest()}
+
+
+def export_school(school, directory, with_media=False):
+    """Write `school` to `directory`; returns {model label: rows}."""
+    os.makedirs(directory, exist_ok=True)
+    using = shard_for_school(school.pk)
+    media_dir = os.path.join(directory, MEDIA_DIR) if with_media else None
+    seen_files, stats = set(), {}
+
+    with open(os.path.join(directory, DATA_FILE), 'w', encoding='utf-8') as data, \
+            open(os.path.join(directory, MANIFEST_FILE), 'w', encoding='utf-8') as manifest:
+
+        def write(kind, obj):
+            data.write(serialize_row(kind, obj) + '\n')
+            stats[obj._meta.label] = stats.get(obj._meta.label, 0) + 1
+            for name in _file_names(obj):
+                if name not in seen_files:
+                    seen_files.add(name)
+                    entry = media_entry(name, media_dir)
+                    if entry:
+                        manifest.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+        data.write(json.dumps({'type': 'header', 'version': FORMAT_VERSION}) + '\n')
+        write('school', school)
+
+        for model, references in tenancy.global_dependencies().items():
+            pks = set()
+            for tenant_model, field in references:
+                pks.update(
+                    tenancy.school_queryset(tenant_model, school.pk, using)
+                    .exclude(**{f'{field.attname}__isnull': True})
+                    .values_list(field.attname, flat=True)
+                    .distinct()
+                )
+            for obj in model._base_manager.filter(pk__in=pks).order_by('pk').iterator():
+                write('global', obj)
+
+        for model in tenancy.tenant_models():
+            order = ('tree_id', 'lft') if hasattr(model, '_mptt_meta') else ('pk',)
+            queryset = tenancy.school_queryset(model, school.pk, using).order_by(*order)
+            for obj in queryset.iterator(chunk_size=2000):
+                write('row', obj)
+    return stats
+
+
+def import_media(directory, renames=None):
+    """
+    Copy manifest files missing in storage; returns (copied, skipped, missing).
+    A stored file of the same name is only reused when its sha256 matches
+    the manifest; another school's different file is never shared, the
+    exported one is stored under a new name. Files the storage keeps under
+    another name are recorded in `renames` as {exported name: stored name}.
+    """
+    from apps.common.images import file_hash
+
+    copied = skipped = missing = 0
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return copied, skipped, missing
+
+    with open(manifest_path, encoding='utf-8') as manifest:
+        for line in manifest:
+            entry = json.loads(line)
+            name = entry['name']
+            if default_storage.exists(name) and entry.get('sha256') in (None, file_hash(name)):
+                skipped += 1
+                continue
+            path = os.path.join(directory, MEDIA_DIR, name)
+            if not os.path.exists(path):
+                missing += 1
+                continue
+            with open(path, 'rb') as f:
+                stored = default_storage.save(name, File(f))
+            if stored != name and renames is not None:
+                renames[name] = stored
+            copied += 1
+    return copied, skipped, missing
+
+
+class RowImporter:
+    """Collects rows of one model and writes them with `bulk_create`, remapping ids."""
+
+    def __init__(self, school, batch_size, renames=None):
+        self.school = school
+        self.batch_size = batch_size
+        self.renames = renames or {}
+        self.pk_maps = {School: {}}
+        self.tree_maps = {}
+        self.model = None
+        self.pending = []
+        self.stats = {}
+
+    def build(self, model, fields):
+        values = {}
+        for field in _fields(model):
+            if field.attname in fields:
+                value = fields[field.attname]
+                values[field.attname] = value if field.is_relation or value is None else field.to_python(value)
+                if isinstance(field, models.FileField) and value in self.renames:
+                    values[field.attname] = self.renames[value]
+        return model(**values)
+
+    def add_global(self, model, record):
+        """Map a global row to the existing row with the same slug or create it."""
+        lookup = {'slug': record['fields']['slug']} if 'slug' in record['fields'] else {'pk': record['pk']}
+        pk = model._base_manager.filter(**lookup).values_list('pk', flat=True).first()
+        if pk is None:
+            obj = self.build(model, record['fields'])
+            model._base_manager.bulk_create([obj])
+            pk = obj.pk
+        self.pk_maps.setdefault(model, {})[record['pk']] = pk
+
+    def add(self, model, record):
+        if model is not self.model:
+            self.flush()
+            self.model = model
+        obj = self.build(model, record['fields'])
+        mapping = self.pk_maps.setdefault(model, {})
+
+        for field in tenancy.relation_fields(model):
+            old = getattr(obj, field.attname)
+            if old is None:
+                continue
+            related = field.related_model
+            if related is School:
+                setattr(obj, field.attname, self.school.pk)
+                continue
+            if related is model and old not in mapping:
+                # Parent is in the current batch: write it first.
+                self.flush()
+                self.model = model
+            new = self.pk_maps.get(related, {}).get(old, None if tenancy.is_tenant_model(related) else old)
+            if new is None and not field.null:
+                return
+            setattr(obj, field.attname, new)
+
+        if hasattr(model, '_mptt_meta'):
+            attr = model._mptt_meta.tree_id_attr
+            tree_map = self.tree_maps.get(model)
+            if tree_map is None:
+                last = model._base_manager.order_by(f'-{attr}').values_list(attr, flat=True).first() or 0
+                tree_map = self.tree_maps[model] = {'next': last + 1}
+            old_tree = getattr(obj, attr)
+            if old_tree not in tree_map:
+                tree_map[old_tree] = tree_map['next']
+                tree_map['next'] += 1
+            setattr(obj, attr, tree_map[old_tree])
+
+        self.pending.append((record['pk'], obj))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        model = self.model
+        objs = [obj for _, obj in self.pending]
+        if model._meta.parents:
+            tenancy.insert_rows(model, objs, using=model._base_manager.db)
+        else:
+            model._base_manager.bulk_create(objs)
+        self.pk_maps.setdefault(model, {}).update((old, obj.pk) for old, obj in self.pending)
+        self.stats[model._meta.label] = self.stats.get(model._meta.label, 0) + len(objs)
+        self.pending = []
+
+
+def import_school(directory, domain=None, slug=None, batch_size=500):
+    """
+    Create a new school from an export directory. Returns (school, stats).
+    Rows are written in one transaction; media files are copied first.
+    """
+    renames = {}
+    media = import_media(directory, renames)
+
+    with open(os.path.join(directory, DATA_FILE), encoding='utf-8') as data, transaction.atomic():
+        header = json.loads(next(data))
+        if header.get('type') != 'header' or header.get('version') != FORMAT_VERSION:
+            raise PortabilityError('Unsupported export format')
+
+        record = json.loads(next(data))
+        importer = RowImporter(None, batch_size, renames)
+        school = importer.build(School, record['fields'])
+        school.domain = domain or school.domain
+        school.slug = slug or school.slug
+        if School.objects.filter(domain=school.domain).exists() or School.objects.filter(slug=school.slug).exists():
+            raise PortabilityError(f'School with domain "{school.domain}" or slug "{school.slug}" already exists')
+        School.objects.bulk_create([school])
+        importer.school = school
+
+        for line in data:
+            record = json.loads(line)
+            model = apps.get_model(record['model'])
+            if record['type'] == 'global':
+                importer.add_global(model, record)
+            else:
+                importer.add(model, record)
+        importer.flush()
+
+    # bulk_create sends no post_save: a cached "no such domain" must go too.
+    bump_generation(School)
+    for label in importer.stats:
+        bump_generation(apps.get_model(label))
+    return school, {'rows': importer.stats, 'media': dict(zip(('copied', 'skipped', 'missing'), media))}
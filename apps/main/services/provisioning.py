@@ -0,0 +1,192 @@
+"""
+Default content of a new school: menu tree, timetables and site texts.
+
+Everything is created with `bulk_create` for any number of schools at
+once: a handful of INSERTs per batch instead of ~35 saves per school.
+"""
+from django.db import transaction
+from apps.common.cache import bump_generation
+from apps.main.models import Menu, SiteSettings, TimeTable
+
+
+DEFAULT_COUNT_FIELDS = ('capacity', 'student_count', 'teacher_count', 'direction_count', 'class_count')
+
+DEFAULT_MENU = [
+    {
+        "title": "Maktab",
+        "url": "#",
+        "children": [
+            {"title": "Maktab haqida", "url": "#"},
+            {"title": "Rahbariyat va o'qituvchilar xodimlar", "url": "#"},
+            {"title": "Bo'sh ish o'rinlari", "url": "#"},
+        ]
+    },
+    {
+        "title": "Faoliyat",
+        "url": "#",
+        "children": [
+            {"title": "Yo'nalishlar", "url": "#"},
+            {"title": "Tadbirlar", "url": "#"},
+            {"title": "Tanlov va festivallar", "url": "#"},
+            {"title": "Maktabimiz faxrlariz", "url": "#"},
+            {"title": "Mahorat darslari", "url": "#"},
+        ]
+    },
+    {
+        "title": "Ta'lim jarayoni",
+        "url": "#",
+        "children": [
+            {"title": "O'quv reja va dastur", "url": "#"},
+            {"title": "Ta'limga oid ma'lumotlar", "url": "#"},
+            {"title": "Resurslar (🔗 YouTube, PDF darsliklar)", "url": "#"},
+        ]
+    },
+    {
+        "title": "Matbuot",
+        "url": "#",
+        "children": [
+            {"title": "Yangiliklar va e'lonlar", "url": "#"},
+            {"title": "Media (rasm va videolar)", "url": "#"},
+        ]
+    },
+    {
+        "title": "Hujjatlar",
+        "url": "#",
+        "children": [
+            {"title": "Rasmiy hujjatlar", "url": "#"},
+            {"title": "Ochiq ma'lumotlar", "url": "#"},
+        ]
+    },
+    {
+        "title": "Tijoriy bo'lim",
+        "url": "#",
+        "children": [
+            {"title": "Madaniy xizmatlar", "url": "#"},
+            {"title": "Amaliy san'at", "url": "#"},
+            {"title": "Tasviriy san'at", "url": "#"},
+        ]
+    },
+    {
+        "title": "Bog'lanish",
+        "url": "#",
+        "children": []
+    }
+]
+
+DEFAULT_TIMETABLES = [
+    {'uz': '1-sinflar', 'ru': '1-классы', 'en': '1-classes'},
+    {'uz': '2-sinflar', 'ru': '2-классы', 'en': '2-classes'},
+    {'uz': '3-sinflar', 'ru': '3-классы', 'en': '3-classes'},
+    {'uz': '4-sinflar', 'ru': '4-классы', 'en': '4-classes'},
+    {'uz': '5-sinflar', 'ru': '5-классы', 'en': '5-classes'},
+    {'uz': '6-sinflar', 'ru': '6-классы', 'en': '6-classes'},
+    {'uz': '7-sinflar', 'ru': '7-классы', 'en': '7-classes'},
+    {'uz': '8-sinflar', 'ru': '8-классы', 'en': '8-classes'},
+    {'uz': '9-sinflar', 'ru': '9-классы', 'en': '9-classes'},
+]
+
+DEFAULT_SITE_SETTINGS = {
+    'school_life': "Maktabimiz hayoti haqida ma'lumot",
+    'directions': "Bizning yo'nalishlar haqida ma'lumot",
+    'numbers': "Maktab raqamlari haqida ma'lumot",
+    'teachers': "O'qituvchilarimiz haqida ma'lumot",
+    'honors': "Maktabimiz faxrlari haqida ma'lumot",
+    'news': "Yangiliklar bo'limi haqida ma'lumot",
+    'gallery': "Galereya bo'limi haqida ma'lumot",
+    'contact': "Bog'lanish bo'limi haqida ma'lumot",
+    'comments': "Izohlar bo'limi haqida ma'lumot",
+    'faqs': "Ko'p beriladigan savollar haqida ma'lumot",
+    'leaders': "Rahbariyat bo'limi haqida ma'lumot",
+    'vacancies': "Vakansiyalar bo'limi haqida ma'lumot",
+    'documents': "Hujjatlar bo'limi haqida ma'lumot",
+    'timetables': "O'quv reja bo'limi haqida ma'lumot",
+    'edu_infos': "Ta'lim ma'lumotlari bo'limi haqida ma'lumot",
+    'events': "Tadbirlar bo'limi haqida ma'lumot",
+    'resources': "Resurslar bo'limi haqida ma'lumot",
+    'culture_services': "Madaniy xizmatlar haqida ma'lumot",
+    'culture_arts': "Madaniy san'at haqida ma'lumot",
+    'fine_arts': "Tasviriy san'at haqida ma'lumot",
+}
+
+
+def apply_default_counts(school):
+    """Zero the counters a new school was created without."""
+    for field in DEFAULT_COUNT_FIELDS:
+        if not getattr(school, field):
+            setattr(school, field, 0)
+
+
+def _next_tree_id():
+    # Lock the current last tree so concurrent provisioning can not pick the same ids.
+    last = Menu.objects.select_for_update().order_by('-tree_id').values_list('tree_id', flat=True).first()
+    return (last or 0) + 1
+
+
+def create_menus(schools):
+    """
+    Default menu tree of every school in two INSERTs (roots, then children).
+
+    Each root gets a tree of its own, so the nested set values are known
+    upfront; they are the same `Menu.objects.create()` would produce one
+    insert at a time, and no `rebuild()` is needed afterwards.
+    """
+    tree_id = _next_tree_id()
+    roots, children = [], []
+    for school in schools:
+        for item in DEFAULT_MENU:
+            root = Menu(school=school, title=item["title"], url=item["url"], parent=None,
+                        tree_id=tree_id, level=0, lft=1, rght=2 * len(item["children"]) + 2)
+            roots.append(root)
+            for index, child in enumerate(item["children"]):
+                children.append((root, Menu(
+                    school=school, title=child["title"], url=child["url"],
+                    tree_id=tree_id, level=1, lft=2 * index + 2, rght=2 * index + 3,
+                )))
+            tree_id += 1
+
+    Menu.objects.bulk_create(roots)
+    if any(root.pk is None for root in roots):
+        # Backend can not return ids from a bulk insert: tree ids are unique per root.
+        ids = dict(Menu.objects.filter(tree_id__in=[r.tree_id for r in roots], level=0).values_list('tree_id', 'id'))
+        for root in roots:
+            root.pk = ids[root.tree_id]
+    for root, child in children:
+        child.parent = root
+    Menu.objects.bulk_create([child for _, child in children])
+    return len(roots) + len(children)
+
+
+def create_timetables(schools):
+    return len(TimeTable.objects.bulk_create([
+        TimeTable(
+            school=school,
+            title=item['uz'],
+            title_uz=item['uz'],
+            title_ru=item['ru'],
+            title_en=item['en'],
+        )
+        for school in schools
+        for item in DEFAULT_TIMETABLES
+    ]))
+
+
+def create_site_settings(schools):
+    return len(SiteSettings.objects.bulk_create([
+        SiteSettings(school=school, **DEFAULT_SITE_SETTINGS) for school in schools
+    ]))
+
+
+def create_defaults(schools):
+    """Menu, timetables and site texts for newly created `schools`."""
+    schools = list(schools)
+    if not schools:
+        return {}
+    with transaction.atomic():
+        created = {
+            Menu: create_menus(schools),
+            TimeTable: create_timetables(schools),
+            SiteSettings: create_site_settings(schools),
+        }
+    for model in created:
+        bump_generation(model)
+    return {model._meta.label: count for model, count in created.items()}
@@ -0,0 +1,137 @@
+"""
+Cached public sections of a school site.
+
+The school lookup by domain (done by SubdomainMiddleware on every request)
+and the responses every page of the frontend loads - school info, menu
+tree, site settings - are cached per school and language. Keys embed the
+data generation of the models they read (apps.common.cache), so any change
+to those models invalidates them.
+
+`warm_schools()` fills the caches of every active school after a deploy or
+a cache flush, so the first visitors don't pay for the cold path.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import translation
+from apps.common.cache import get_generation
+from apps.common.db_routers import reset_current_school, set_current_school
+from apps.main.models import Menu, School, SiteSettings
+from apps.main.serializers.menu import MenuSerializer
+from apps.main.serializers.school import SchoolSerializer
+from apps.main.serializers.site_settings import SiteSettingsSerializer
+from apps.main.services.provisioning import DEFAULT_SITE_SETTINGS
+
+
+def school_for_domain(domain):
+    """The School with this domain (active or not), None if there is none."""
+    key = f'school:{domain}:{get_generation(School)}'
+    school = cache.get(key)
+    if school is None:
+        # False caches "no such school" until a school is added or changed.
+        school = School.objects.filter(domain=domain).first() or False
+        cache.set(key, school, settings.TENANT_CACHE_TIMEOUT)
+    return school or None
+
+
+def school_data(school):
+    return SchoolSerializer(school).data
+
+
+def menu_data(school):
+    queryset = (
+        Menu.objects.root_nodes()
+        .filter(school=school)
+        .prefetch_related(
+            "children",
+            "children__children",
+            "children__children__children",
+        )
+    )
+    return MenuSerializer(queryset, many=True).data
+
+
+def site_settings_data(school):
+    obj, created = SiteSettings.objects.get_or_create(school=school, defaults=DEFAULT_SITE_SETTINGS)
+    return SiteSettingsSerializer(obj).data
+
+
+# name: (models the section reads, builder)
+SECTIONS = {
+    'school': ((School,), school_data),
+    'menu': ((Menu,), menu_data),
+    'site_settings': ((SiteSettings,), site_settings_data),
+}
+
+
+def section_cache_key(name, school_id, language=None):
+    models = SECTIONS[name][0]
+    generations = '.'.join(str(get_generation(model)) for model in models)
+    return f'section:{name}:{school_id}:{language or translation.get_language()}:{generations}'
+
+
+def cached_section(name, school):
+    """Serialized data of section `name` of `school` in the active language."""
+    key = section_cache_key(name, school.pk)
+    data = cache.get(key)
+    if data is None:
+        data = SECTIONS[name][1](school)
+        cache.set(key, data, settings.TENANT_CACHE_TIMEOUT)
+    return data
+
+
+def warm_school(school, languages=None):
+    """Fill every cached section of `school`; returns the seconds it took."""
+    started = time.monotonic()
+    school_for_domain(school.domain)
+    for language in languages or [code for code, name in settings.LANGUAGES]:
+        with translation.override(language):
+            for name in SECTIONS:
+                cached_section(name, school)
+    return time.monotonic() - started
+
+
+def _warm_school_id(school_id, languages):
+    token = set_current_school(school_id)
+    try:
+        school = School.objects.get(pk=school_id)
+        return school_id, warm_school(school, languages), None
+    except Exception as e:
+        return school_id, None, str(e)
+    finally:
+        reset_current_school(token)
+        # Each pool worker has its own connections; don't leave them open.
+        connections.close_all()
+
+
+def warm_schools(school_ids=None, languages=None, workers=None, processes=False, rate=None):
+    """
+    Warm the caches of `school_ids` (default: every active school) with a
+    pool of `workers` threads, or processes with `processes`. `rate` limits
+    how many schools per second are started (0/None: no limit).
+
+    Returns [(school_id, seconds, error)] in completion order.
+    """
+    if school_ids is None:
+        school_ids = list(School.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True))
+    workers = workers or settings.CACHE_WARM_WORKERS
+    rate = settings.CACHE_WARM_RATE if rate is None else rate
+    interval = 1 / rate if rate else 0
+
+    if processes:
+        # Forked workers must not share the parent's database sockets.
+        connections.close_all()
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+
+    results = []
+    with executor(max_workers=workers) as pool:
+        futures = []
+        for school_id in school_ids:
+            futures.append(pool.submit(_warm_school_id, school_id, languages))
+            if interval:
+                time.sleep(interval)
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
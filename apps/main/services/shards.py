@@ -0,0 +1,137 @@
+"""
+Global rows and primary keys on the tenant shards.
+
+Tenant rows on a shard keep their database-level foreign keys to School,
+Direction, Subject and MusicalInstrument, so every shard holds a copy of
+those global tables. The default database stays the source of truth: a
+saved global row is copied to all shards once its transaction commits
+and a deleted one is removed from them. Bulk paths send no signals
+(`bulk_create`, `.update()`); `move_school_shard` and
+`manage.py sync_shard_globals` copy the whole tables again.
+
+Global rows are only created in the default database and keep its ids on
+the shards. Tenant rows get their ids from the sequences of the database
+they are created in, so each database hands out ids from its own block of
+SHARD_ID_BLOCK_SIZE: `default` from 1, the n-th shard alias (in the order
+of DB_SHARDS) from n * SHARD_ID_BLOCK_SIZE. Moved rows keep their ids and
+never collide with rows created in the target, whichever way they move.
+"""
+import logging
+from functools import partial, update_wrapper
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from apps.common.db_routers import REPLICA_DB_ALIAS
+from apps.main.services import tenancy
+
+
+logger = logging.getLogger(__name__)
+
+
+def shard_aliases():
+    """Database aliases that may hold tenant data, besides `default`."""
+    return [alias for alias in settings.DATABASES if alias not in (DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS)]
+
+
+def global_models():
+    """School and the global models tenant rows point to."""
+    return [tenancy.school_model(), *tenancy.global_dependencies()]
+
+
+def id_block(alias):
+    """[start, end) of the primary keys the database `alias` hands out."""
+    size = settings.SHARD_ID_BLOCK_SIZE
+    if alias == DEFAULT_DB_ALIAS:
+        return 1, size
+    index = shard_aliases().index(alias) + 1
+    return index * size, (index + 1) * size
+
+
+############################################
+# Global rows
+############################################
+
+def copy_globals(model, pks, aliases=None):
+    """Write the default database's rows `pks` of `model` over the shards' copies."""
+    objs = list(model._base_manager.using(DEFAULT_DB_ALIAS).filter(pk__in=pks))
+    if not objs:
+        return
+    for alias in aliases or shard_aliases():
+        tenancy.insert_rows(model, objs, alias, update_conflicts=True)
+
+
+def sync_globals(alias, batch_size=1000):
+    """Copy the global tables to the shard `alias`."""
+    for model in global_models():
+        pks = list(model._base_manager.using(DEFAULT_DB_ALIAS).order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            copy_globals(model, pks[start:start + batch_size], [alias])
+
+
+def remove_globals(model, pks):
+    """
+    Delete the shards' copies of rows deleted in default. A copy still
+    referenced (rows left behind by `move_school_shard --keep-source`)
+    is kept: it only satisfies the foreign keys.
+    """
+    for alias in shard_aliases():
+        try:
+            with transaction.atomic(using=alias):
+                model._base_manager.using(alias).filter(pk__in=pks)._raw_delete(alias)
+        except IntegrityError:
+            logger.warning('%s %s is still referenced in "%s"', model._meta.label, pks, alias)
+
+
+def replicate_on_save(sender, instance, raw=False, using=None, **kwargs):
+    if raw or using != DEFAULT_DB_ALIAS or not shard_aliases():
+        return
+    transaction.on_commit(
+        update_wrapper(partial(copy_globals, sender, [instance.pk]), copy_globals), using=using, robust=True,
+    )
+
+
+def replicate_on_delete(sender, instance, using=None, **kwargs):
+    if using != DEFAULT_DB_ALIAS or not shard_aliases():
+        return
+    transaction.on_commit(
+        update_wrapper(partial(remove_globals, sender, [instance.pk]), remove_globals), using=using, robust=True,
+    )
+
+
+############################################
+# Sequences
+############################################
+
+def reset_sequences(models, alias):
+    """Point the sequences of `models` in `alias` past its highest id within its block."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        # No shards outside PostgreSQL: the usual reset to the highest id.
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        return
+
+    start, end = id_block(alias)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for model in models:
+            pk = model._meta.pk
+            if pk.get_internal_type() not in ('AutoField', 'BigAutoField', 'SmallAutoField'):
+                continue
+            table, column = model._meta.db_table, pk.column
+            cursor.execute(
+                f'SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX({quote(column)}), %s), '
+                f'MAX({quote(column)}) IS NOT NULL) '
+                f'FROM {quote(table)} WHERE {quote(column)} >= %s AND {quote(column)} < %s',
+                [quote(table), column, start, start, end],
+            )
+
+
+def prepare_shard(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate: a migrated shard gets its id block and the global rows."""
+    if using not in shard_aliases():
+        return
+    reset_sequences(tenancy.tenant_models(), using)
+    sync_globals(using)
@@ -0,0 +1,161 @@
+"""
+Which models belong to a school (tenant) and how their rows are reached.
+
+Worked out from the model graph instead of a hand-written list, so new
+models are picked up automatically: a model is tenant-scoped when it has a
+foreign key to `School` or to another tenant-scoped model (this covers
+child tables such as `DirectionImage`, auto-created M2M tables and
+multi-table inheritance children of `Service`). `School` itself, the
+user model and the models in GLOBAL_MODELS stay global.
+"""
+from functools import lru_cache
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.models.constants import OnConflict
+
+
+# Point at School but are bookkeeping kept in the default database.
+GLOBAL_MODELS = {'main.schoolshard', 'main.schooldeletionjob', 'common.mediareference', 'media.mediaimportjob'}
+
+
+def school_model():
+    return apps.get_model('main', 'School')
+
+
+def relation_fields(model):
+    return [
+        field for field in model._meta.local_concrete_fields
+        if field.is_relation and field.related_model is not None
+    ]
+
+
+@lru_cache(maxsize=None)
+def tenant_models():
+    """Tenant-scoped models ordered so that referenced rows come first."""
+    School = school_model()
+    global_labels = GLOBAL_MODELS | {settings.AUTH_USER_MODEL.lower()}
+    candidates = [
+        model for model in apps.get_models(include_auto_created=True)
+        if model is not School and model._meta.label_lower not in global_labels and not model._meta.proxy
+    ]
+
+    tenant = set()
+    changed = True
+    while changed:
+        changed = False
+        for model in candidates:
+            if model in tenant:
+                continue
+            if any(f.related_model is School or f.related_model in tenant for f in relation_fields(model)):
+                tenant.add(model)
+                changed = True
+
+    ordered, remaining = [], set(tenant)
+    while remaining:
+        ready = sorted(
+            (m for m in remaining if not any(
+                f.related_model in remaining and f.related_model is not m for f in relation_fields(m)
+            )),
+            key=lambda m: m._meta.label,
+        )
+        if not ready:
+            raise ImproperlyConfigured(f'Circular tenant model dependencies: {sorted(m._meta.label for m in remaining)}')
+        ordered.extend(ready)
+        remaining.difference_update(ready)
+    return tuple(ordered)
+
+
+@lru_cache(maxsize=None)
+def tenant_model_set():
+    return frozenset(tenant_models())
+
+
+def is_tenant_model(model):
+    return model in tenant_model_set()
+
+
+@lru_cache(maxsize=None)
+def school_lookup(model):
+    """
+    ORM lookup from `model` to its school id, e.g. `school` for News,
+    `direction__school` for DirectionImage.
+    """
+    School = school_model()
+    fields = relation_fields(model)
+    for field in fields:
+        if field.related_model is School:
+            return field.name
+    for field in fields:
+        if field.related_model is not model and is_tenant_model(field.related_model):
+            return f'{field.name}__{school_lookup(field.related_model)}'
+    raise ImproperlyConfigured(f'{model._meta.label} is not tenant-scoped')
+
+
+def school_queryset(model, school_id, using):
+    """All rows of `model` that belong to the school."""
+    return model._base_manager.using(using).filter(**{school_lookup(model): school_id})
+
+
+def school_id_of(instance):
+    """
+    School id of a tenant-scoped instance, following already loaded
+    parents only (never queries). None when it can not be told.
+    """
+    School = school_model()
+    if isinstance(instance, School):
+        return instance.pk
+    school_id = getattr(instance, 'school_id', None)
+    if school_id is not None:
+        return school_id
+    for field in relation_fields(instance.__class__):
+        if field.related_model is not School and field.is_cached(instance):
+            parent = field.get_cached_value(instance)
+            if parent is not None and is_tenant_model(parent.__class__):
+                return school_id_of(parent)
+    return None
+
+
+@lru_cache(maxsize=None)
+def global_dependencies():
+    """
+    {global model: [(tenant model, fk field)]} for global rows (other than
+    School) that tenant rows point to, e.g. Direction and Subject.
+    """
+    School = school_model()
+    dependencies = {}
+    for model in tenant_models():
+        for field in relation_fields(model):
+            related = field.related_model
+            if related is School or is_tenant_model(related):
+                continue
+            dependencies.setdefault(related, []).append((model, field))
+    return dependencies
+
+
+def insert_rows(model, objs, using, ignore_conflicts=False, update_conflicts=False):
+    """
+    INSERT `objs` as they are: primary keys and auto_now timestamps are
+    kept and no signals are sent (unlike `bulk_create`). With
+    `update_conflicts` a row whose primary key exists is overwritten.
+    """
+    fields = model._meta.local_concrete_fields
+    on_conflict, update_fields, unique_fields = None, None, None
+    if update_conflicts:
+        on_conflict = OnConflict.UPDATE
+        update_fields = [field for field in fields if not field.primary_key]
+        unique_fields = [model._meta.pk]
+    elif ignore_conflicts:
+        on_conflict = OnConflict.IGNORE
+    batch_size = max(connections[using].ops.bulk_batch_size(fields, objs), 1)
+    for start in range(0, len(objs), batch_size):
+        model._base_manager.using(using)._insert(
+            objs[start:start + batch_size],
+            fields=fields,
+            raw=True,
+            using=using,
+            on_conflict=on_conflict,
+            update_fields=update_fields,
+            unique_fields=unique_fields,
+        )
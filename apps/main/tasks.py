@@ -2,8 +2,10 @@ from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.utils.html import strip_tags
-from .models import EmailSubscription, News
+from apps.news.models import News
+from .models import EmailSubscription, SchoolDeletionJob
 
 
 @shared_task
@@ -96,4 +98,46 @@ def test_email_task():
     """
     Simple test task to verify Celery is working
     """
-    return "Celery is working correctly!" 
\ No newline at end of file
+    return "Celery is working correctly!" 
+
+
+# acks_late + reject_on_worker_lost: a run whose worker dies is delivered
+# again instead of leaving the job 'running' forever. A run only deletes
+# what is left, so running it twice is harmless.
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def delete_school(job_id):
+    """
+    Delete a school's data in chunks (see apps.main.services.deletion).
+    Queues itself again until the school is gone.
+    """
+    from apps.main.services.deletion import run_deletion_job
+
+    job = SchoolDeletionJob.objects.filter(pk=job_id).first()
+    if job is None or job.status in ('done', 'failed'):
+        return
+    if job.school_id is None:
+        SchoolDeletionJob.objects.filter(pk=job_id).update(status='done', finished_at=timezone.now())
+        return
+
+    try:
+        finished = run_deletion_job(job)
+    except Exception as e:
+        SchoolDeletionJob.objects.filter(pk=job_id).update(status='failed', error=str(e))
+        raise
+
+    if not finished:
+        delete_school.delay(job_id)
+    return f"School deletion job {job_id}: {job.deleted_rows}/{job.total_rows} rows"
+
+
+@shared_task
+def warm_caches():
+    """
+    Fill the cached school lookups and public sections of every active
+    school (see apps.main.services.sections), e.g. after a deploy.
+    """
+    from apps.main.services.sections import warm_schools
+
+    results = warm_schools()
+    failed = [school_id for school_id, seconds, error in results if error]
+    return f"Warmed {len(results) - len(failed)} schools, {len(failed)} failed"
@@ -1,3 +1,132 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from apps.main.models import FAQ, Menu, School, SchoolDeletionJob
+from apps.main.services import tenancy
+from apps.main.services.cloning import CloneError, clone_school
+from apps.main.services.deletion import count_school_rows, delete_chunk as real_delete_chunk, run_deletion_job
+from apps.main.tasks import delete_school
+from apps.news.models import Category, News
 
-# Create your tests here.
+
+class CloneSchoolTests(TestCase):
+    def setUp(self):
+        # Both get the provisioned default menu, time tables and site settings.
+        self.template = School.objects.create(domain='template', name='Template')
+        self.target = School.objects.create(domain='target', name='Target')
+        Menu.objects.filter(school=self.template).update(title='Template menu')
+        FAQ.objects.create(school=self.template, title='Savol', description='Javob')
+
+    def rows(self, timings):
+        return {label: rows for label, rows, _ in timings}
+
+    def test_provisioned_defaults_are_skipped_and_reported(self):
+        menus = set(Menu.objects.filter(school=self.target).values_list('pk', flat=True))
+        rows = self.rows(clone_school(self.template, self.target))
+        self.assertIsNone(rows['main.Menu'])
+        self.assertIsNone(rows['main.SiteSettings'])
+        self.assertEqual(rows['main.FAQ'], 1)
+        self.assertEqual(set(Menu.objects.filter(school=self.target).values_list('pk', flat=True)), menus)
+        self.assertTrue(FAQ.objects.filter(school=self.target, title='Savol').exists())
+
+    def test_replace_swaps_the_defaults_for_the_template(self):
+        count = Menu.objects.filter(school=self.template).count()
+        rows = self.rows(clone_school(self.template, self.target, replace=True))
+        self.assertEqual(rows['main.Menu'], count)
+        self.assertEqual(Menu.objects.filter(school=self.target).count(), count)
+        self.assertFalse(Menu.objects.filter(school=self.target).exclude(title='Template menu').exists())
+        self.assertEqual(Menu.objects.filter(school=self.template).count(), count)
+
+    def test_replace_keeps_the_other_rows_of_the_target(self):
+        Category.objects.create(school=self.target, name='Mahalliy', slug='mahalliy')
+        FAQ.objects.create(school=self.target, title='Eski', description='Javob')
+        clone_school(self.template, self.target, replace=True)
+        self.assertTrue(Category.objects.filter(school=self.target, slug='mahalliy').exists())
+        self.assertEqual(FAQ.objects.filter(school=self.target).count(), 2)
+
+    def test_cloning_again_adds_only_what_is_missing(self):
+        Category.objects.create(school=self.template, name='Yangilik', slug='yangilik')
+        clone_school(self.template, self.target, labels=['news.Category'])
+        rows = self.rows(clone_school(self.template, self.target, labels=['news.Category']))
+        self.assertEqual(rows['news.Category'], 0)
+        self.assertEqual(Category.objects.filter(school=self.target).count(), 1)
+
+    def test_a_school_is_not_cloned_into_itself(self):
+        with self.assertRaises(CloneError):
+            clone_school(self.template, self.template)
+
+
+@override_settings(SCHOOL_DELETE_CHUNK_SIZE=5)
+class SchoolDeletionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.school = School.objects.create(domain='old', name='Old')
+        self.other = School.objects.create(domain='kept', name='Kept')
+        category = Category.objects.create(school=self.school, name='Yangilik', slug='yangilik')
+        self.news = News(school=self.school, category=category, title='t', slug='t')
+        self.news.image.save('photo.jpg', ContentFile(b'jpeg'), save=False)
+        self.news.save()
+        self.job = SchoolDeletionJob.objects.create(school=self.school, school_name=str(self.school))
+
+    def remaining_rows(self, school):
+        return sum(tenancy.school_queryset(model, school.pk, 'default').count() for model in tenancy.tenant_models())
+
+    def test_a_run_stops_when_its_time_is_up(self):
+        total = sum(count_school_rows(self.school.pk).values())
+        # The time is up as soon as the first chunk of rows is deleted.
+        deleted = []
+
+        def delete_chunk(*args):
+            rows, names = real_delete_chunk(*args)
+            deleted.append(rows)
+            return rows, names
+
+        with mock.patch('apps.main.services.deletion.delete_chunk', side_effect=delete_chunk), \
+                mock.patch('apps.main.services.deletion.time.monotonic', side_effect=lambda: 100 if any(deleted) else 0):
+            self.assertFalse(run_deletion_job(self.job, time_budget=10))
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'running')
+        self.assertEqual(self.job.total_rows, total)
+        self.assertTrue(0 < sum(deleted) <= 5)
+        self.assertEqual(self.job.deleted_rows, sum(deleted))
+        self.assertEqual(self.remaining_rows(self.school), total - sum(deleted))
+        self.assertTrue(School.objects.filter(pk=self.school.pk).exists())
+
+    def test_the_last_run_finishes_the_job(self):
+        other_rows = self.remaining_rows(self.other)
+        name = self.news.image.name
+        self.assertTrue(run_deletion_job(self.job, time_budget=60))
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'done')
+        self.assertIsNotNone(self.job.finished_at)
+        self.assertEqual(self.job.deleted_rows, self.job.total_rows)
+        self.assertEqual(self.job.deleted_files, 1)
+        self.assertFalse(School.objects.filter(pk=self.school.pk).exists())
+        self.assertFalse(default_storage.exists(name))
+        self.assertEqual(self.remaining_rows(self.other), other_rows)
+
+    def test_the_task_queues_itself_until_the_school_is_gone(self):
+        with mock.patch('apps.main.services.deletion.run_deletion_job', return_value=False), \
+                mock.patch.object(delete_school, 'delay') as delay:
+            delete_school(self.job.pk)
+        delay.assert_called_once_with(self.job.pk)
+
+        with mock.patch('apps.main.services.deletion.run_deletion_job', return_value=True), \
+                mock.patch.object(delete_school, 'delay') as delay:
+            delete_school(self.job.pk)
+        delay.assert_not_called()
+
+    def test_finished_jobs_are_not_run_again(self):
+        SchoolDeletionJob.objects.filter(pk=self.job.pk).update(status='done')
+        with mock.patch('apps.main.services.deletion.run_deletion_job') as run:
+            delete_school(self.job.pk)
+        run.assert_not_called()
@@ -8,7 +8,7 @@ class MenuTranslationOptions(TranslationOptions):
 
 
 class SchoolTranslationOptions(TranslationOptions):
-    fields = ('name', 'description', 'short_description', 'address')
+    fields = ('name', 'description', 'description_rendered', 'short_description', 'address')
     required_languages = ('uz',)
 
 
@@ -1,7 +1,9 @@
 from rest_framework.generics import ListAPIView
+from rest_framework.response import Response
 from apps.common.mixins import SchoolScopedMixin, IsActiveFilterMixin
 from apps.main.models import Menu
 from apps.main.serializers.menu import MenuSerializer
+from apps.main.services.sections import cached_section
 
 
 class MenuView(IsActiveFilterMixin, SchoolScopedMixin, ListAPIView):
@@ -16,4 +18,9 @@ class MenuView(IsActiveFilterMixin, SchoolScopedMixin, ListAPIView):
             "children__children",
             "children__children__children",
         )
-    )
\ No newline at end of file
+    )
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(request, 'school', None):
+            return super().list(request, *args, **kwargs)
+        return Response(cached_section('menu', request.school))
@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework.generics import RetrieveAPIView
 from apps.common.mixins import IsActiveFilterMixin
 from apps.main.serializers.school import SchoolSerializer
-from apps.main.models import School
+from apps.main.services.sections import cached_section, school_for_domain
 from django.http import Http404
 
 
@@ -18,13 +18,8 @@ class CheckSchoolView(APIView):
             
             
             try:
-                school = School.objects.get(domain=subdomain)
-                if school.is_active:
-                    res = True
-                else:
-                    res = False
-            except School.DoesNotExist:
-                res = False
+                school = school_for_domain(subdomain)
+                res = bool(school and school.is_active)
             except Http404:
                 # Re-raise Http404 exceptions to properly display 404 pages
                 res = False
@@ -43,5 +38,7 @@ class SchoolView(IsActiveFilterMixin, RetrieveAPIView):
         if not request.school and not request.subdomain:
             return Response({'detail': None})
         
+        if request.school:
+            return Response(cached_section('school', request.school))
         serializer = SchoolSerializer(request.school)
         return Response(serializer.data)
\ No newline at end of file
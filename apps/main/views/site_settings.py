@@ -1,12 +1,19 @@
 from rest_framework.generics import RetrieveAPIView
+from rest_framework.response import Response
 from apps.common.mixins import SchoolScopedMixin
 from ..models import SiteSettings
 from ..serializers.site_settings import SiteSettingsSerializer
+from ..services.sections import cached_section
 
 
 class SiteSettingsView(SchoolScopedMixin, RetrieveAPIView):
     serializer_class = SiteSettingsSerializer
     school_field = "school"
+
+    def retrieve(self, request, *args, **kwargs):
+        if getattr(request, 'school', None):
+            return Response(cached_section('site_settings', request.school))
+        return super().retrieve(request, *args, **kwargs)
     
     def get_object(self):
         # Get or create SiteSettings for the current school
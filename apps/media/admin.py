@@ -1,9 +1,18 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.http import HttpResponseRedirect
+from django.shortcuts import render
+from django.urls import reverse
 from django.utils.safestring import mark_safe
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
+from apps.common.derivatives import get_local_preset_url
 from apps.common.mixins import SchoolAdminMixin, AdminTranslation, DescriptionMixin
-from .models import MediaCollection, MediaImage, MediaVideo
+from apps.common.tasks import enqueue_on_commit
+from .models import MediaCollection, MediaImage, MediaImportJob, MediaVideo
 from modeltranslation.admin import TranslationStackedInline
+from .importing import save_uploads
+from .tasks import import_media_images
 
 
 class MediaImageInline(admin.StackedInline):
@@ -17,12 +26,42 @@ class MediaImageInline(admin.StackedInline):
         if obj.image:
             return format_html(
                 '<img src="{}" style="height: 60px; object-fit: cover; border-radius: 4px;" />',
-                obj.image.url
+                get_local_preset_url(obj.image.url, 'thumb_small')
             )
         return ""
     image_preview.short_description = ""
 
 
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput(attrs={'accept': 'image/*'}))
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        if isinstance(data, (list, tuple)):
+            return [super(MultipleFileField, self).clean(item, initial) for item in data]
+        return [super().clean(data, initial)] if data else []
+
+
+class ImportImagesForm(forms.Form):
+    archive = forms.FileField(
+        required=False, label="ZIP arxiv",
+        widget=forms.ClearableFileInput(attrs={'accept': '.zip,application/zip'}),
+    )
+    files = MultipleFileField(required=False, label="Yoki rasmlar")
+    show_in_main = forms.BooleanField(required=False, label="Asosiy sahifada ko'rsatish")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('archive') and not cleaned_data.get('files'):
+            raise forms.ValidationError("ZIP arxiv yoki rasmlarni tanlang.")
+        return cleaned_data
+
+
 @admin.register(MediaCollection)
 class MediaCollectionAdmin(SchoolAdminMixin, AdminTranslation):
     """Admin interface for Media Collections with school scoping and translation support"""
@@ -37,6 +76,7 @@ class MediaCollectionAdmin(SchoolAdminMixin, AdminTranslation):
         return not request.user.is_superuser
     
     inlines = [MediaImageInline]
+    actions = ['import_images']
     
     def image_count(self, obj):
         """Display count of images in collection"""
@@ -65,6 +105,76 @@ class MediaCollectionAdmin(SchoolAdminMixin, AdminTranslation):
     class Media:
         js = ('js/admin_media.js',)
 
+    @admin.action(description="Rasmlarni ommaviy yuklash (ZIP yoki bir nechta fayl)")
+    def import_images(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, "Bitta rasmlar to'plamini tanlang.", messages.WARNING)
+            return None
+        collection = queryset.get()
+        form = ImportImagesForm(request.POST, request.FILES) if 'apply' in request.POST else ImportImagesForm()
+        if not form.is_valid():
+            return render(request, 'admin/media/mediacollection/import_images.html', {
+                **self.admin_site.each_context(request),
+                'title': "Rasmlarni ommaviy yuklash",
+                'opts': self.model._meta,
+                'form': form,
+                'collection': collection,
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            })
+
+        # Processing hundreds of photos takes minutes: it is done by a Celery
+        # task, the request only saves the upload.
+        job = MediaImportJob.objects.create(
+            school_id=collection.school_id,
+            collection_id=collection.pk,
+            collection_title=collection.title,
+            show_in_main=form.cleaned_data['show_in_main'],
+            directory=save_uploads(form.cleaned_data['archive'], form.cleaned_data['files']),
+            created_by=request.user,
+        )
+        enqueue_on_commit(import_media_images, job.pk)
+        self.message_user(
+            request, f"{collection}: rasmlar navbatga qo'yildi, natijasini shu yerda kuzating.", messages.SUCCESS,
+        )
+        return HttpResponseRedirect(reverse('admin:media_mediaimportjob_changelist'))
+
+
+@admin.register(MediaImportJob)
+class MediaImportJobAdmin(SchoolAdminMixin, admin.ModelAdmin):
+    list_display = (
+        'collection_title', 'status', 'progress_bar', 'processed', 'total', 'created', 'duplicates',
+        'created_at', 'finished_at',
+    )
+    list_filter = ('status',)
+    exclude = ('directory', 'errors')
+    readonly_fields = [
+        f.name for f in MediaImportJob._meta.fields if f.name not in ('directory', 'errors')
+    ] + ['error_list']
+
+    def has_module_permission(self, request):
+        return not request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        # Whoever may import into collections may follow the imports.
+        return request.user.has_perm('media.change_mediacollection')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def progress_bar(self, obj):
+        return mark_safe(
+            f'<div style="width: 120px; background: #eee; border-radius: 4px;">'
+            f'<div style="width: {obj.progress}%; background: #28a745; color: #fff; font-size: 11px; '
+            f'text-align: center; border-radius: 4px;">{obj.progress}%</div></div>'
+        )
+    progress_bar.short_description = "Jarayon"
+
+    def error_list(self, obj):
+        return format_html_join(mark_safe('<br>'), '{}', ((error,) for error in obj.errors)) or '-'
+    error_list.short_description = "Yuklanmagan fayllar"
 
 
 @admin.register(MediaVideo)
@@ -0,0 +1,314 @@
+"""
+Bulk import of photos into a MediaCollection (the admin action
+`import_images`), from a ZIP archive or a multi-file upload.
+
+The admin action only saves the upload under MEDIA_IMPORT_DIR and creates
+a MediaImportJob; the `import_media_images` Celery task does the work and
+reports its progress on the job, so no web worker waits for it.
+
+ZIP members are read one at a time and handed to a pool of
+MEDIA_IMPORT_WORKERS threads with at most twice as many photos in memory
+(Pillow releases the GIL while decoding, resizing and encoding). Each
+thread validates a photo and runs the image pipeline on it (orientation,
+size cap, SSIM quality, WebP/AVIF siblings and placeholders, as
+apps.common.images does after a single upload). The results are stored,
+photos the collection already has (same content hash) are skipped, and
+the MediaImage and ImageMetadata rows are created with one `bulk_create`
+each, so the per-row `process_image` tasks are not needed.
+"""
+import hashlib
+import os
+import shutil
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from io import BytesIO
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import router, transaction
+from django.utils import timezone
+from PIL import Image
+from apps.common.utils import generate_upload_path
+
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif'}
+# MediaImage.image accepts up to 5 MB (apps.common.validators.file_size).
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+ARCHIVE_NAME = 'archive.zip'
+PROGRESS_EVERY = 10
+
+
+class ImportRejected(Exception):
+    pass
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    duplicates: int = 0
+    errors: list = field(default_factory=list)
+
+
+def zip_members(archive):
+    """Members of `archive` that are meant as photos (no folders, hidden or macOS files)."""
+    for index, info in enumerate(archive.infolist()):
+        filename = os.path.basename(info.filename)
+        if info.is_dir() or not filename or filename.startswith('.') or '__MACOSX/' in info.filename:
+            continue
+        yield index, info, filename
+
+
+def zip_uploads(file):
+    """(index, file name, bytes or None, error) of the photos in a ZIP, read one at a time."""
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        yield 0, getattr(file, 'name', 'zip'), None, "ZIP arxiv emas yoki buzilgan"
+        return
+    with archive:
+        for index, info, filename in zip_members(archive):
+            if os.path.splitext(filename)[1].lower() not in IMAGE_EXTENSIONS:
+                yield index, filename, None, "rasm emas"
+            elif info.file_size > MAX_IMAGE_SIZE:
+                yield index, filename, None, "5 MB dan katta"
+            else:
+                try:
+                    yield index, filename, archive.read(info), None
+                except (zipfile.BadZipFile, OSError):
+                    yield index, filename, None, "arxivdan o'qib bo'lmadi"
+
+
+def file_uploads(files):
+    """(index, file name, bytes or None, error) of uploaded files, read one at a time."""
+    for index, file in enumerate(files):
+        if os.path.splitext(file.name)[1].lower() not in IMAGE_EXTENSIONS:
+            yield index, file.name, None, "rasm emas"
+        elif file.size > MAX_IMAGE_SIZE:
+            yield index, file.name, None, "5 MB dan katta"
+        else:
+            yield index, file.name, file.read(), None
+
+
+def save_uploads(archive=None, files=()):
+    """Copy the uploaded ZIP (or files) to a new directory under MEDIA_IMPORT_DIR; returns its path."""
+    directory = os.path.join(settings.MEDIA_IMPORT_DIR, uuid.uuid4().hex)
+    os.makedirs(directory)
+    uploads = [(ARCHIVE_NAME, archive)] if archive else [
+        (f'{index:05d}-{os.path.basename(file.name)}', file) for index, file in enumerate(files)
+    ]
+    for name, upload in uploads:
+        with open(os.path.join(directory, name), 'wb') as f:
+            for chunk in upload.chunks():
+                f.write(chunk)
+    return directory
+
+
+def _saved_files(directory, names):
+    for name in names:
+        with open(os.path.join(directory, name), 'rb') as f:
+            yield File(f, name=name.split('-', 1)[1])
+
+
+def saved_uploads(directory):
+    """(total, uploads) of a directory written by `save_uploads`, see zip_uploads/file_uploads."""
+    path = os.path.join(directory, ARCHIVE_NAME)
+    if os.path.exists(path):
+        try:
+            with zipfile.ZipFile(path) as archive:
+                total = sum(1 for member in zip_members(archive))
+        except zipfile.BadZipFile:
+            total = 1
+
+        def uploads():
+            with open(path, 'rb') as f:
+                yield from zip_uploads(f)
+        return total, uploads()
+    names = sorted(os.listdir(directory))
+    return len(names), file_uploads(_saved_files(directory, names))
+
+
+def prepare_image(data):
+    """
+    Runs in a pool thread: validate and process one photo. Returns what
+    the caller stores; raises ImportRejected for what is not a usable image.
+    """
+    from apps.common.images import (
+        ENCODE_OPTIONS, encode, encode_siblings, normalize, open_image, orientation, resize_image,
+    )
+    from apps.common.placeholders import SAMPLE_SIZE, describe
+
+    limit = settings.IMAGE_MAX_DIMENSION
+    try:
+        with Image.open(BytesIO(data)) as probe:
+            probe.verify()
+        img = open_image(BytesIO(data), (limit, limit))
+        format = img.format
+        single_frame = getattr(img, 'n_frames', 1) == 1
+        output = quality = score = None
+        variants = {}
+        if settings.IMAGE_PIPELINE_ENABLED and format in ENCODE_OPTIONS and single_frame:
+            has_exif = bool(img.info.get('exif'))
+            img, changed = normalize(img, limit)
+            img.format = format
+            output, quality, score = encode(img, format)
+            if len(output) >= len(data) and not (changed or has_exif):
+                output = quality = score = None
+            variants = encode_siblings(img, len(output) if output is not None else len(data))
+            width, height = img.size
+            placeholders = describe(img)
+        else:
+            width, height = img.size
+            if orientation(img) in (5, 6, 7, 8):
+                width, height = height, width
+            placeholders = describe(resize_image(img, (SAMPLE_SIZE * 2, SAMPLE_SIZE * 2)))
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise ImportRejected("rasm emas yoki buzilgan")
+
+    content = output if output is not None else data
+    return {
+        'content': content,
+        'siblings': {ext: sibling for ext, sibling in variants.items() if sibling is not None},
+        'original_hash': hashlib.sha256(data).hexdigest(),
+        'metadata': {
+            'width': width,
+            'height': height,
+            'format': format or '',
+            'original_size': len(data),
+            'size': len(content),
+            'content_hash': hashlib.sha256(content).hexdigest(),
+            'quality': quality,
+            'ssim': score,
+            **placeholders,
+        },
+    }
+
+
+def _prepare(item):
+    index, filename, data = item
+    try:
+        return index, filename, prepare_image(data), None
+    except ImportRejected as e:
+        return index, filename, None, str(e)
+
+
+def prepared_images(uploads, workers=None):
+    """
+    (index, file name, result, error) of `uploads` in completion order,
+    processed by a pool of `workers` threads.
+    """
+    workers = workers or settings.MEDIA_IMPORT_WORKERS
+    # The threads never touch the database.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for index, filename, data, error in uploads:
+            if error:
+                yield index, filename, None, error
+                continue
+            pending.add(pool.submit(_prepare, (index, filename, data)))
+            # Keep reading ahead bounded: finished results are stored before more is read.
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in wait(pending)[0]:
+            yield future.result()
+
+
+def import_images(collection, uploads, show_in_main=False, workers=None, progress=None):
+    """
+    Add the photos of `uploads` (see zip_uploads/file_uploads) to
+    `collection`. `progress(processed, result)` is called after each file.
+    """
+    from apps.common.cache import bump_generation
+    from apps.common.images import replace_file
+    from apps.common.models import ImageMetadata
+    from apps.common.tasks import enqueue_on_commit, warm_image
+    from apps.common.warming import presets_for
+    from apps.media.models import MediaImage
+
+    result = ImportResult()
+    template = MediaImage(collection=collection)
+    using = router.db_for_write(MediaImage, instance=template)
+    existing = set(collection.media_images.values_list('image', flat=True))
+    seen = set(
+        ImageMetadata.objects.filter(name__in=existing).exclude(content_hash='')
+        .values_list('content_hash', flat=True)
+    )
+
+    rows, metadata = [], []
+    for processed, (index, filename, prepared, error) in enumerate(prepared_images(uploads, workers), 1):
+        if progress is not None:
+            progress(processed, result)
+        if error:
+            result.errors.append(f"{filename}: {error}")
+            continue
+        details = prepared['metadata']
+        if details['content_hash'] in seen or prepared['original_hash'] in seen:
+            result.duplicates += 1
+            continue
+        seen.update((details['content_hash'], prepared['original_hash']))
+
+        name = default_storage.save(generate_upload_path(template, filename), ContentFile(prepared['content']))
+        for ext, (data, variant) in prepared['siblings'].items():
+            replace_file(f'{name}.{ext}', data)
+        rows.append((index, MediaImage(collection=collection, image=name, show_in_main=show_in_main)))
+        metadata.append(ImageMetadata(
+            name=name,
+            variants={ext: variant for ext, (data, variant) in prepared['siblings'].items()},
+            **details,
+        ))
+
+    if not rows:
+        return result
+    rows.sort(key=lambda row: row[0])
+    with transaction.atomic(using=using):
+        MediaImage.objects.using(using).bulk_create([row for index, row in rows])
+    ImageMetadata.objects.bulk_create(
+        metadata,
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=[
+            'width', 'height', 'format', 'original_size', 'size', 'content_hash',
+            'quality', 'ssim', 'variants', 'dominant_color', 'blurhash', 'warm_variants', 'processed_at',
+        ],
+    )
+    # bulk_create sends no post_save: do what its receivers would have done.
+    bump_generation(MediaImage)
+    if settings.IMGPROXY_WARM_ENABLED:
+        presets = list(presets_for(MediaImage))
+        for entry in metadata:
+            enqueue_on_commit(warm_image, entry.name, presets)
+    result.created = len(rows)
+    return result
+
+
+def run_import_job(job):
+    """Import the saved upload of a MediaImportJob, recording progress and the result on it."""
+    from apps.common.db_routers import reset_current_school, set_current_school
+    from apps.media.models import MediaCollection, MediaImportJob
+
+    jobs = MediaImportJob.objects.filter(pk=job.pk)
+    token = set_current_school(job.school_id)
+    try:
+        collection = MediaCollection.objects.filter(pk=job.collection_id).first()
+        if collection is None:
+            raise ImportRejected("Rasmlar to'plami topilmadi")
+        total, uploads = saved_uploads(job.directory)
+        jobs.update(status='running', total=total)
+
+        def progress(processed, result):
+            if processed % PROGRESS_EVERY == 0:
+                jobs.update(processed=processed, duplicates=result.duplicates, errors=result.errors)
+
+        result = import_images(collection, uploads, show_in_main=job.show_in_main, progress=progress)
+        jobs.update(
+            status='done', processed=total, created=result.created, duplicates=result.duplicates,
+            errors=result.errors, finished_at=timezone.now(),
+        )
+        return result
+    finally:
+        reset_current_school(token)
+        shutil.rmtree(job.directory, ignore_errors=True)
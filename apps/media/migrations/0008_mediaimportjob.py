@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0047_download_count'),
+        ('media', '0007_alter_mediacollection_unique_together_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('collection_id', models.PositiveBigIntegerField(verbose_name="Rasmlar to'plami ID")),
+                ('collection_title', models.CharField(max_length=255, verbose_name="Rasmlar to'plami")),
+                ('show_in_main', models.BooleanField(default=False, verbose_name="Asosiy sahifada ko'rsatish")),
+                ('directory', models.CharField(max_length=255, verbose_name='Vaqtinchalik papka')),
+                ('status', models.CharField(choices=[('pending', 'Navbatda'), ('running', 'Bajarilmoqda'), ('done', 'Tugallandi'), ('failed', 'Xatolik')], default='pending', max_length=20, verbose_name='Holati')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Jami fayllar')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name="Ko'rilgan fayllar")),
+                ('created', models.PositiveIntegerField(default=0, verbose_name="Qo'shilgan rasmlar")),
+                ('duplicates', models.PositiveIntegerField(default=0, verbose_name='Takroriy rasmlar')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Yuklanmagan fayllar')),
+                ('error', models.TextField(blank=True, verbose_name='Xatolik')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan sana')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan sana')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Kim tomonidan')),
+                ('school', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main.school', verbose_name='Maktab')),
+            ],
+            options={
+                'verbose_name': 'Rasmlar importi',
+                'verbose_name_plural': 'Rasmlar importlari',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
@@ -64,4 +64,53 @@ class MediaVideo(BaseModel):
     
     class Meta:
         verbose_name = "Video "
-        verbose_name_plural = "Videolar"
\ No newline at end of file
+        verbose_name_plural = "Videolar"
+
+
+class MediaImportJob(models.Model):
+    """Background bulk import of photos into a MediaCollection (see apps.media.importing)."""
+    STATUSES = [
+        ('pending', "Navbatda"),
+        ('running', "Bajarilmoqda"),
+        ('done', "Tugallandi"),
+        ('failed', "Xatolik"),
+    ]
+
+    school = models.ForeignKey(
+        'main.School', on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='+', verbose_name="Maktab",
+    )
+    # The collection may live on the school's shard: no database-level FK.
+    collection_id = models.PositiveBigIntegerField(verbose_name="Rasmlar to'plami ID")
+    collection_title = models.CharField(max_length=255, verbose_name="Rasmlar to'plami")
+    show_in_main = models.BooleanField(default=False, verbose_name="Asosiy sahifada ko'rsatish")
+    directory = models.CharField(max_length=255, verbose_name="Vaqtinchalik papka")
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending', verbose_name="Holati")
+    total = models.PositiveIntegerField(default=0, verbose_name="Jami fayllar")
+    processed = models.PositiveIntegerField(default=0, verbose_name="Ko'rilgan fayllar")
+    created = models.PositiveIntegerField(default=0, verbose_name="Qo'shilgan rasmlar")
+    duplicates = models.PositiveIntegerField(default=0, verbose_name="Takroriy rasmlar")
+    errors = models.JSONField(default=list, blank=True, verbose_name="Yuklanmagan fayllar")
+    error = models.TextField(blank=True, verbose_name="Xatolik")
+    created_by = models.ForeignKey(
+        'user.User', on_delete=models.SET_NULL,
+        null=True, blank=True,
+        verbose_name="Kim tomonidan",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan sana")
+
+    def __str__(self):
+        return f"{self.collection_title} ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100 if self.status == 'done' else 0
+        return min(100, round(self.processed * 100 / self.total))
+
+    class Meta:
+        ordering = ('-created_at',)
+        verbose_name = "Rasmlar importi"
+        verbose_name_plural = "Rasmlar importlari"
@@ -1,13 +1,17 @@
 from rest_framework import serializers
+from apps.common.rest_framework import ArchiveURLField, ImageMetadataField, ImageMetadataListSerializer, ImgproxyImageField
 from .models import MediaCollection, MediaImage, MediaVideo
 
 
 class MediaImageSerializer(serializers.ModelSerializer):
     """Serializer for MediaImage model"""
+    image_meta = ImageMetadataField(source='image')
+    image_srcset = ImgproxyImageField(source='image')
     
     class Meta:
         model = MediaImage
-        fields = ['id', 'image', 'show_in_main', 'created_at']
+        fields = ['id', 'image', 'image_meta', 'image_srcset', 'show_in_main', 'created_at']
+        list_serializer_class = ImageMetadataListSerializer
 
 
 class MediaCollectionListSerializer(serializers.ModelSerializer):
@@ -53,10 +57,11 @@ class MediaCollectionDetailSerializer(serializers.ModelSerializer):
     Returns collection info and all associated MediaImages.
     """
     media_images = MediaImageSerializer(many=True, read_only=True)
+    archive_url = ArchiveURLField()
     
     class Meta:
         model = MediaCollection
-        fields = ['id', 'title', 'slug', 'created_at', 'media_images']
+        fields = ['id', 'title', 'slug', 'created_at', 'archive_url', 'media_images']
 
 
 class MediaVideoSerializer(serializers.ModelSerializer):
@@ -0,0 +1,19 @@
+from celery import shared_task
+from django.utils import timezone
+from .models import MediaImportJob
+
+
+@shared_task
+def import_media_images(job_id):
+    """Bulk import of photos into a media collection (see apps.media.importing)."""
+    from apps.media.importing import run_import_job
+
+    job = MediaImportJob.objects.filter(pk=job_id, status='pending').first()
+    if job is None:
+        return
+    try:
+        result = run_import_job(job)
+    except Exception as e:
+        MediaImportJob.objects.filter(pk=job_id).update(status='failed', error=str(e), finished_at=timezone.now())
+        raise
+    return f"Media import job {job_id}: {result.created} created, {result.duplicates} duplicates, {len(result.errors)} errors"
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from apps.common.mixins import SchoolAdminMixin, AdminTranslation, DescriptionMixin
+from apps.common.mixins import SchoolAdminMixin, AdminTranslation, DescriptionMixin, EstimatedCountAdminMixin
 from apps.news.models import News, Category
 
 
@@ -16,7 +16,7 @@ class CategoryAdmin(SchoolAdminMixin, AdminTranslation):
 
 
 @admin.register(News)
-class NewsAdmin(SchoolAdminMixin, DescriptionMixin, AdminTranslation):
+class NewsAdmin(EstimatedCountAdminMixin, SchoolAdminMixin, DescriptionMixin, AdminTranslation):
     list_display = ['image_tag', 'title', 'category', 'view_count', 'is_active', 'created_at']
     list_filter = ['category', 'is_active', 'created_at']
     list_display_links = ['image_tag', 'title']
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_alter_category_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='content_rendered',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Tafsilot (HTML)'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='content_rendered_en',
+            field=models.TextField(blank=True, default='', editable=False, null=True, verbose_name='Tafsilot (HTML)'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='content_rendered_ru',
+            field=models.TextField(blank=True, default='', editable=False, null=True, verbose_name='Tafsilot (HTML)'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='content_rendered_uz',
+            field=models.TextField(blank=True, default='', editable=False, null=True, verbose_name='Tafsilot (HTML)'),
+        ),
+    ]
@@ -59,12 +59,15 @@ class News(SlugifyMixin, BaseModel):
         help_text="Rasm 5 MB dan katta bo'lishi mumkin emas."
     )
     content = HTMLField(verbose_name="Tafsilot")
+    # Filled on save from `content`, see apps.common.richtext
+    content_rendered = models.TextField(blank=True, default='', editable=False, verbose_name="Tafsilot (HTML)")
     view_count = models.PositiveIntegerField(default=0, verbose_name="Ko'rishlar soni")
     
     @admin.display(description="Rasm")
     def image_tag(self):
         if self.image:
-            return mark_safe(f'<img src="{self.image.url}" style="height: 50px; object-fit: cover;" />')
+            from apps.common.derivatives import get_local_preset_url
+            return mark_safe(f'<img src="{get_local_preset_url(self.image.url, "thumb_small")}" style="height: 50px; object-fit: cover;" />')
         return "Rasm yo'q"
     
     def increment_view_count(self):
@@ -1,6 +1,7 @@
 import re
 from rest_framework import serializers
 from apps.news.models import News, Category
+from apps.common.rest_framework import ImageMetadataField, ImageMetadataListSerializer, ImgproxyImageField, RenderedHTMLField
 from django.utils.html import strip_tags
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -15,6 +16,8 @@ class NewsListSerializer(serializers.ModelSerializer):
     """Serializer for listing news with basic fields"""
     category = CategorySerializer(read_only=True)
     content = serializers.SerializerMethodField()
+    image_meta = ImageMetadataField(source='image')
+    image_srcset = ImgproxyImageField(source='image')
     
     def get_content(self, obj):
         cleaned = re.sub(r'[\r\n]+', ' ', obj.content).strip()
@@ -22,16 +25,20 @@ class NewsListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = News
-        fields = ['id', 'title', 'slug', 'image', 'content', 'category', 'view_count', 'created_at']
+        fields = ['id', 'title', 'slug', 'image', 'image_meta', 'image_srcset', 'content', 'category', 'view_count', 'created_at']
+        list_serializer_class = ImageMetadataListSerializer
 
 
 class NewsDetailSerializer(serializers.ModelSerializer):
     """Serializer for detailed news view with all fields"""
     category = CategorySerializer(read_only=True)
+    content = RenderedHTMLField()
+    image_meta = ImageMetadataField(source='image')
+    image_srcset = ImgproxyImageField(source='image')
     
     class Meta:
         model = News
-        fields = ['id', 'title', 'slug', 'image', 'category', 'content', 'view_count', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'slug', 'image', 'image_meta', 'image_srcset', 'category', 'content', 'view_count', 'created_at', 'updated_at']
 
 
  
\ No newline at end of file
@@ -9,4 +9,4 @@ class CategoryTranslationOptions(TranslationOptions):
 
 @register(News)
 class NewsTranslationOptions(TranslationOptions):
-    fields = ('title', 'content') 
\ No newline at end of file
+    fields = ('title', 'content', 'content_rendered') 
\ No newline at end of file
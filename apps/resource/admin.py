@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.safestring import mark_safe
 from django.utils.html import format_html
-from apps.common.mixins import SchoolAdminMixin, AdminTranslation
+from apps.common.mixins import ChunkedUploadAdminMixin, SchoolAdminMixin, AdminTranslation
 from .models import ResourceVideo, ResourceFile
 
 
@@ -84,7 +84,7 @@ class ResourceVideoAdmin(SchoolAdminMixin, AdminTranslation):
 
 
 @admin.register(ResourceFile)
-class ResourceFileAdmin(SchoolAdminMixin, AdminTranslation):
+class ResourceFileAdmin(ChunkedUploadAdminMixin, SchoolAdminMixin, AdminTranslation):
     """Admin interface for Resource Files with school scoping and translation support"""
     
     list_display = ('title', 'file_info', 'download_count', 'is_active', 'created_at')
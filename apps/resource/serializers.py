@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.common.rest_framework import DownloadURLField
 from .models import ResourceVideo, ResourceFile
 
 
@@ -15,10 +16,11 @@ class ResourceFileSerializer(serializers.ModelSerializer):
     
     file_size = serializers.SerializerMethodField()
     file_extension = serializers.SerializerMethodField()
+    download_url = DownloadURLField()
     
     class Meta:
         model = ResourceFile
-        fields = ['id', 'title', 'file', 'download_count', 'file_size', 'file_extension', 'created_at']
+        fields = ['id', 'title', 'file', 'download_url', 'download_count', 'file_size', 'file_extension', 'created_at']
     
     def get_file_size(self, obj):
         """Return formatted file size"""
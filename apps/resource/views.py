@@ -2,6 +2,7 @@ from django.shortcuts import render, get_object_or_404
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
+from django.db import router
 from django.db.models import F
 
 from apps.common.mixins import IsActiveFilterMixin, SchoolScopedMixin
@@ -26,8 +27,8 @@ class ResourceVideoDetailView(IsActiveFilterMixin, SchoolScopedMixin, generics.R
         instance = self.get_object()
         # Increment view count
         ResourceVideo.objects.filter(pk=instance.pk).update(view_count=F('view_count') + 1)
-        # Refresh the instance to get the updated view count
-        instance.refresh_from_db()
+        # Refresh from the primary, the replica may not have the new count yet
+        instance.refresh_from_db(using=router.db_for_write(ResourceVideo))
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -40,16 +41,7 @@ class ResourceFileListView(IsActiveFilterMixin, SchoolScopedMixin, generics.List
 
 
 class ResourceFileDetailView(IsActiveFilterMixin, SchoolScopedMixin, generics.RetrieveAPIView):
-    """Get a specific resource file and increment download count"""
+    """Get a specific resource file; downloads are counted by FileDownloadView"""
     queryset = ResourceFile.objects.all()
     serializer_class = ResourceFileSerializer
     school_field = "school"
-    
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        # Increment download count
-        ResourceFile.objects.filter(pk=instance.pk).update(download_count=F('download_count') + 1)
-        # Refresh the instance to get the updated download count
-        instance.refresh_from_db()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0003_rendered_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cultureservicefile',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Yuklab olishlar soni'),
+        ),
+    ]
@@ -18,6 +18,8 @@ class Service(SlugifyMixin, BaseModel):
     name = models.CharField(max_length=255, verbose_name="Nomi")
     slug = models.SlugField(max_length=255, verbose_name="Slug")
     description = HTMLField(verbose_name="Tavsifi")
+    # Filled on save from `description`, see apps.common.richtext
+    description_rendered = models.TextField(blank=True, default='', editable=False, verbose_name="Tavsifi (HTML)")
     tags = models.CharField(max_length=255, verbose_name="Taglar", help_text="Taglarni probel bilan ajrating", null=True, blank=True)
 
     slug_source = 'name'
@@ -57,6 +59,8 @@ class CultureServiceFile(BaseModel):
         validators=[file_size],
         help_text="Fayl 5 MB dan katta bo'lishi mumkin emas."
     )
+    download_count = models.PositiveIntegerField(default=0, verbose_name="Yuklab olishlar soni")
+
     def __str__(self):
         return f"{self.service.name} - {self.created_at}"
     
@@ -1,17 +1,22 @@
 from rest_framework import serializers
+from apps.common.rest_framework import DownloadURLField, ImgproxyImageField, RenderedHTMLField
 from .models import Service, CultureService, CultureArt, FineArt, ServiceImage, CultureServiceFile
 
 
 class ServiceImageSerializer(serializers.ModelSerializer):
+    image_srcset = ImgproxyImageField(source='image')
+
     class Meta:
         model = ServiceImage
-        fields = ['id', 'image', 'created_at']
+        fields = ['id', 'image', 'image_srcset', 'created_at']
 
 
 class CultureServiceFileSerializer(serializers.ModelSerializer):
+    download_url = DownloadURLField()
+
     class Meta:
         model = CultureServiceFile
-        fields = ['id', 'file', 'created_at']
+        fields = ['id', 'file', 'download_url', 'download_count', 'created_at']
 
 
 class ServiceListSerializer(serializers.ModelSerializer):
@@ -38,6 +43,7 @@ class ServiceListSerializer(serializers.ModelSerializer):
 
 
 class ServiceDetailSerializer(serializers.ModelSerializer):
+    description = RenderedHTMLField()
     images = serializers.SerializerMethodField()
     tags = serializers.SerializerMethodField()
     
@@ -89,6 +95,7 @@ class CultureServiceListSerializer(serializers.ModelSerializer):
 
 
 class CultureServiceDetailSerializer(serializers.ModelSerializer):
+    description = RenderedHTMLField()
     images = serializers.SerializerMethodField()
     service_files = CultureServiceFileSerializer(many=True, read_only=True)
     tags = serializers.SerializerMethodField()
@@ -144,6 +151,7 @@ class CultureArtListSerializer(serializers.ModelSerializer):
 
 
 class CultureArtDetailSerializer(serializers.ModelSerializer):
+    description = RenderedHTMLField()
     images = serializers.SerializerMethodField()
     tags = serializers.SerializerMethodField()
     
@@ -199,6 +207,7 @@ class FineArtListSerializer(serializers.ModelSerializer):
 
 
 class FineArtDetailSerializer(serializers.ModelSerializer):
+    description = RenderedHTMLField()
     images = serializers.SerializerMethodField()
     tags = serializers.SerializerMethodField()
     
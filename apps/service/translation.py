@@ -3,7 +3,7 @@ from .models import CultureService, CultureArt, FineArt, Service
 
 
 class ServiceTranslationOptions(TranslationOptions):
-    fields = ('name', 'description', 'tags')
+    fields = ('name', 'description', 'description_rendered', 'tags')
     required_languages = ('uz',)
 
 
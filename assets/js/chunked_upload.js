@@ -0,0 +1,157 @@
+// Resumable chunked upload of the admin file inputs marked with
+// data-chunked-upload (see apps/common/uploads.py). The file is sent in
+// chunks as soon as it is picked; an interrupted upload goes on from the
+// last chunk the server has, also after reloading the page and picking
+// the same file again. The form then posts only the upload id.
+(function () {
+    'use strict';
+
+    var MAX_RETRIES = 8;
+
+    function csrfToken() {
+        var field = document.querySelector('[name=csrfmiddlewaretoken]');
+        var cookie = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return field ? field.value : (cookie ? cookie[1] : '');
+    }
+
+    function base64(text) {
+        return btoa(unescape(encodeURIComponent(text)));
+    }
+
+    function send(method, url, headers, body) {
+        headers = Object.assign({'Tus-Resumable': '1.0.0', 'X-CSRFToken': csrfToken()}, headers || {});
+        return fetch(url, {method: method, headers: headers, body: body, credentials: 'same-origin'});
+    }
+
+    function sha256(buffer) {
+        // crypto.subtle exists on HTTPS only; without it chunks go unchecked.
+        if (!window.crypto || !window.crypto.subtle) {
+            return Promise.resolve(null);
+        }
+        return window.crypto.subtle.digest('SHA-256', buffer).then(function (digest) {
+            return btoa(String.fromCharCode.apply(null, new Uint8Array(digest)));
+        });
+    }
+
+    function wait(ms) {
+        return new Promise(function (resolve) { setTimeout(resolve, ms); });
+    }
+
+    async function errorText(response) {
+        try {
+            return (await response.json()).detail || response.statusText;
+        } catch (e) {
+            return response.statusText;
+        }
+    }
+
+    async function serverOffset(url) {
+        var response = await send('HEAD', url);
+        return response.ok ? parseInt(response.headers.get('Upload-Offset'), 10) : null;
+    }
+
+    async function upload(input, file, report) {
+        var key = 'chunked-upload:' + input.dataset.target + ':' + file.name + ':' + file.size + ':' + file.lastModified;
+        var chunkSize = parseInt(input.dataset.chunkSize, 10);
+        var url = localStorage.getItem(key);
+        var offset = url ? await serverOffset(url).catch(function () { return null; }) : null;
+
+        if (offset === null) {
+            var created = await send('POST', input.dataset.chunkedUpload, {
+                'Upload-Length': file.size,
+                'Upload-Metadata': 'filename ' + base64(file.name) + ',target ' + base64(input.dataset.target),
+            });
+            if (created.status !== 201) {
+                throw new Error(await errorText(created));
+            }
+            url = created.headers.get('Location');
+            offset = parseInt(created.headers.get('Upload-Offset'), 10) || 0;
+            localStorage.setItem(key, url);
+        }
+
+        var failures = 0;
+        while (offset < file.size) {
+            report(offset / file.size);
+            var chunk = await file.slice(offset, offset + chunkSize).arrayBuffer();
+            var headers = {'Upload-Offset': offset, 'Content-Type': 'application/offset+octet-stream'};
+            var checksum = await sha256(chunk);
+            if (checksum) {
+                headers['Upload-Checksum'] = 'sha256 ' + checksum;
+            }
+            var response = null;
+            try {
+                response = await send('PATCH', url, headers, chunk);
+            } catch (e) {
+                // Connection lost: retried below.
+            }
+            if (response && response.status === 204) {
+                offset = parseInt(response.headers.get('Upload-Offset'), 10);
+                failures = 0;
+                continue;
+            }
+            if (response && response.status >= 400 && response.status < 500 && [409, 460].indexOf(response.status) < 0) {
+                localStorage.removeItem(key);
+                throw new Error(await errorText(response));
+            }
+            if (++failures > MAX_RETRIES) {
+                throw new Error('Aloqa uzildi. Faylni qaytadan tanlab, yuklashni davom ettiring.');
+            }
+            await wait(Math.min(1000 * Math.pow(2, failures - 1), 30000));
+            var current = await serverOffset(url).catch(function () { return null; });
+            if (current !== null) {
+                offset = current;
+            }
+        }
+        localStorage.removeItem(key);
+        report(1);
+        return url.replace(/\/$/, '').split('/').pop();
+    }
+
+    function setup(input) {
+        var hidden = document.createElement('input');
+        hidden.type = 'hidden';
+        hidden.name = input.name + '_upload';
+        var status = document.createElement('span');
+        status.className = 'chunked-upload-status';
+        status.style.marginLeft = '8px';
+        input.after(hidden, status);
+
+        var form = input.form;
+        var busy = false;
+        form.addEventListener('submit', function (event) {
+            if (busy) {
+                event.preventDefault();
+                alert('Fayl hali yuklanmoqda. Iltimos, kuting.');
+            }
+        });
+
+        input.addEventListener('change', async function () {
+            var file = input.files[0];
+            hidden.value = '';
+            if (!file) {
+                status.textContent = '';
+                return;
+            }
+            busy = true;
+            status.style.color = '';
+            try {
+                hidden.value = await upload(input, file, function (progress) {
+                    status.textContent = 'Yuklanmoqda: ' + Math.floor(progress * 100) + '%';
+                });
+                status.textContent = '✓ ' + file.name + ' yuklandi';
+                // The file is on the server already: the form posts only the id.
+                input.value = '';
+                input.required = false;
+            } catch (error) {
+                status.style.color = '#ba2121';
+                status.textContent = error.message;
+            } finally {
+                busy = false;
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('input[type=file][data-chunked-upload]').forEach(setup);
+    });
+})();
@@ -1,4 +1,5 @@
 import environ
+from celery.schedules import crontab
 from pathlib import Path
 
 env = environ.Env()
@@ -68,6 +69,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     
     'corsheaders.middleware.CorsMiddleware',
+    'apps.common.middleware.ReplicaRoutingMiddleware',
     'apps.main.middleware.SubdomainMiddleware',
     
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -111,6 +113,40 @@ DATABASES = {
     }
 }
 
+# Reads of safe-method requests go to the optional `replica` alias,
+# see apps.common.middleware.ReplicaRoutingMiddleware.
+DATABASE_ROUTERS = ['apps.common.db_routers.PrimaryReplicaRouter']
+
+# After a successful write the client reads from the primary for this long.
+REPLICA_PIN_SECONDS = env.int('REPLICA_PIN_SECONDS', 5)
+
+# How long a school -> database alias mapping (SchoolShard) is cached.
+SHARD_CACHE_TIMEOUT = env.int('SHARD_CACHE_TIMEOUT', 60)
+
+# Each database hands out tenant primary keys from its own block of this
+# size (see apps.main.services.shards), so moved rows keep their ids.
+SHARD_ID_BLOCK_SIZE = env.int('SHARD_ID_BLOCK_SIZE', 10 ** 12)
+
+
+#######################################################
+# --------------------- CACHE ----------------------- #
+#######################################################
+
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://'),
+}
+
+# List counts, see apps.common.counting.cached_count
+COUNT_CACHE_TIMEOUT = env.int('COUNT_CACHE_TIMEOUT', 15 * 60)
+COUNT_ESTIMATE_THRESHOLD = env.int('COUNT_ESTIMATE_THRESHOLD', 10000)
+
+# School lookups by domain and public sections (menu, site settings...),
+# see apps.main.services.sections
+TENANT_CACHE_TIMEOUT = env.int('TENANT_CACHE_TIMEOUT', 60 * 60)
+# warm_caches command / task: pool size and schools started per second (0 = no limit)
+CACHE_WARM_WORKERS = env.int('CACHE_WARM_WORKERS', 4)
+CACHE_WARM_RATE = env.float('CACHE_WARM_RATE', 0)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -204,6 +240,14 @@ STATICFILES_DIRS = (BASE_DIR / 'assets',)
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Store uploads once per content as media/cas/<hash>, see apps.common.storage
+CONTENT_ADDRESSED_MEDIA = env.bool('CONTENT_ADDRESSED_MEDIA', False)
+if CONTENT_ADDRESSED_MEDIA:
+    STORAGES = {
+        'default': {'BACKEND': 'apps.common.storage.ContentAddressedStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+
 
 #################################################################
 # --------------------- IMPORTANT SETTINGS -------------------- #
@@ -231,12 +275,44 @@ NOT_ALLOWED_SUBDOMAINS = ['www', '', 'cdn', 'api', 'admin']
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
-CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
-CELERY_BROKER_URL = 'redis://localhost:6379/0'
+CELERY_RESULT_BACKEND = env.str('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+CELERY_BROKER_URL = env.str('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+# Background school deletion, see apps.main.services.deletion
+SCHOOL_DELETE_CHUNK_SIZE = env.int('SCHOOL_DELETE_CHUNK_SIZE', 500)
+SCHOOL_DELETE_FILE_WORKERS = env.int('SCHOOL_DELETE_FILE_WORKERS', 8)
+SCHOOL_DELETE_TIME_BUDGET = env.int('SCHOOL_DELETE_TIME_BUDGET', 120)
+
+CELERY_BEAT_SCHEDULE = {
+    'maintain-partitions': {
+        'task': 'apps.common.tasks.maintain_partitions',
+        'schedule': crontab(hour=3, minute=0, day_of_month='1,15'),
+    },
+    'collect-media': {
+        'task': 'apps.common.tasks.collect_media',
+        'schedule': crontab(hour=4, minute=30),
+    },
+    'expire-uploads': {
+        'task': 'apps.common.tasks.expire_uploads',
+        'schedule': crontab(minute=15),
+    },
+}
+
+
+#######################################################
+# ------------------ PARTITIONING ------------------- #
+#######################################################
+
+# Append-only tables split into monthly `created_at` partitions on
+# PostgreSQL, see `manage.py manage_partitions --convert`.
+PARTITIONED_MODELS = ['main.ContactForm', 'main.EmailSubscription']
+PARTITION_MONTHS_AHEAD = env.int('PARTITION_MONTHS_AHEAD', 3)
+# Partitions older than this many months are archived; empty keeps everything.
+PARTITION_RETENTION_MONTHS = env.int('PARTITION_RETENTION_MONTHS', None)
+
 
 #######################################################
 # --------------------- EMAIL ----------------------- #
@@ -260,4 +336,75 @@ DEFAULT_FROM_EMAIL = env.str('DEFAULT_FROM_EMAIL', 'noreply@bmsb.uz')
 
 # Imgproxy Configuration (Simple Setup)
 # The imgproxy service runs in insecure mode and frontend constructs URLs directly
-IMGPROXY_BASE_URL = env.str('IMGPROXY_BASE_URL', 'http://localhost:8080')
\ No newline at end of file
+IMGPROXY_BASE_URL = env.str('IMGPROXY_BASE_URL', 'http://localhost:8080')
+# Hex key/salt of a signing imgproxy; the API's srcset URLs are signed when both are set
+IMGPROXY_KEY = env.str('IMGPROXY_KEY', '')
+IMGPROXY_SALT = env.str('IMGPROXY_SALT', '')
+# Without imgproxy, get_preset_url() serves variants made locally (apps.common.derivatives)
+IMGPROXY_ENABLED = env.bool('IMGPROXY_ENABLED', True)
+# New uploads' IMAGE_PRESETS variants are requested right away, so no
+# visitor waits for the first resize, see apps.common.warming
+IMGPROXY_WARM_ENABLED = env.bool('IMGPROXY_WARM_ENABLED', True)
+IMGPROXY_WARM_CONCURRENCY = env.int('IMGPROXY_WARM_CONCURRENCY', 4)
+IMGPROXY_WARM_TIMEOUT = env.int('IMGPROXY_WARM_TIMEOUT', 30)
+# imgproxy picks WebP/AVIF from the Accept header and the cache in front of
+# it varies on it, so each output format is requested separately
+IMGPROXY_WARM_FORMATS = env.list('IMGPROXY_WARM_FORMATS', default=['avif', 'webp', 'original'])
+# srcset widths of images embedded in rich text, see apps.common.richtext
+CONTENT_IMAGE_WIDTHS = env.list('CONTENT_IMAGE_WIDTHS', cast=int, default=[480, 768, 1200, 1600])
+
+
+#######################################################
+# ---------------------- IMAGES --------------------- #
+#######################################################
+
+# Uploaded images are re-encoded by a Celery task, see apps.common.images
+IMAGE_PIPELINE_ENABLED = env.bool('IMAGE_PIPELINE_ENABLED', True)
+IMAGE_MAX_DIMENSION = env.int('IMAGE_MAX_DIMENSION', 2560)
+IMAGE_JPEG_QUALITY = env.int('IMAGE_JPEG_QUALITY', 85)
+# Lossy formats use the lowest quality in this range whose SSIM reaches the
+# target (needs NumPy, 0 disables the search), see apps.common.encoding
+IMAGE_SSIM_TARGET = env.float('IMAGE_SSIM_TARGET', 0.95)
+IMAGE_QUALITY_MIN = env.int('IMAGE_QUALITY_MIN', 40)
+IMAGE_QUALITY_MAX = env.int('IMAGE_QUALITY_MAX', 90)
+# Smaller copies written next to each image, served by nginx by Accept header.
+# AVIF is skipped where Pillow has no AVIF encoder (pillow-avif-plugin)
+IMAGE_SIBLING_FORMATS = env.list('IMAGE_SIBLING_FORMATS', default=['webp', 'avif'])
+
+# Nightly removal of media files nothing links to, see apps.common.media_gc.
+# Files younger than the grace period are kept (uploads not saved yet).
+MEDIA_GC_GRACE_DAYS = env.int('MEDIA_GC_GRACE_DAYS', 2)
+MEDIA_GC_BATCH_SIZE = env.int('MEDIA_GC_BATCH_SIZE', 200)
+MEDIA_GC_MAX_FILES = env.int('MEDIA_GC_MAX_FILES', 20000)
+
+# File downloads, see apps.common.downloads. With a prefix (an `internal`
+# nginx location aliased to MEDIA_ROOT) nginx sends the file, otherwise
+# Django streams it with Range support.
+DOWNLOAD_ACCEL_PREFIX = env.str('DOWNLOAD_ACCEL_PREFIX', '')
+# Download counts wait in the cache and are written by a beat task this often.
+DOWNLOAD_COUNT_FLUSH_INTERVAL = env.int('DOWNLOAD_COUNT_FLUSH_INTERVAL', 30)
+CELERY_BEAT_SCHEDULE['flush-download-counts'] = {
+    'task': 'apps.common.tasks.flush_download_counts',
+    'schedule': DOWNLOAD_COUNT_FLUSH_INTERVAL,
+}
+
+# ZIP archives, see apps.common.archives. Larger ones are built by a Celery
+# task instead of being streamed within the worker timeout.
+ARCHIVE_STREAM_MAX_SIZE = env.int('ARCHIVE_STREAM_MAX_SIZE', 20 * 1024 * 1024)
+ARCHIVE_BUILD_TIMEOUT = env.int('ARCHIVE_BUILD_TIMEOUT', 30 * 60)
+ARCHIVE_RETRY_AFTER = env.int('ARCHIVE_RETRY_AFTER', 10)
+
+# Bulk photo import into a media collection (admin action, run by a Celery
+# task), see apps.media.importing. Uploads wait in MEDIA_IMPORT_DIR, which the
+# web and worker containers share.
+MEDIA_IMPORT_DIR = env.str('MEDIA_IMPORT_DIR', str(BASE_DIR / 'uploads' / 'imports'))
+MEDIA_IMPORT_WORKERS = env.int('MEDIA_IMPORT_WORKERS', 4)
+# A whole event album can be picked in the multi-file upload (Django's default is 100)
+DATA_UPLOAD_MAX_NUMBER_FILES = env.int('DATA_UPLOAD_MAX_NUMBER_FILES', 500)
+
+# Resumable admin uploads of large files, see apps.common.uploads. The temp
+# files are kept outside MEDIA_ROOT; an unfinished upload is dropped after
+# the expiry.
+CHUNKED_UPLOAD_DIR = env.str('CHUNKED_UPLOAD_DIR', str(BASE_DIR / 'uploads'))
+CHUNKED_UPLOAD_CHUNK_SIZE = env.int('CHUNKED_UPLOAD_CHUNK_SIZE', 2 * 1024 * 1024)
+CHUNKED_UPLOAD_EXPIRY_HOURS = env.int('CHUNKED_UPLOAD_EXPIRY_HOURS', 24)
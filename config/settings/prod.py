@@ -1,13 +1,37 @@
 from .base import *
 from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 
 DEBUG = False
 
 ALLOWED_HOSTS = ['*']
 
+# Cache generations, shard mappings, download counters and throttles are
+# shared by every worker process: a per-process cache (the locmem default)
+# would serve stale pages, so production needs CACHE_URL (redis://...).
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    raise ImproperlyConfigured('Production needs a shared cache: set CACHE_URL, e.g. redis://redis:6379/1')
+
 STATIC_URL = 'https://cdn.e-bmsm.uz/static/'
 MEDIA_URL  = 'https://cdn.e-bmsm.uz/media/'
 
+# Connection handling (per gunicorn worker process):
+#   DB_POOL=True  -> psycopg3 connection pool, DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE
+#                    connections per worker, checked before being handed out
+#   DB_POOL=False -> persistent connections (DB_CONN_MAX_AGE) with health checks
+DB_POOL = env.bool('DB_POOL', False)
+DB_OPTIONS = {}
+if DB_POOL:
+    from psycopg_pool import ConnectionPool
+
+    DB_OPTIONS['pool'] = {
+        'min_size': env.int('DB_POOL_MIN_SIZE', 2),
+        'max_size': env.int('DB_POOL_MAX_SIZE', 10),
+        'timeout': env.float('DB_POOL_TIMEOUT', 10.0),
+        'max_idle': env.float('DB_POOL_MAX_IDLE', 600.0),
+        'check': ConnectionPool.check_connection,
+    }
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -16,10 +40,43 @@ DATABASES = {
         'PASSWORD': env.str('DB_PASSWORD'),
         'HOST': env.str('DB_HOST'),
         'PORT': env.int('DB_PORT'),
-        'ATOMIC_REQUESTS': True,
+        # Transactions are handled per request method by ReplicaRoutingMiddleware
+        'ATOMIC_REQUESTS': False,
+        # The pool manages connection lifetime itself
+        'CONN_MAX_AGE': 0 if DB_POOL else env.int('DB_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': not DB_POOL,
+        'OPTIONS': DB_OPTIONS,
     }
 }
 
+# Optional streaming replica for read-only requests
+if env.str('DB_REPLICA_HOST', ''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': env.str('DB_REPLICA_HOST'),
+        'PORT': env.int('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DB_OPTIONS),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Optional tenant shards: DB_SHARDS=shard1,shard2 plus DB_SHARD_SHARD1_URL=postgres://...
+# Schools are placed on a shard with `manage.py move_school_shard`. Only append
+# to DB_SHARDS: a shard's position picks its primary key block.
+DB_SHARDS = env.list('DB_SHARDS', default=[])
+for alias in DB_SHARDS:
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        **env.db_url(f'DB_SHARD_{alias.upper()}_URL'),
+        'OPTIONS': dict(DB_OPTIONS),
+    }
+
+if DB_SHARDS:
+    DATABASE_ROUTERS = ['apps.common.db_routers.TenantShardRouter', *DATABASE_ROUTERS]
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.contrib.auth.middleware.AuthenticationMiddleware') + 1,
+        'apps.main.middleware.SchoolShardMiddleware',
+    )
+
 # CORS_ALLOWED_ORIGINS = env.list('CORS_ALLOWED_ORIGINS')
 CORS_ALLOW_CREDENTIALS = True
 CORS_ORIGIN_ALLOW_ALL = True
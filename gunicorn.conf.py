@@ -0,0 +1,12 @@
+import os
+
+# Every worker keeps its own database connections: with DB_POOL=True the
+# total number of PostgreSQL connections is up to
+# GUNICORN_WORKERS * DB_POOL_MAX_SIZE (plus the same for the replica).
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+# The pool is opened lazily on the first query, so each worker gets its own
+# pool after the fork. Do not enable preload_app together with DB_POOL.
+preload_app = False